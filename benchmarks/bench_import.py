@@ -0,0 +1,93 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Benchmark of the import time, guarding against regressions.
+
+Measures the median time of a fresh interpreter importing radosgw and
+radosgw.connection, minus the interpreter startup, and checks that neither
+imports boto, and that 'import radosgw.connection' does not import the
+optional submodules. Exits with 1 if a check fails.
+
+  python benchmarks/bench_import.py [-n 20] [--max-package-ms 10] [--max-connection-ms 120]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# submodules only imported when the matching feature is used
+LAZY_SUBMODULES = frozenset(['radosgw.aio', 'radosgw.auth', 'radosgw.bototransport', 'radosgw.bulk',
+                             'radosgw.exception', 'radosgw.executor', 'radosgw.pool',
+                             'radosgw.stream', 'radosgw.transport', 'concurrent.futures'])
+
+
+def boto_modules(modules):
+    """Returns the sorted boto modules among modules."""
+    return sorted(name for name in modules if name == 'boto' or name.startswith('boto.'))
+
+
+def median_ms(code, n):
+    """Returns the median wall time of a fresh interpreter running code, in ms."""
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', code])
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def imported_modules(statement):
+    """Returns the modules imported by statement in a fresh interpreter."""
+    code = '%s; import sys; print("\\n".join(sys.modules))' % statement
+    return set(subprocess.check_output([sys.executable, '-c', code]).decode('utf-8').split())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=20, help='number of runs')
+    parser.add_argument('--max-package-ms', type=float, default=10.0,
+                        help="maximum time of 'import radosgw'")
+    parser.add_argument('--max-connection-ms', type=float, default=120.0,
+                        help="maximum time of 'import radosgw.connection'")
+    args = parser.parse_args()
+
+    startup = median_ms('pass', args.n)
+    package = median_ms('import radosgw', args.n) - startup
+    connection = median_ms('import radosgw.connection', args.n) - startup
+    print('interpreter startup:        {:7.1f} ms'.format(startup))
+    print('import radosgw:             {:7.1f} ms (max {})'.format(package, args.max_package_ms))
+    print('import radosgw.connection:  {:7.1f} ms (max {})'.format(connection, args.max_connection_ms))
+
+    failed = False
+    eager = boto_modules(imported_modules('import radosgw'))
+    if eager:
+        print("FAILED: 'import radosgw' imports {}".format(', '.join(eager)))
+        failed = True
+    modules = imported_modules('import radosgw.connection')
+    eager = sorted(LAZY_SUBMODULES & modules) + boto_modules(modules)
+    if eager:
+        print("FAILED: 'import radosgw.connection' imports {}".format(', '.join(eager)))
+        failed = True
+    if package > args.max_package_ms:
+        print("FAILED: 'import radosgw' slower than {} ms".format(args.max_package_ms))
+        failed = True
+    if connection > args.max_connection_ms:
+        print("FAILED: 'import radosgw.connection' slower than {} ms".format(args.max_connection_ms))
+        failed = True
+    sys.exit(1 if failed else 0)
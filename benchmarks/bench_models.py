@@ -0,0 +1,97 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Memory benchmark of the UserInfo and BucketInfo models.
+
+Decodes an inventory of users and buckets (JSON objects like the admin API
+returns them), then measures with tracemalloc the memory used by the JSON
+objects, by the model objects wrapping them, and by the model objects once
+all the keys, caps and usages are accessed.
+
+  python benchmarks/bench_models.py [--users 100000] [--buckets 500000]
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from radosgw.user import UserInfo
+from radosgw.bucket import BucketInfo
+
+USER_JSON = '''{"user_id": "user%(i)06d", "display_name": "User %(i)d", "email": "user%(i)06d@example.org",
+ "suspended": 0, "max_buckets": 1000, "subusers": [],
+ "keys": [{"user": "user%(i)06d", "access_key": "AK%(i)018d", "secret_key": "SK%(i)038d"}],
+ "swift_keys": [], "caps": [{"type": "usage", "perm": "read"}, {"type": "users", "perm": "read"}],
+ "stats": {"size": %(i)d, "size_actual": %(i)d, "size_utilized": %(i)d, "size_kb": %(i)d,
+           "size_kb_actual": %(i)d, "size_kb_utilized": %(i)d, "num_objects": %(i)d}}'''
+
+BUCKET_JSON = '''{"bucket": "bucket%(i)07d", "num_shards": 11, "tenant": "", "zonegroup": "zg",
+ "placement_rule": "default-placement", "explicit_placement": {"data_pool": "", "data_extra_pool": "",
+ "index_pool": ""}, "id": "c0ffee.%(i)d.1", "marker": "c0ffee.%(i)d.1", "index_type": "Normal",
+ "owner": "user%(u)06d", "ver": "0#1,1#1", "master_ver": "0#0,1#0", "mtime": "2020-01-01T00:00:00Z",
+ "max_marker": "0#,1#", "usage": {"rgw.main": {"size": %(i)d, "size_actual": %(i)d, "size_utilized": %(i)d,
+ "size_kb": %(i)d, "size_kb_actual": %(i)d, "size_kb_utilized": %(i)d, "num_objects": %(i)d}},
+ "bucket_quota": {"enabled": false, "check_on_raw": false, "max_size": -1, "max_size_kb": 0,
+ "max_objects": -1}}'''
+
+
+def measure(label, func):
+    """Returns the result of func, and prints the memory it allocated."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('{:<36} {:8.1f} MiB {:7.2f} s'.format(label, size / 1048576.0, elapsed))
+    return result
+
+
+def touch_users(users):
+    for user in users:
+        user.keys, user.swift_keys, user.caps, user.stats.num_objects
+    return users
+
+
+def touch_buckets(buckets):
+    for bucket in buckets:
+        bucket.owner, bucket.usage.num_objects
+    return buckets
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000, help='number of users')
+    parser.add_argument('--buckets', type=int, default=500000, help='number of buckets')
+    args = parser.parse_args()
+
+    user_dicts = measure('%d user JSON objects' % args.users,
+                         lambda: [json.loads(USER_JSON % {'i': i}) for i in range(args.users)])
+    users = measure('%d UserInfo' % args.users,
+                    lambda: [UserInfo(None, user_dict) for user_dict in user_dicts])
+    measure('  keys, caps and stats accessed', lambda: touch_users(users))
+    del users, user_dicts
+
+    bucket_dicts = measure('%d bucket JSON objects' % args.buckets,
+                           lambda: [json.loads(BUCKET_JSON % {'i': i, 'u': i % max(args.users, 1)})
+                                    for i in range(args.buckets)])
+    buckets = measure('%d BucketInfo' % args.buckets,
+                      lambda: [BucketInfo(None, bucket_dict) for bucket_dict in bucket_dicts])
+    measure('  usage accessed', lambda: touch_buckets(buckets))
@@ -0,0 +1,101 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+"""Benchmark of the usage rollup.
+
+Generates a month of hourly usage log bucket entries (like iter_usage
+yields them), then aggregates them with dict loops, and with
+radosgw.rollup.UsageRollup in pure Python and with NumPy:
+
+  python benchmarks/bench_rollup.py [--users 200] [--buckets-per-user 5] [--days 30]
+"""
+
+import argparse
+import collections
+import time
+import zlib
+
+from radosgw.rollup import UsageRollup, METRICS, HOUR, DAY
+
+CATEGORIES = ('get_obj', 'put_obj', 'list_bucket', 'delete_obj')
+
+ROLLUPS = [(('user', 'bucket', 'category'), HOUR),
+           (('user', 'category'), DAY),
+           (('user',), DAY),
+           (('category',), None)]
+
+
+def usage_entries(users, buckets_per_user, days):
+    entries = []
+    start = 1577836800
+    for u in range(users):
+        user = 'user%06d' % u
+        for b in range(buckets_per_user):
+            bucket = '%s-bucket%04d' % (user, b)
+            for hour in range(days * 24):
+                seed = ('%s:%d' % (bucket, hour)).encode('utf-8')
+                ops = zlib.crc32(seed) % 100 + 1
+                entries.append({'bucket': bucket, 'epoch': start + hour * HOUR,
+                                'owner': user, 'user': user,
+                                'categories': [{'category': category, 'bytes_sent': ops * 4096,
+                                                'bytes_received': ops * 1024, 'ops': ops,
+                                                'successful_ops': ops}
+                                               for category in CATEGORIES]})
+    return entries
+
+
+def dict_loops(entries, dimensions, granularity):
+    """The aggregation without rollup."""
+    aggregates = collections.defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    for entry in entries:
+        for category in entry['categories']:
+            key = tuple(category['category'] if dimension == 'category' else entry[dimension]
+                        for dimension in dimensions)
+            if granularity:
+                key += (entry['epoch'] - entry['epoch'] % granularity,)
+            aggregate = aggregates[key]
+            for metric in METRICS:
+                aggregate[metric] += category[metric]
+    return len(aggregates)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--buckets-per-user', type=int, default=5)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    entries = usage_entries(args.users, args.buckets_per_user, args.days)
+    print('%d entries' % len(entries))
+    print('{:<26} {:>11} {:>9} {:>9} {:>9} {:>9}'.format('dimensions', 'granularity', 'groups',
+                                                         'dict s', 'python s', 'numpy s'))
+    for dimensions, granularity in ROLLUPS:
+        times = []
+        start = time.perf_counter()
+        groups = dict_loops(entries, dimensions, granularity)
+        times.append(time.perf_counter() - start)
+        for vectorized in (False, True):
+            start = time.perf_counter()
+            try:
+                rollup = UsageRollup(dimensions, granularity, vectorized=vectorized).extend(entries)
+            except ImportError:
+                times.append(float('nan'))
+                continue
+            times.append(time.perf_counter() - start)
+            assert len(rollup) == groups
+        print('{:<26} {:>11} {:>9} {:>9.2f} {:>9.2f} {:>9.2f}'.format(','.join(dimensions),
+                                                                      str(granularity), groups, *times))
@@ -0,0 +1,74 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Benchmark of the per-request CPU cost of the AWS4 request signing.
+
+Compares the boto S3 AWS4 handler with the radosgw one (cached signing
+keys and admin path templates). No request is sent.
+
+  python benchmarks/bench_signing.py [-n 20000]
+"""
+
+import argparse
+import copy
+import time
+
+import boto
+import boto.auth
+
+import radosgw.connection
+
+REQUESTS = [
+    ('GET', '/user', {'uid': 'testuser', 'stats': True, 'format': 'json'}),
+    ('GET', '/bucket', {'bucket': 'testbucket', 'stats': True, 'format': 'json'}),
+    ('PUT', '/user?key', {'uid': 'testuser', 'key-type': 's3', 'format': 'json'}),
+    ('GET', '/metadata/user', {'max-entries': 1000, 'format': 'json'}),
+]
+
+
+def bench(rgwadmin, n):
+    """Returns the CPU time per request (build and sign), in microseconds."""
+    start = time.process_time()
+    for i in range(n):
+        method, path, params = REQUESTS[i % len(REQUESTS)]
+        http_request = rgwadmin._build_request(method, path, params)
+        http_request.authorize(connection=rgwadmin)
+    return (time.process_time() - start) * 1e6 / n
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=20000, help='number of requests')
+    args = parser.parse_args()
+
+    rgwadmin = radosgw.connection.RadosGWAdminConnection(host='rgw.example.org',
+                                                         access_key='ACCESSKEY',
+                                                         secret_key='SECRETKEY')
+    boto_rgwadmin = copy.copy(rgwadmin)
+    boto_rgwadmin._auth_handler = boto.auth.S3HmacAuthV4Handler(rgwadmin.host, boto.config,
+                                                                rgwadmin.provider)
+    boto_rgwadmin._auth_handler.region_name = 's3'
+
+    # warm up
+    bench(rgwadmin, 100)
+    bench(boto_rgwadmin, 100)
+
+    boto_us = bench(boto_rgwadmin, args.n)
+    radosgw_us = bench(rgwadmin, args.n)
+    print('boto.auth.S3HmacAuthV4Handler:    {:8.1f} us/request'.format(boto_us))
+    print('radosgw.auth.S3HmacAuthV4Handler: {:8.1f} us/request'.format(radosgw_us))
+    print('CPU per request: {:+.1f}%'.format((radosgw_us - boto_us) * 100 / boto_us))
@@ -0,0 +1,156 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Throughput benchmark of the admin operations, against the in-process
+radosgw.fakeserver.FakeRadosGW.
+
+Measures the requests per second and the request latency percentiles of
+get_users, get_buckets, get_usage and the bulk operations:
+
+  python benchmarks/bench_throughput.py [--transport http] [--latency 0.002]
+         [--users 200] [--concurrency 8] [--scenario get_users ...] [--json]
+"""
+
+import argparse
+import json
+import threading
+import time
+
+import radosgw.executor
+from radosgw.fakeserver import FakeRadosGW
+
+
+class Recorder(object):
+    """Records the latency of the requests of a connection."""
+
+    def __init__(self, rgwadmin):
+        self.latencies = []
+        self._lock = threading.Lock()
+        make_request = rgwadmin.make_request
+
+        def timed_make_request(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return make_request(*args, **kwargs)
+            finally:
+                latency = time.perf_counter() - start
+                with self._lock:
+                    self.latencies.append(latency)
+
+        rgwadmin.make_request = timed_make_request
+
+    def reset(self):
+        with self._lock:
+            self.latencies = []
+
+    def percentile(self, p):
+        """Returns the p-th percentile (nearest rank) of the latencies, in ms."""
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        rank = max(int(round(p / 100.0 * len(latencies))) - 1, 0)
+        return latencies[rank] * 1000
+
+
+def get_users(rgwadmin, fake, args):
+    return len(list(rgwadmin.get_users()))
+
+
+def get_users_concurrent(rgwadmin, fake, args):
+    return len(list(rgwadmin.get_users(concurrency=args.concurrency)))
+
+
+def get_users_stats(rgwadmin, fake, args):
+    return len(list(rgwadmin.get_users(concurrency=args.concurrency, stats=True)))
+
+
+def get_buckets(rgwadmin, fake, args):
+    return len(list(rgwadmin.get_buckets()))
+
+
+def get_buckets_stream(rgwadmin, fake, args):
+    return len(list(rgwadmin.get_buckets(stream=True)))
+
+
+def get_usage(rgwadmin, fake, args):
+    usages = radosgw.executor.bounded_map(lambda uid: rgwadmin.get_usage(uid=uid),
+                                          rgwadmin.iter_uids(), args.concurrency)
+    return sum(len(usage['entries']) for usage in usages)
+
+
+def create_users(rgwadmin, fake, args):
+    specs = [{'uid': 'bench-%s-%06d' % (args.run, i),
+              'display_name': 'Bench User %d' % i,
+              'user_quota': {'max_objects': 1000, 'enabled': True}}
+             for i in range(args.users)]
+    results = list(rgwadmin.create_users(specs, concurrency=args.concurrency))
+    return sum(1 for result in results if result.ok)
+
+
+def delete_buckets(rgwadmin, fake, args):
+    names = ['bench-%s-bucket%06d' % (args.run, i) for i in range(args.users)]
+    for name in names:
+        fake.add_bucket(name, 'user000000')
+    summary = rgwadmin.delete_buckets(names, concurrency=args.concurrency)
+    return len(summary.deleted)
+
+
+SCENARIOS = [get_users, get_users_concurrent, get_users_stats,
+             get_buckets, get_buckets_stream, get_usage,
+             create_users, delete_buckets]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transport', default='boto', choices=['boto', 'http'])
+    parser.add_argument('--latency', type=float, default=0.0, help='server latency, in seconds')
+    parser.add_argument('--users', type=int, default=200, help='number of users')
+    parser.add_argument('--buckets-per-user', type=int, default=10)
+    parser.add_argument('--usage-hours', type=int, default=24)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenario', action='append', choices=[s.__name__ for s in SCENARIOS],
+                        help='scenario to run (repeatable). Default: all')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON lines')
+    args = parser.parse_args()
+    args.run = '%x' % int(time.time())
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.__name__ in args.scenario]
+
+    with FakeRadosGW(users=args.users, buckets_per_user=args.buckets_per_user,
+                     usage_hours=args.usage_hours, latency=args.latency) as fake:
+        rgwadmin = fake.connection(transport=args.transport, pool_size=args.concurrency)
+        recorder = Recorder(rgwadmin)
+        if not args.json:
+            print('{:<22} {:>8} {:>8} {:>9} {:>8} {:>8} {:>8}'.format(
+                'scenario', 'items', 'requests', 'req/s', 'p50 ms', 'p90 ms', 'p99 ms'))
+        for scenario in scenarios:
+            recorder.reset()
+            start = time.perf_counter()
+            items = scenario(rgwadmin, fake, args)
+            elapsed = time.perf_counter() - start
+            requests = len(recorder.latencies)
+            result = {'scenario': scenario.__name__, 'transport': args.transport,
+                      'items': items, 'requests': requests, 'seconds': elapsed,
+                      'rps': requests / elapsed,
+                      'p50_ms': recorder.percentile(50),
+                      'p90_ms': recorder.percentile(90),
+                      'p99_ms': recorder.percentile(99)}
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print('{scenario:<22} {items:>8} {requests:>8} {rps:>9.1f} '
+                      '{p50_ms:>8.2f} {p90_ms:>8.2f} {p99_ms:>8.2f}'.format(**result))
+        rgwadmin.close()
@@ -15,6 +15,20 @@
 #
 # author: Valery Tschopp <valery.tschopp@switch.ch>
 
-import radosgw.exception
-import radosgw.connection
-import radosgw.utils
+# The submodules are imported on first access (i.e. radosgw.connection), so that
+# 'import radosgw' does not import boto.
+import importlib
+
+_SUBMODULES = ('aio', 'auth', 'balancer', 'bototransport', 'bulk', 'cache', 'columnar', 'connection',
+               'exception', 'executor', 'fakeserver', 'keyindex', 'metrics', 'pool', 'ratelimit', 'retry',
+               'rollup', 'signer', 'store', 'stream', 'sync', 'transport', 'trim', 'utils')
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module('radosgw.' + name)
+    raise AttributeError("module 'radosgw' has no attribute '%s'" % name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES))
@@ -0,0 +1,450 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Ceph RADOS Gateway asyncio admin connection.
+
+Requires the aiohttp package.
+"""
+
+import asyncio
+import json
+
+import boto
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = None
+
+import radosgw.bototransport
+import radosgw.exception
+from radosgw.connection import _kwargs_get
+from radosgw.user import UserInfo
+from radosgw.bucket import BucketInfo, IndexCheckResult
+
+
+class AsyncRadosGWAdminConnection(object):
+    """Ceph RADOS Gateway (radosgw) asyncio admin connection.
+
+    Same methods as radosgw.connection.RadosGWAdminConnection, as coroutines.
+    The requests are signed by an embedded boto transport and sent
+    with an aiohttp session. Pass the same aiohttp.TCPConnector (or session)
+    to several connections to share their connection pool.
+
+    The UserInfo and BucketInfo objects returned refer to this connection,
+    so their operations (i.e. bucket.delete()) return awaitables.
+    :see: http://docs.ceph.com/docs/master/radosgw/adminops/
+    """
+    def __init__(self,
+                 host,
+                 access_key, secret_key,
+                 admin_path='/admin',
+                 aws_signature='AWS4',
+                 timeout=30,
+                 is_secure=True, port=None,
+                 debug=False,
+                 security_token=None,
+                 validate_certs=True,
+                 pool_size=100,
+                 connector=None, session=None):
+        """Constructor.
+        :param int pool_size: max number of simultaneous connections of the pool. Default: 100
+        :param aiohttp.BaseConnector connector: shared connector (not closed by close())
+        :param aiohttp.ClientSession session: shared session (not closed by close())
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncRadosGWAdminConnection requires the aiohttp package')
+        # the boto transport is only used to build and sign the requests
+        self._signer = radosgw.bototransport.BotoTransport(host, access_key, secret_key,
+                                                           admin_path=admin_path,
+                                                           aws_signature=aws_signature,
+                                                           timeout=timeout,
+                                                           is_secure=is_secure, port=port,
+                                                           debug=debug,
+                                                           security_token=security_token,
+                                                           validate_certs=validate_certs)
+        self._admin_path = admin_path
+        self._timeout = timeout
+        self._validate_certs = validate_certs
+        self._pool_size = pool_size
+        self._connector = connector
+        self._session = session
+        self._owns_session = session is None
+
+    def __repr__(self):
+        return '<%s:%s>' % (self.__class__.__name__, self._signer.host)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def host(self):
+        return self._signer.host
+
+    def get_admin_path(self):
+        """Returns the admin query path prefix."""
+        return self._admin_path
+
+    def _get_session(self):
+        if self._session is None:
+            connector = self._connector
+            if connector is None:
+                connector = aiohttp.TCPConnector(limit=self._pool_size,
+                                                 ssl=None if self._validate_certs else False)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                connector_owner=self._connector is None,
+                timeout=aiohttp.ClientTimeout(total=self._timeout))
+        return self._session
+
+    async def close(self):
+        """Closes the session, if owned by this connection."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def make_request(self, method, path, query_params=None, headers=None, data=''):
+        """Makes a request to the RADOS GW admin server.
+        :param str method: GET|PUT|HEAD|POST|DELETE|...
+        :param str path: admin sub request path (i.e. /user)
+        :param dict query_params: url query parameters
+        :returns tuple: the HTTP status, reason and body
+        """
+        signer = self._signer
+        http_request = signer._build_request(method, path, query_params, headers, data)
+        # same signature than the boto transport (AWSAuthConnection._mexe)
+        http_request.authorize(connection=signer)
+        if not http_request.headers.get('Host'):
+            signer.set_host_header(http_request)
+        url = '%s://%s:%d%s' % (signer.protocol, http_request.host, http_request.port,
+                                http_request.path)
+        body = http_request.body
+        if not isinstance(body, bytes) and hasattr(body, 'encode'):
+            body = body.encode('utf-8')
+        session = self._get_session()
+        async with session.request(method, yarl.URL(url, encoded=True),
+                                   headers=http_request.headers,
+                                   # no data: avoid an unsigned Content-Type header
+                                   data=body or None) as response:
+            return response.status, response.reason, await response.read()
+
+    async def _request(self, method, path, query_params):
+        """Makes a request and processes the response.
+        :returns str: the body, or None
+        :throws radosgw.exception.RadosGWAdminError: if an error occurs
+        """
+        status, reason, body = await self.make_request(method, path, query_params)
+        boto.log.debug('status: %d body: %s' % (status, body))
+        if status == 200:
+            if not body:
+                return None
+            return body.decode('utf-8')
+        else:
+            boto.log.error('%s %s' % (status, reason))
+            boto.log.error('%s' % body)
+            raise radosgw.exception.factory(status, reason, body)
+
+    async def get_usage(self, **kwargs):
+        """Gets bandwidth usage information.
+        :see: radosgw.connection.RadosGWAdminConnection#get_usage
+        """
+        params = {}
+        _kwargs_get('uid', kwargs, params)
+        _kwargs_get('start', kwargs, params)
+        _kwargs_get('end', kwargs, params)
+        _kwargs_get('show_summary', kwargs, params, True)
+        _kwargs_get('show_entries', kwargs, params, True)
+        _kwargs_get('format', kwargs, params, 'json')
+        body = await self._request('GET', '/usage', params)
+        return json.loads(body)
+
+    async def delete_usage(self, **kwargs):
+        """Trim usage
+        :see: radosgw.connection.RadosGWAdminConnection#delete_usage
+        """
+        params = {}
+        _kwargs_get('uid', kwargs, params)
+        _kwargs_get('start', kwargs, params)
+        _kwargs_get('end', kwargs, params)
+        _kwargs_get('remove-all', kwargs, params)
+        return await self._request('DELETE', '/usage', params)
+
+    async def get_uids(self, **kwargs):
+        """Get all the users uid.
+        :param int max_entries: number of uids fetched per request. Default: 1000
+        :return list uids: the list of uid
+        """
+        return [uid async for uid in self.iter_uids(**kwargs)]
+
+    async def iter_uids(self, max_entries=1000, **kwargs):
+        """Iterates over all the users uid, fetching the metadata listing
+        page by page (max-entries/marker), only when needed.
+        :see: radosgw.connection.RadosGWAdminConnection#iter_uids
+        """
+        params = {'max-entries': max_entries}
+        _kwargs_get('format', kwargs, params, 'json')
+        while True:
+            body = await self._request('GET', '/metadata/user', params)
+            page = json.loads(body)
+            if isinstance(page, list):
+                # radosgw without paging support returns all the keys
+                for uid in page:
+                    yield uid
+                return
+            for uid in page['keys']:
+                yield uid
+            if not page.get('truncated') or not page.get('marker'):
+                return
+            params['marker'] = page['marker']
+
+    async def get_users(self, concurrency=None, ordered=True, **kwargs):
+        """Get all the users information.
+        :param int concurrency: number of users fetched in parallel. Default: sequential
+        :param bool ordered: with concurrency, True to yield the users in the
+                             uid listing order, False in completion order. Default: True
+        :param bool stats: True to get the users stats
+        :param int max_entries: number of uids listed per request. Default: 1000
+        :returns async iterator: async iterator of users information
+        """
+        stats = kwargs.pop('stats', False)
+
+        async def get_user(uid):
+            if stats:
+                try:  # Valid user without stats return 404 error
+                    return await self.get_user(uid, stats=True)
+                except radosgw.exception.NoSuchKey:
+                    return await self.get_user(uid, stats=False)
+            return await self.get_user(uid)
+
+        if not concurrency:
+            async for uid in self.iter_uids(**kwargs):
+                yield await get_user(uid)
+            return
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded_get_user(uid):
+            async with semaphore:
+                return await get_user(uid)
+
+        # schedule a window of tasks, not one task per uid
+        window = concurrency * 2
+        uids = []
+        async for uid in self.iter_uids(**kwargs):
+            uids.append(uid)
+            if len(uids) >= window:
+                async for user in _gather(bounded_get_user, uids, ordered):
+                    yield user
+                uids = []
+        async for user in _gather(bounded_get_user, uids, ordered):
+            yield user
+
+    async def get_user(self, uid, **kwargs):
+        """Get the user information.
+        :see: radosgw.connection.RadosGWAdminConnection#get_user
+        """
+        if 'tenant' in kwargs:
+            uid = kwargs['tenant'] + '$' + uid
+        params = {'uid': uid}
+        _kwargs_get('format', kwargs, params, 'json')
+        _kwargs_get('stats', kwargs, params, False)
+        body = await self._request('GET', '/user', params)
+        return UserInfo(self, json.loads(body))
+
+    async def create_user(self, uid, display_name, **kwargs):
+        """Creates a new user.
+        :see: radosgw.connection.RadosGWAdminConnection#create_user
+        """
+        if 'tenant' in kwargs:
+            uid = kwargs['tenant'] + "$" + uid
+        params = {'uid': uid, 'display-name': display_name}
+        _kwargs_get('email', kwargs, params)
+        _kwargs_get('key_type', kwargs, params, 's3')
+        _kwargs_get('access_key', kwargs, params)
+        _kwargs_get('secret_key', kwargs, params)
+        _kwargs_get('user_caps', kwargs, params)
+        _kwargs_get('generate_key', kwargs, params, True)
+        _kwargs_get('max_buckets', kwargs, params)
+        _kwargs_get('suspended', kwargs, params)
+        _kwargs_get('format', kwargs, params, 'json')
+        body = await self._request('PUT', '/user', params)
+        return UserInfo(self, json.loads(body))
+
+    async def update_user(self, uid, **kwargs):
+        """Update an existing user.
+        :see: radosgw.connection.RadosGWAdminConnection#update_user
+        """
+        params = {'uid': uid}
+        _kwargs_get('display_name', kwargs, params)
+        _kwargs_get('email', kwargs, params)
+        _kwargs_get('key_type', kwargs, params)
+        _kwargs_get('access_key', kwargs, params)
+        _kwargs_get('secret_key', kwargs, params)
+        _kwargs_get('user_caps', kwargs, params)
+        _kwargs_get('generate_key', kwargs, params, False)
+        _kwargs_get('max_buckets', kwargs, params)
+        _kwargs_get('suspended', kwargs, params)
+        _kwargs_get('format', kwargs, params, 'json')
+        body = await self._request('POST', '/user', params)
+        return UserInfo(self, json.loads(body))
+
+    async def delete_user(self, uid, purge_data=True, **kwargs):
+        """Delete a user identified by uid.
+        :see: radosgw.connection.RadosGWAdminConnection#delete_user
+        """
+        params = {'uid': uid, 'purge-data': purge_data}
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('DELETE', '/user', params) is None
+
+    async def create_key(self, uid, **kwargs):
+        """Creates a key for the user specified
+        :see: radosgw.connection.RadosGWAdminConnection#create_key
+        """
+        params = {'uid': uid}
+        _kwargs_get('key_type', kwargs, params)
+        _kwargs_get('access_key', kwargs, params)
+        _kwargs_get('secret_key', kwargs, params)
+        _kwargs_get('generate_key', kwargs, params, False)
+        _kwargs_get('format', kwargs, params, 'json')
+        body = await self._request('PUT', '/user?key', params)
+        return json.loads(body)
+
+    async def remove_key(self, access_key, **kwargs):
+        """Delete an existing access key
+        :see: radosgw.connection.RadosGWAdminConnection#remove_key
+        """
+        params = {'access-key': access_key}
+        _kwargs_get('uid', kwargs, params)
+        _kwargs_get('key_type', kwargs, params)
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('DELETE', '/user?key', params) is None
+
+    async def get_bucket(self, bucket_name, **kwargs):
+        """Get a bucket information.
+        :see: radosgw.connection.RadosGWAdminConnection#get_bucket
+        """
+        params = {'bucket': bucket_name}
+        _kwargs_get('stats', kwargs, params, True)
+        _kwargs_get('format', kwargs, params, 'json')
+        body = await self._request('GET', '/bucket', params)
+        return BucketInfo(self, json.loads(body))
+
+    async def get_buckets(self, uid=None, **kwargs):
+        """Get all, or user specific, buckets information.
+        :param str uid: the user id
+        :returns async iterator: async iterator of buckets information
+        """
+        params = {'stats': True}
+        if uid:
+            params['uid'] = uid
+        _kwargs_get('format', kwargs, params, 'json')
+        body = await self._request('GET', '/bucket', params)
+        for bucket_dict in json.loads(body):
+            yield BucketInfo(self, bucket_dict)
+
+    async def check_bucket_index(self, bucket_name, check_objects=True, fix=False, **kwargs):
+        """Check the index of an existing bucket.
+        :see: radosgw.connection.RadosGWAdminConnection#check_bucket_index
+        """
+        params = {'bucket': bucket_name,
+                  'check-objects': check_objects,
+                  'fix': fix}
+        _kwargs_get('format', kwargs, params, 'json')
+        body = await self._request('GET', '/bucket?index', params)
+        return IndexCheckResult(bucket_name, json.loads(body) if body else None, fix)
+
+    async def delete_bucket(self, bucket_name, purge_objects=True, **kwargs):
+        """Delete an existing bucket.
+        :see: radosgw.connection.RadosGWAdminConnection#delete_bucket
+        """
+        params = {'bucket': bucket_name,
+                  'purge-objects': purge_objects}
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('DELETE', '/bucket', params) is None
+
+    async def unlink_bucket(self, bucket_name, uid, **kwargs):
+        """Unlink a bucket from a specified user.
+        :see: radosgw.connection.RadosGWAdminConnection#unlink_bucket
+        """
+        params = {'bucket': bucket_name, 'uid': uid}
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('POST', '/bucket', params) is None
+
+    async def link_bucket(self, bucket_name, bucket_id, uid, **kwargs):
+        """Link a bucket to a specified user, unlinking the bucket from any previous user.
+        :see: radosgw.connection.RadosGWAdminConnection#link_bucket
+        """
+        params = {'bucket': bucket_name, 'bucket-id': bucket_id, 'uid': uid}
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('PUT', '/bucket', params) is None
+
+    async def remove_object(self, bucket_name, object_name, **kwargs):
+        """Remove an existing object from a bucket.
+        :see: radosgw.connection.RadosGWAdminConnection#remove_object
+        """
+        params = {'bucket': bucket_name,
+                  'object': object_name}
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('DELETE', '/bucket?object', params) is None
+
+    async def get_policy(self, bucket_name, object_name=None, **kwargs):
+        """Read the policy of an object or bucket.
+        :see: radosgw.connection.RadosGWAdminConnection#get_policy
+        """
+        params = {'bucket': bucket_name}
+        if object_name:
+            params['object'] = object_name
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('GET', '/bucket?policy', params)
+
+    async def get_quota(self, uid, quota_type, **kwargs):
+        """Gets the quota of an specific quota_type (user or bucket).
+        :see: radosgw.connection.RadosGWAdminConnection#get_quota
+        """
+        params = {'uid': uid, 'quota-type': quota_type}
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('GET', '/user?quota', params)
+
+    async def set_quota(self, uid, quota_type, **kwargs):
+        """Sets the quota of an specific quota_type (user or bucket).
+        :see: radosgw.connection.RadosGWAdminConnection#set_quota
+        """
+        params = {'uid': uid, 'quota-type': quota_type}
+        _kwargs_get('max_objects', kwargs, params)
+        _kwargs_get('max_size_kb', kwargs, params)
+        _kwargs_get('enabled', kwargs, params)
+        _kwargs_get('format', kwargs, params, 'json')
+        return await self._request('PUT', '/user?quota', params)
+
+
+async def _gather(func, items, ordered):
+    """Runs func concurrently on all the items and yields the results."""
+    tasks = [asyncio.ensure_future(func(item)) for item in items]
+    try:
+        if ordered:
+            for task in tasks:
+                yield await task
+        else:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
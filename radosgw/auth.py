@@ -0,0 +1,86 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""AWS signature handlers for the admin connection."""
+
+import copy
+import functools
+import hashlib
+import hmac
+
+import boto.auth
+import boto.auth_handler
+from boto.compat import urllib, parse_qs_safe
+
+from radosgw.signer import SigningKeyCache, EMPTY_SHA256
+
+
+@functools.lru_cache(maxsize=256)
+def _split_auth_path(auth_path):
+    """Returns the path and the query args of an admin auth path (i.e. /admin/user?key)."""
+    parsed_path = urllib.parse.urlparse(auth_path)
+    query_args = parse_qs_safe(parsed_path.query, keep_blank_values=True)
+    for key, value in query_args.items():
+        if isinstance(value, (list, tuple)) and len(value) == 1:
+            query_args[key] = value[0]
+    return parsed_path.path, query_args
+
+
+@functools.lru_cache(maxsize=256)
+def _s3_canonical_uri(path):
+    """Returns the S3 canonical URI of a path (without query)."""
+    return urllib.parse.quote(urllib.parse.unquote(path), safe='/~')
+
+
+class S3HmacAuthV4Handler(boto.auth.S3HmacAuthV4Handler, boto.auth_handler.AuthHandler):
+    """boto S3 AWS4 signature, with cached signing keys and admin path templates.
+
+    The derived signing key is cached per day/region/service, and the parsed
+    auth path and canonical URI are cached per admin path (i.e. /admin/user?key),
+    instead of being computed for each request.
+    """
+
+    capability = ['radosgw-hmac-v4-s3']
+
+    signing_keys = SigningKeyCache()
+
+    def signature(self, http_request, string_to_sign):
+        signing_key = self.signing_keys.get(self._provider.secret_key,
+                                            http_request.timestamp,
+                                            http_request.region_name,
+                                            http_request.service_name)
+        return hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def canonical_uri(self, http_request):
+        return _s3_canonical_uri(http_request.path.split('?', 1)[0])
+
+    def mangle_path_and_params(self, req):
+        modified_req = copy.copy(req)
+        modified_req.auth_path, query_args = _split_auth_path(req.auth_path)
+        if req.params is None:
+            modified_req.params = {}
+        else:
+            modified_req.params = req.params.copy()
+        modified_req.params.update(query_args)
+        return modified_req
+
+    def payload(self, http_request):
+        if http_request.headers.get('x-amz-content-sha256'):
+            return http_request.headers['x-amz-content-sha256']
+        if not http_request.body:
+            return EMPTY_SHA256
+        return boto.auth.S3HmacAuthV4Handler.payload(self, http_request)
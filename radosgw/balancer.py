@@ -0,0 +1,134 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Load balancing of the admin requests across several radosgw hosts."""
+
+import threading
+import time
+
+import boto
+
+LEAST_OUTSTANDING = 'least_outstanding'
+ROUND_ROBIN = 'round_robin'
+
+
+class Endpoint(object):
+    """State of a radosgw host of the balancer."""
+
+    __slots__ = ('host', 'outstanding', 'requests', 'failures', 'ejected_until')
+
+    def __init__(self, host):
+        self.host = host
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def __repr__(self):
+        return '<Endpoint: %s outstanding=%d failures=%d>' % (self.host, self.outstanding, self.failures)
+
+
+class Balancer(object):
+    """Thread-safe balancer of the requests across several radosgw hosts.
+
+    Selects the host with the least outstanding requests (or round-robin),
+    among the healthy hosts. Passive health check: a host is ejected during
+    eject_time seconds after failure_threshold consecutive failures (5xx or
+    connection error). If all the hosts are ejected, the one ejected first
+    is used.
+    """
+
+    def __init__(self, hosts, strategy=LEAST_OUTSTANDING, failure_threshold=3, eject_time=30.0,
+                 timer=time.monotonic):
+        """Constructor.
+        :param list hosts: the radosgw hosts (same port)
+        :param str strategy: 'least_outstanding' or 'round_robin'. Default: 'least_outstanding'
+        :param int failure_threshold: consecutive failures ejecting a host. Default: 3
+        :param float eject_time: ejection time, in seconds. Default: 30
+        """
+        if not hosts:
+            raise ValueError('no hosts')
+        if strategy not in (LEAST_OUTSTANDING, ROUND_ROBIN):
+            raise ValueError('unknown strategy: %r' % strategy)
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.eject_time = eject_time
+        self._endpoints = [Endpoint(host) for host in hosts]
+        self._by_host = dict((endpoint.host, endpoint) for endpoint in self._endpoints)
+        self._next = 0
+        self._timer = timer
+        self._lock = threading.Lock()
+
+    @property
+    def hosts(self):
+        return [endpoint.host for endpoint in self._endpoints]
+
+    @property
+    def endpoints(self):
+        return list(self._endpoints)
+
+    def healthy_hosts(self):
+        """Returns the hosts not ejected."""
+        now = self._timer()
+        return [endpoint.host for endpoint in self._endpoints if endpoint.ejected_until <= now]
+
+    def acquire(self):
+        """Selects the host of a request, counted as outstanding until released.
+        :returns str: the host
+        """
+        with self._lock:
+            now = self._timer()
+            count = len(self._endpoints)
+            # rotate the start, to break the ties round-robin
+            start = self._next
+            self._next = (start + 1) % count
+            candidates = [self._endpoints[(start + i) % count] for i in range(count)]
+            healthy = [endpoint for endpoint in candidates if endpoint.ejected_until <= now]
+            if not healthy:
+                endpoint = min(candidates, key=lambda endpoint: endpoint.ejected_until)
+            elif self.strategy == ROUND_ROBIN:
+                endpoint = healthy[0]
+            else:
+                endpoint = min(healthy, key=lambda endpoint: endpoint.outstanding)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint.host
+
+    def release(self, host, ok=True):
+        """Releases the host of a request.
+        :param str host: the host returned by acquire
+        :param bool ok: False if the request failed (5xx or connection error), None if it
+                        has no outcome (client-side error). Default: True
+        """
+        with self._lock:
+            endpoint = self._by_host[host]
+            endpoint.outstanding -= 1
+            if ok is None:
+                return
+            if ok:
+                endpoint.failures = 0
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.failure_threshold:
+                boto.log.warning('%s ejected for %gs after %d failures' % (host, self.eject_time,
+                                                                           endpoint.failures))
+                endpoint.ejected_until = self._timer() + self.eject_time
+                # back in: ejected again on the next failure
+                endpoint.failures = self.failure_threshold - 1
+
+    def __repr__(self):
+        return '<Balancer: %s %s>' % (self.strategy, ', '.join(self.hosts))
@@ -0,0 +1,189 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""The boto transport of the admin connection, the default one.
+
+Imported with boto when a connection uses it, so that importing
+radosgw.connection does not import boto.
+"""
+
+from urllib.parse import urlencode
+
+import boto
+import boto.connection
+
+# registers the radosgw-hmac-v4-s3 boto auth handler
+import radosgw.auth
+
+
+class BotoTransport(boto.connection.AWSAuthConnection):
+    """boto transport: builds, signs and sends the admin requests with boto.
+
+    INTERNAL ONLY: the boto.connection.AWSAuthConnection attributes are available
+    on the connection.
+    :see: radosgw.connection.RadosGWAdminConnection#__init__
+    """
+
+    def __init__(self, host, access_key, secret_key,
+                 admin_path='/admin',
+                 aws_signature='AWS4',
+                 timeout=30,
+                 is_secure=True, port=None,
+                 proxy=None, proxy_port=None, proxy_user=None, proxy_pass=None,
+                 debug=False,
+                 https_connection_factory=None, security_token=None,
+                 validate_certs=True,
+                 pool_size=None, pool_block_timeout=None,
+                 send_once=False):
+        """Constructor.
+        :param bool send_once: True to send the requests once, and return the error
+                               responses (retried by a radosgw.retry.RetryPolicy),
+                               False for the boto retries. Default: False
+        """
+        if debug:
+            boto.set_stream_logger('boto')
+            debug_boto = 10
+        else:
+            debug_boto = 0
+
+        # AWS4 and AWS2 signature support
+        # see radosgw.auth.S3HmacAuthV4Handler
+        # see boto.auth.HmacAuthV1Handler
+        if aws_signature == 'AWS4':
+            # AWS4 signature, with cached signing keys
+            self._signature_algo = ['radosgw-hmac-v4-s3']
+        else:
+            # old style AWS2 signature algo
+            self._signature_algo = ['hmac-v1']
+
+        # init AWS connection
+        boto.connection.AWSAuthConnection.__init__(self,
+                                                   host=host,
+                                                   aws_access_key_id=access_key,
+                                                   aws_secret_access_key=secret_key,
+                                                   is_secure=is_secure, port=port,
+                                                   proxy=proxy, proxy_port=proxy_port,
+                                                   proxy_user=proxy_user, proxy_pass=proxy_pass,
+                                                   debug=debug_boto,
+                                                   https_connection_factory=https_connection_factory,
+                                                   path=admin_path,
+                                                   provider='aws',
+                                                   security_token=security_token,
+                                                   suppress_consec_slashes=True,
+                                                   validate_certs=validate_certs)
+        # set http_socket_timeout
+        self.http_connection_kwargs['timeout'] = timeout
+        if aws_signature == 'AWS4':
+            self._set_auth_region_name('s3')
+        self._send_once = send_once
+        self._bounded_pool = bool(pool_size)
+        if self._bounded_pool:
+            # thread-safe mode: share a bounded pool of keep-alive connections
+            import radosgw.pool
+            self._pool = radosgw.pool.BoundedConnectionPool(pool_size, pool_block_timeout)
+
+    def _required_auth_capability(self):
+        """Authentication algo required for S3"""
+        return self._signature_algo
+
+    def request(self, method, path, query_params=None, headers=None, data='', host=None,
+                sender=None, override_num_retries=3, retry_handler=None, preload=True):
+        """Sends a signed request.
+        :param str path: admin sub request path (i.e. /user)
+        :see: radosgw.connection.RadosGWAdminConnection#make_request
+        """
+        http_request = self._build_request(method, path, query_params, headers, data, host)
+        if self._bounded_pool:
+            release = self._pool.acquire(http_request.host, http_request.port, self.is_secure)
+            connections = []
+            if not preload:
+                sender = _recording_sender(sender, connections)
+            try:
+                response = self._send_http_request(http_request, sender, override_num_retries,
+                                                   retry_handler)
+            except BaseException:
+                release()
+                raise
+            if not preload:
+                # the slot is held until the body is read, or the response closed
+                return radosgw.pool.SlotResponse(response, release, connections[-1])
+            try:
+                # cached by boto HTTPResponse, frees the connection for the next request
+                response.read()
+            finally:
+                release()
+            return response
+        return self._send_http_request(http_request, sender, override_num_retries, retry_handler)
+
+    def _send_http_request(self, http_request, sender, override_num_retries, retry_handler):
+        if not self._send_once:
+            return self._mexe(http_request, sender, override_num_retries,
+                              retry_handler=retry_handler)
+        # sent once, the retry policy retries (boto _mexe sleeps and raises on 5xx)
+        connection = self.get_http_connection(http_request.host, http_request.port, self.is_secure)
+        http_request.authorize(connection=self)
+        if not http_request.headers.get('Host'):
+            self.set_host_header(http_request)
+        try:
+            if callable(sender):
+                response = sender(connection, http_request.method, http_request.path,
+                                  http_request.body, http_request.headers)
+            else:
+                connection.request(http_request.method, http_request.path,
+                                   http_request.body, http_request.headers)
+                response = connection.getresponse()
+        except Exception:
+            connection.close()
+            raise
+        if response.getheader('connection') == 'close':
+            connection.close()
+        else:
+            self.put_http_connection(http_request.host, http_request.port, self.is_secure, connection)
+        return response
+
+    def _build_request(self, method, path, query_params=None, headers=None, data='', host=None):
+        """Builds the (unsigned) boto HTTP request for an admin sub request path."""
+        auth_path = path
+        if not query_params:
+            query_params = {}
+        else:
+            query = urlencode(query_params)
+            # handle path like /admin/bucket?index&<params>
+            path = "{}{}{}".format(path,
+                                   '&' if '?' in path else '?',
+                                   query)
+        http_request = self.build_base_http_request(method, path, auth_path,
+                                                    query_params, headers, data, host)
+        if host is not None and host != self.host and not http_request.headers.get('Host'):
+            # boto sets (and signs) the host header of the connection host
+            try:
+                http_request.headers['Host'] = self._auth_handler.host_header(host, http_request)
+            except AttributeError:
+                http_request.headers['Host'] = host.split(':', 1)[0]
+        boto.log.debug('http_request:%s' % http_request)
+        return http_request
+
+
+def _recording_sender(sender, connections):
+    """Returns a request sender appending the connection used to connections."""
+    def send(connection, method, path, body, headers):
+        connections.append(connection)
+        if callable(sender):
+            return sender(connection, method, path, body, headers)
+        connection.request(method, path, body, headers)
+        return connection.getresponse()
+    return send
@@ -35,31 +35,56 @@
 #    "ver": 0
 # }
 
+import radosgw.utils
+
+# marker of the lazy attributes not yet built
+_UNSET = radosgw.utils.UNSET
+
 
 class BucketInfo(object):
-    """Ceph RADOS Gateway Bucket Info"""
+    """Ceph RADOS Gateway Bucket Info
+
+    The attributes are the bucket JSON object keys (lower cased), the usage is
+    built on first access. The attributes can be assigned, as before (the
+    instance __dict__ is only allocated then).
+    """
+
+    __slots__ = ('_rgwadmin', '_object', '_usage', '__dict__')
 
     def __init__(self, radosgw_admin, bucket_dict):
         """INTERNAL ONLY."""
         self._rgwadmin = radosgw_admin
         self._object = bucket_dict
-        for key in bucket_dict:
-            setattr(self, key.lower(), bucket_dict[key])
+        self._usage = _UNSET
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return radosgw.utils.json_attr(self._object, name)
+
+    def __dir__(self):
+        return sorted(set(dir(type(self))) | set(key.lower() for key in self._object))
 
     @property
     def name(self):
-        return self.bucket
+        return self._object['bucket']
 
     @property
     def usage(self):
+        if self._usage is _UNSET:
+            usage = self._object.get('usage') or {}
+            if 'rgw.main' in usage:
+                self._usage = Usage(usage['rgw.main'])
+            else:
+                self._usage = None
         return self._usage
 
     @usage.setter
     def usage(self, value):
-        if 'rgw.main' in value:
-            self._usage = Usage(value['rgw.main'])
-        else:
-            self._usage = None
+        # the usage JSON object, as before, or a Usage
+        if isinstance(value, dict):
+            value = Usage(value['rgw.main']) if 'rgw.main' in value else None
+        self._usage = value
 
     @property
     def object(self):
@@ -69,9 +94,9 @@ class BucketInfo(object):
         """Check the index of the bucket.
         :param bool check_objects:
         :param bool fix:
-        :return: nothing
+        :return radosgw.bucket.IndexCheckResult: the existing and calculated header stats
         """
-        self._rgwadmin.check_bucket_index(self.name, check_objects, fix, **kwargs)
+        return self._rgwadmin.check_bucket_index(self.name, check_objects, fix, **kwargs)
 
     def link(self, uid, **kwargs):
         """Link the bucket to the specified user, unlinking the bucket from any previous user.
@@ -79,7 +104,7 @@ class BucketInfo(object):
         :param kwargs: optional params
         :return: None
         """
-        self._rgwadmin.link_bucket(self.name, self.id, uid, **kwargs)
+        return self._rgwadmin.link_bucket(self.name, self.id, uid, **kwargs)
 
     def unlink(self, **kwargs):
         """Unlink the bucket from the current owner.
@@ -87,7 +112,7 @@ class BucketInfo(object):
         :param kwargs: optional params
         :return: None
         """
-        self._rgwadmin.unlink_bucket(self.name, self.owner, **kwargs)
+        return self._rgwadmin.unlink_bucket(self.name, self.owner, **kwargs)
 
     def delete(self, purge_objects=True, **kwargs):
         """Delete the bucket.
@@ -95,7 +120,7 @@ class BucketInfo(object):
         :param kwargs: optional params
         :return: None
         """
-        self._rgwadmin.delete_bucket(self.name, purge_objects, **kwargs)
+        return self._rgwadmin.delete_bucket(self.name, purge_objects, **kwargs)
 
     def remove_object(self, object_name, **kwargs):
         """Remove an existing object from the bucket.
@@ -103,7 +128,7 @@ class BucketInfo(object):
         :param kwargs: optional params
         :return: None
         """
-        self._rgwadmin.remove_object(self.name, object_name, **kwargs)
+        return self._rgwadmin.remove_object(self.name, object_name, **kwargs)
 
     def policy(self, object_name=None, **kwargs):
         """get Bucket or Object Policy.
@@ -111,7 +136,7 @@ class BucketInfo(object):
         :param kwargs: optional params
         :return: bucket or object policy
         """
-        self._rgwadmin.get_policy(self.name, object_name, **kwargs)
+        return self._rgwadmin.get_policy(self.name, object_name, **kwargs)
 
     def __str__(self):
         return "<Bucket: %s>" % self.name
@@ -121,12 +146,24 @@ class BucketInfo(object):
 
 
 class Usage(object):
-    """RADOS Gateway bucket usage"""
+    """RADOS Gateway bucket usage
+
+    The attributes are the usage JSON object keys (lower cased), and can be
+    assigned.
+    """
+
+    __slots__ = ('_object', '__dict__')
 
     def __init__(self, usage_dict):
         self._object = usage_dict
-        for key in usage_dict:
-            setattr(self, key.lower(), usage_dict[key])
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return radosgw.utils.json_attr(self._object, name)
+
+    def __dir__(self):
+        return sorted(set(dir(type(self))) | set(key.lower() for key in self._object))
 
     def __repr__(self):
         return "<Usage: num_objects={} size_kb={} size_kb_actual={}>".format(self.num_objects,
@@ -136,3 +173,73 @@ class Usage(object):
     @property
     def object(self):
         return self._object
+
+
+class IndexCheckResult(object):
+    """RADOS Gateway bucket index check result
+
+    existing and calculated are the header stats of the bucket index, by
+    category (i.e. 'rgw.main'), as returned by the check. fixed is True if the
+    check fixed the index (existing is then the header before the fix).
+    """
+
+    __slots__ = ('bucket', 'fixed', '_object')
+
+    def __init__(self, bucket_name, check_dict, fixed=False):
+        """INTERNAL ONLY."""
+        self.bucket = bucket_name
+        self.fixed = fixed
+        self._object = check_dict or {}
+
+    @property
+    def existing(self):
+        """The existing header stats: dict of category: Usage"""
+        return self._header('existing_header')
+
+    @property
+    def calculated(self):
+        """The calculated header stats: dict of category: Usage"""
+        return self._header('calculated_header')
+
+    @property
+    def invalid_multipart_entries(self):
+        return self._object.get('invalid_multipart_entries') or []
+
+    @property
+    def differences(self):
+        """The stats differing between the existing and calculated headers.
+        :returns dict: category: {stat: (existing, calculated)}
+        """
+        existing = self._header_dict('existing_header')
+        calculated = self._header_dict('calculated_header')
+        differences = {}
+        for category in set(existing) | set(calculated):
+            existing_stats = existing.get(category) or {}
+            calculated_stats = calculated.get(category) or {}
+            for stat in set(existing_stats) | set(calculated_stats):
+                values = (existing_stats.get(stat, 0), calculated_stats.get(stat, 0))
+                if values[0] != values[1]:
+                    differences.setdefault(category, {})[stat] = values
+        return differences
+
+    @property
+    def consistent(self):
+        """True if the existing header matches the calculated one, without invalid
+        multipart entries."""
+        return not self.differences and not self.invalid_multipart_entries
+
+    def _header_dict(self, name):
+        header = (self._object.get('check_result') or {}).get(name) or {}
+        return header.get('usage') or {}
+
+    def _header(self, name):
+        return dict((category, Usage(stats))
+                    for category, stats in self._header_dict(name).items())
+
+    @property
+    def object(self):
+        return self._object
+
+    def __repr__(self):
+        return "<IndexCheckResult: %s %s>" % (self.bucket,
+                                              'consistent' if self.consistent else 'inconsistent')
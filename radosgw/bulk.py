@@ -0,0 +1,233 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Bulk admin operations."""
+
+import boto
+import boto.exception
+
+import radosgw.exception
+import radosgw.executor
+import radosgw.ratelimit
+import radosgw.retry
+
+# {
+#    "uid": "testuser",
+#    "display_name": "Test User",
+#    "tenant": "testtenant",
+#    "email": "testuser@example.org",
+#    "max_buckets": 100,
+#    "user_quota": {"max_size_kb": 1048576, "enabled": true},
+#    "bucket_quota": {"max_objects": 10000, "enabled": true}
+# }
+
+QUOTA_TYPES = ('user', 'bucket')
+
+# errors of one item, recorded in its result instead of aborting the others: the gateway errors,
+# the client errors (i.e. PoolTimeout, CircuitOpen) and the connection errors (i.e. timeout)
+ITEM_ERRORS = (boto.exception.BotoServerError, boto.exception.BotoClientError) + \
+    radosgw.retry.CONNECTION_ERRORS
+
+
+class BulkResult(object):
+    """Result of one item of a bulk operation."""
+
+    def __init__(self, item, value=None, error=None):
+        """INTERNAL ONLY.
+        :param item: the item processed (i.e. the user spec)
+        :param value: the operation result (i.e. the created user), maybe set with an error
+                      (i.e. the user created, but the quota not set)
+        :param error: the error (radosgw.exception.RadosGWAdminError, connection error, ...),
+                      if the operation failed
+        """
+        self.item = item
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        """True if the operation succeeded."""
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return '<BulkResult: %r OK>' % (self.item if self.value is None else self.value,)
+        return '<BulkResult: %r %s>' % (self.item, self.error)
+
+
+class DeleteBucketsSummary(object):
+    """Summary of a bulk bucket deletion."""
+
+    def __init__(self):
+        """INTERNAL ONLY."""
+        self.deleted = []
+        self.not_empty = []
+        self.failed = []
+
+    def add(self, result):
+        """Adds the result of a bucket deletion."""
+        if result.ok:
+            self.deleted.append(result.item)
+        elif isinstance(result.error, radosgw.exception.BucketNotEmpty):
+            self.not_empty.append(result.item)
+        else:
+            self.failed.append((result.item, result.error))
+
+    @property
+    def total(self):
+        """Number of buckets processed."""
+        return len(self.deleted) + len(self.not_empty) + len(self.failed)
+
+    def __repr__(self):
+        return '<DeleteBucketsSummary: deleted={} not_empty={} failed={}>'.format(len(self.deleted),
+                                                                                 len(self.not_empty),
+                                                                                 len(self.failed))
+
+
+def create_users(rgwadmin, specs, concurrency=4, ordered=False):
+    """Creates the users, and sets their quotas, concurrently.
+    :see: radosgw.connection.RadosGWAdminConnection#create_users
+    """
+    def create_user(spec):
+        kwargs = dict(spec)
+        uid = kwargs.pop('uid')
+        display_name = kwargs.pop('display_name')
+        quotas = [(quota_type, kwargs.pop(quota_type + '_quota'))
+                  for quota_type in QUOTA_TYPES if quota_type + '_quota' in kwargs]
+        user = None
+        try:
+            user = rgwadmin.create_user(uid, display_name, **kwargs)
+            if quotas:
+                quota_uid = uid
+                if kwargs.get('tenant'):
+                    quota_uid = kwargs['tenant'] + '$' + uid
+                for quota_type, quota in quotas:
+                    rgwadmin.set_quota(quota_uid, quota_type, **quota)
+            return BulkResult(spec, user)
+        except ITEM_ERRORS as e:
+            if user is None:
+                boto.log.debug('create user %s failed: %s' % (uid, e))
+            else:
+                boto.log.debug('set quota of user %s failed: %s' % (uid, e))
+            # the user, if created
+            return BulkResult(spec, user, error=e)
+
+    return radosgw.executor.bounded_map(create_user, specs, concurrency, ordered)
+
+
+def delete_buckets(rgwadmin, buckets, purge_objects=True, concurrency=4, rate=None, progress=None):
+    """Deletes the buckets concurrently.
+    :see: radosgw.connection.RadosGWAdminConnection#delete_buckets
+    """
+    pacer = radosgw.ratelimit.TokenBucket(rate) if rate else None
+
+    def delete_bucket(bucket):
+        # bucket name or BucketInfo
+        bucket_name = getattr(bucket, 'name', bucket)
+        if pacer:
+            pacer.acquire()
+        try:
+            rgwadmin.delete_bucket(bucket_name, purge_objects)
+            return BulkResult(bucket_name)
+        except ITEM_ERRORS as e:
+            boto.log.debug('delete bucket %s failed: %s' % (bucket_name, e))
+            return BulkResult(bucket_name, error=e)
+
+    summary = DeleteBucketsSummary()
+    results = radosgw.executor.bounded_map(delete_bucket, buckets, concurrency, ordered=False)
+    for result in results:
+        summary.add(result)
+        if progress:
+            progress(summary, result)
+    return summary
+
+
+class IndexCheckSummary(object):
+    """Summary of a bulk bucket index check.
+
+    consistent, inconsistent and fixed are radosgw.bucket.IndexCheckResult,
+    failed are radosgw.bulk.BulkResult (with the check as value if the fix failed).
+    """
+
+    def __init__(self):
+        """INTERNAL ONLY."""
+        self.consistent = []
+        self.inconsistent = []
+        self.fixed = []
+        self.failed = []
+
+    def add(self, result):
+        """Adds the result of a bucket index check."""
+        check = result.value
+        if not result.ok:
+            self.failed.append(result)
+            if check is not None:
+                # the fix failed
+                self.inconsistent.append(check)
+        elif check.consistent:
+            self.consistent.append(check)
+        else:
+            self.inconsistent.append(check)
+            if check.fixed:
+                self.fixed.append(check)
+
+    @property
+    def total(self):
+        """Number of buckets processed."""
+        return len(self.consistent) + len(self.inconsistent) + len(self.failed)
+
+    def __repr__(self):
+        return '<IndexCheckSummary: consistent={} inconsistent={} fixed={} failed={}>'.format(
+            len(self.consistent), len(self.inconsistent), len(self.fixed), len(self.failed))
+
+
+def check_bucket_indexes(rgwadmin, buckets=None, fix=False, check_objects=True, concurrency=4,
+                         rate=None, progress=None):
+    """Checks the bucket indexes concurrently, and fixes the inconsistent ones.
+    :see: radosgw.connection.RadosGWAdminConnection#check_bucket_indexes
+    """
+    pacer = radosgw.ratelimit.TokenBucket(rate) if rate else None
+    if buckets is None:
+        buckets = rgwadmin.get_buckets()
+
+    def check_bucket_index(bucket):
+        # bucket name or BucketInfo
+        bucket_name = getattr(bucket, 'name', bucket)
+        if pacer:
+            pacer.acquire()
+        check = None
+        try:
+            # radosgw only checks the objects when fixing
+            check = rgwadmin.check_bucket_index(bucket_name, check_objects=False, fix=False)
+            if fix and not check.consistent:
+                if pacer:
+                    pacer.acquire()
+                # the fix result has the existing header before the fix
+                check = rgwadmin.check_bucket_index(bucket_name, check_objects=check_objects,
+                                                    fix=True)
+            return BulkResult(bucket_name, check)
+        except ITEM_ERRORS as e:
+            boto.log.debug('check bucket index %s failed: %s' % (bucket_name, e))
+            return BulkResult(bucket_name, check, error=e)
+
+    summary = IndexCheckSummary()
+    results = radosgw.executor.bounded_map(check_bucket_index, buckets, concurrency, ordered=False)
+    for result in results:
+        summary.add(result)
+        if progress:
+            progress(summary, result)
+    return summary
@@ -0,0 +1,111 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Lookup cache for the admin connection."""
+
+import collections
+import threading
+import time
+
+
+class LRUCache(object):
+    """Thread-safe, size bounded, LRU cache with time-to-live.
+
+    :see: radosgw.connection.RadosGWAdminConnection#__init__
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0, timer=time.monotonic):
+        """Constructor.
+        :param int maxsize: maximum number of entries. Default: 1024
+        :param float ttl: time-to-live of the entries in seconds. Default: 60
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be >= 1: %r' % maxsize)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return '<%s: size=%d/%d ttl=%s hits=%d misses=%d>' % (self.__class__.__name__,
+                                                              len(self._entries), self.maxsize,
+                                                              self.ttl, self.hits, self.misses)
+
+    def get(self, key, default=None):
+        """Returns the cached value, or default if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > self._timer():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        """Returns the cached value, without updating the LRU order and the counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._timer():
+                return entry[0]
+            return default
+
+    def put(self, key, value):
+        """Caches the value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (value, self._timer() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Removes an entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_if(self, predicate):
+        """Removes all the entries for which predicate(key, value) is true."""
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+
+    def clear(self):
+        """Removes all the entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns the cache counters.
+        :returns dict: hits, misses, evictions and size
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'size': len(self._entries)}
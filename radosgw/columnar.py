@@ -0,0 +1,168 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Columnar export of the bucket and user listings.
+
+The fields of the JSON objects are appended to one column per field as they
+are decoded, the numeric columns are compact array.array buffers. The columns
+convert to NumPy arrays, a pandas DataFrame or a pyarrow Table, if those
+packages are installed.
+"""
+
+import array
+
+INT = 'q'
+FLOAT = 'd'
+STR = 'str'
+
+# column name: (JSON object path, type)
+BUCKET_FIELDS = {
+    'bucket': (('bucket',), STR),
+    'tenant': (('tenant',), STR),
+    'owner': (('owner',), STR),
+    'id': (('id',), STR),
+    'marker': (('marker',), STR),
+    'placement_rule': (('placement_rule',), STR),
+    'mtime': (('mtime',), STR),
+    'num_shards': (('num_shards',), INT),
+    'num_objects': (('usage', 'rgw.main', 'num_objects'), INT),
+    'size': (('usage', 'rgw.main', 'size'), INT),
+    'size_actual': (('usage', 'rgw.main', 'size_actual'), INT),
+    'size_utilized': (('usage', 'rgw.main', 'size_utilized'), INT),
+    'size_kb': (('usage', 'rgw.main', 'size_kb'), INT),
+    'size_kb_actual': (('usage', 'rgw.main', 'size_kb_actual'), INT),
+    'size_kb_utilized': (('usage', 'rgw.main', 'size_kb_utilized'), INT),
+    'quota_enabled': (('bucket_quota', 'enabled'), INT),
+    'quota_max_size': (('bucket_quota', 'max_size'), INT),
+    'quota_max_objects': (('bucket_quota', 'max_objects'), INT),
+}
+
+USER_FIELDS = {
+    'user_id': (('user_id',), STR),
+    'tenant': (('tenant',), STR),
+    'display_name': (('display_name',), STR),
+    'email': (('email',), STR),
+    'suspended': (('suspended',), INT),
+    'max_buckets': (('max_buckets',), INT),
+    'num_objects': (('stats', 'num_objects'), INT),
+    'size': (('stats', 'size'), INT),
+    'size_actual': (('stats', 'size_actual'), INT),
+    'size_utilized': (('stats', 'size_utilized'), INT),
+    'size_kb': (('stats', 'size_kb'), INT),
+    'size_kb_actual': (('stats', 'size_kb_actual'), INT),
+    'size_kb_utilized': (('stats', 'size_kb_utilized'), INT),
+}
+
+
+class Columns(object):
+    """Columns of a bucket or user listing.
+
+    The numeric columns are array.array (missing values are 0), the string
+    columns are lists (missing values are None).
+    """
+
+    def __init__(self, fields, names=None):
+        """INTERNAL ONLY.
+        :param dict fields: the available fields, i.e. radosgw.columnar.BUCKET_FIELDS
+        :param list names: the field names to collect. Default: all the fields
+        """
+        if names is None:
+            names = list(fields)
+        unknown = [name for name in names if name not in fields]
+        if unknown:
+            raise ValueError('unknown fields: {}'.format(', '.join(unknown)))
+        self.names = list(names)
+        self._fields = [(name,) + fields[name] for name in self.names]
+        self._columns = {}
+        for name, _, column_type in self._fields:
+            self._columns[name] = [] if column_type == STR else array.array(column_type)
+        self._length = 0
+
+    def append(self, json_dict):
+        """Appends the fields of a JSON object (bucket or user) to the columns."""
+        for name, path, column_type in self._fields:
+            value = json_dict
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            if column_type == STR:
+                self._columns[name].append(value)
+            elif column_type == INT:
+                self._columns[name].append(int(value or 0))
+            else:
+                self._columns[name].append(float(value or 0))
+        self._length += 1
+
+    def extend(self, json_dicts):
+        """Appends the fields of the JSON objects to the columns."""
+        for json_dict in json_dicts:
+            self.append(json_dict)
+        return self
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __repr__(self):
+        return '<Columns: {} rows [{}]>'.format(self._length, ', '.join(self.names))
+
+    def to_numpy(self):
+        """Returns the columns as NumPy arrays. The numeric arrays are copies of the column
+        buffers (a memory copy), so the columns can still be appended to.
+        :returns dict: column name: numpy.ndarray
+        :throws ImportError: if numpy is not installed
+        """
+        import numpy
+        arrays = {}
+        for name, _, column_type in self._fields:
+            column = self._columns[name]
+            if column_type == STR:
+                arrays[name] = numpy.array(column, dtype=object)
+            else:
+                # a view would lock the array.array buffer: append raises BufferError
+                arrays[name] = numpy.frombuffer(column, dtype=column.typecode).copy()
+        return arrays
+
+    def to_pandas(self):
+        """Returns the columns as a pandas DataFrame.
+        :returns pandas.DataFrame: the data frame
+        :throws ImportError: if pandas is not installed
+        """
+        import pandas
+        return pandas.DataFrame(self.to_numpy(), columns=self.names)
+
+    def to_arrow(self):
+        """Returns the columns as a pyarrow Table. The numeric arrays are copies of the column
+        buffers, as with to_numpy.
+        :returns pyarrow.Table: the table
+        :throws ImportError: if pyarrow is not installed
+        """
+        import pyarrow
+        arrays = []
+        for name, _, column_type in self._fields:
+            column = self._columns[name]
+            if column_type == STR:
+                arrays.append(pyarrow.array(column, type=pyarrow.string()))
+            else:
+                arrow_type = pyarrow.int64() if column_type == INT else pyarrow.float64()
+                arrays.append(pyarrow.Array.from_buffers(arrow_type, len(column),
+                                                         [None, pyarrow.py_buffer(column.tobytes())]))
+        return pyarrow.Table.from_arrays(arrays, names=self.names)
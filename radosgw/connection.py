@@ -15,23 +15,28 @@
 #
 # author: Valery Tschopp <valery.tschopp@switch.ch>
 import json
-import boto
-import boto.connection
-import boto.s3.bucket
-import boto.s3.connection
+import logging
+import time
 
-import radosgw.exception
+import radosgw.retry
+import radosgw.utils
 from radosgw.user import UserInfo
-from radosgw.bucket import BucketInfo
+from radosgw.bucket import BucketInfo, IndexCheckResult
 
-try:
-    from urllib.parse import urlencode
-except ImportError:
-    from urllib import urlencode
+# boto.log, without importing boto (radosgw.exception, radosgw.bototransport)
+log = logging.getLogger('boto')
 
 
-class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
+class RadosGWAdminConnection(object):
     """Ceph RADOS Gateway (radosgw) admin connection.
+
+    With pool_size set, the connection is thread-safe: one instance can be
+    shared by all the threads of a pool, the requests are sent over a bounded
+    pool of keep-alive connections per host (radosgw.pool.BoundedConnectionPool).
+
+    boto is only imported by the boto transport (the default), and on the first
+    error (radosgw.exception). With the boto transport, the attributes of the
+    boto.connection.AWSAuthConnection are available on the connection.
     :see: http://docs.ceph.com/docs/master/radosgw/adminops/
     """
     def __init__(self,
@@ -44,85 +49,266 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
                  proxy=None, proxy_port=None, proxy_user=None, proxy_pass=None,
                  debug=False,
                  https_connection_factory=None, security_token=None,
-                 validate_certs=True):
-        """Constructor."""
+                 validate_certs=True,
+                 cache=None,
+                 pool_size=None, pool_block_timeout=None,
+                 transport=None,
+                 metrics=None,
+                 retry=None,
+                 rate_limiter=None,
+                 balancer=None,
+                 key_index=None):
+        """Constructor.
+        :param host: the radosgw host, or a list of radosgw hosts (same port) to balance the
+                     requests across
+        :param radosgw.cache.LRUCache cache: optional cache for the get_user and get_bucket
+                                             lookups, invalidated by the modifying operations
+        :param int pool_size: thread-safe mode, at most pool_size concurrent requests and
+                              keep-alive connections per host. Default: None (unbounded)
+        :param float pool_block_timeout: maximum time to wait for a free connection in
+                                         thread-safe mode. Default: None (wait forever)
+        :param transport: 'boto' (default), 'http' for the lean radosgw.transport.HTTPTransport,
+                          or a radosgw.transport.Transport instance. The proxy and
+                          https_connection_factory options are only supported by boto
+        :throws ValueError: if an option is not supported by the transport
+        :param radosgw.metrics.Metrics metrics: optional metrics of the requests (counts, errors,
+                                                bytes received and latency per admin path)
+        :param radosgw.retry.RetryPolicy retry: optional retry policy (backoff with jitter, retry
+                                                budget, circuit breaker), replacing the boto retries
+        :param radosgw.ratelimit.RateLimiter rate_limiter: optional rate limiter of the read and
+                                                           write requests
+        :param radosgw.balancer.Balancer balancer: optional balancer of the requests across several
+                                                   hosts. Default: radosgw.balancer.Balancer(host)
+                                                   if host is a list
+        :param radosgw.keyindex.KeyIndex key_index: optional access key index, updated by the
+                                                    create_user, create_key, remove_key and
+                                                    delete_user requests
+        """
 
         self._admin_path = admin_path
-        if debug:
-            boto.set_stream_logger('boto')
-            debug_boto = 10
-        else:
-            debug_boto = 0
-
-        # AWS4 and AWS2 signature support
-        # see boto.auth.S3HmacAuthV4Handler
-        # see boto.auth.HmacAuthV1Handler
-        if aws_signature == 'AWS4':
-            # AWS4 signature
-            self._signature_algo = ['hmac-v4-s3']
+        self._cache = cache
+        self._metrics = metrics
+        self._retry = retry
+        self._rate_limiter = rate_limiter
+        self._key_index = key_index
+        if isinstance(host, (list, tuple)):
+            if balancer is None and len(host) > 1:
+                import radosgw.balancer
+                balancer = radosgw.balancer.Balancer(host)
+            host = host[0]
+        elif host is None and balancer is not None:
+            host = balancer.hosts[0]
+        self._balancer = balancer
+        if transport in (None, 'boto'):
+            import radosgw.bototransport
+            self._boto = radosgw.bototransport.BotoTransport(
+                host, access_key, secret_key,
+                admin_path=admin_path,
+                aws_signature=aws_signature,
+                timeout=timeout,
+                is_secure=is_secure, port=port,
+                proxy=proxy, proxy_port=proxy_port, proxy_user=proxy_user, proxy_pass=proxy_pass,
+                debug=debug,
+                https_connection_factory=https_connection_factory,
+                security_token=security_token,
+                validate_certs=validate_certs,
+                pool_size=pool_size, pool_block_timeout=pool_block_timeout,
+                # the retry policy retries
+                send_once=retry is not None)
+            self.host = self._boto.host
+            self.port = self._boto.port
+            self.is_secure = self._boto.is_secure
+            transport = None
         else:
-            # old style AWS2 signature algo
-            self._signature_algo = ['hmac-v1']
-
-        # init AWS connection
-        boto.connection.AWSAuthConnection.__init__(self,
-                                                   host=host,
-                                                   aws_access_key_id=access_key,
-                                                   aws_secret_access_key=secret_key,
-                                                   is_secure=is_secure, port=port,
-                                                   proxy=proxy, proxy_port=proxy_port,
-                                                   proxy_user=proxy_user, proxy_pass=proxy_pass,
-                                                   debug=debug_boto,
-                                                   https_connection_factory=https_connection_factory,
-                                                   path=self._admin_path,
-                                                   provider='aws',
-                                                   security_token=security_token,
-                                                   suppress_consec_slashes=True,
-                                                   validate_certs=validate_certs)
-        # set http_socket_timeout
-        self.http_connection_kwargs['timeout'] = timeout
-        if aws_signature == 'AWS4':
-            self._set_auth_region_name('s3')
-
+            options = {'proxy': proxy, 'proxy_port': proxy_port, 'proxy_user': proxy_user,
+                       'proxy_pass': proxy_pass, 'https_connection_factory': https_connection_factory}
+            if transport != 'http':
+                # a Transport instance has its own pool
+                options.update(pool_size=pool_size, pool_block_timeout=pool_block_timeout)
+            unsupported = sorted(name for name, value in options.items() if value is not None)
+            if unsupported:
+                raise ValueError('%s not supported by the transport %r'
+                                 % (', '.join(unsupported), transport))
+            self._boto = None
+            self.host = host
+            self.port = port or (443 if is_secure else 80)
+            self.is_secure = is_secure
+            if debug:
+                _set_stream_logger('boto')
+                _set_stream_logger('radosgw')
+        if transport == 'http':
+            import radosgw.transport
+            transport = radosgw.transport.HTTPTransport(self.host, access_key, secret_key,
+                                                        port=self.port, is_secure=is_secure,
+                                                        aws_signature=aws_signature,
+                                                        timeout=timeout,
+                                                        validate_certs=validate_certs,
+                                                        security_token=security_token,
+                                                        pool_size=pool_size or 10,
+                                                        max_connections=pool_size,
+                                                        pool_block_timeout=pool_block_timeout)
+        self._transport = transport
+
+    def __getattr__(self, name):
+        # the boto.connection.AWSAuthConnection attributes, the connection was one
+        boto_transport = self.__dict__.get('_boto')
+        if boto_transport is None:
+            raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__,
+                                                                        name))
+        return getattr(boto_transport, name)
 
     def __repr__(self):
+        if self._balancer is not None:
+            return '<%s:%s>' % (self.__class__.__name__, ','.join(self._balancer.hosts))
         return '<%s:%s>' % (self.__class__.__name__, self.host)
 
     def get_admin_path(self):
         """Returns the admin query path prefix."""
         return self._admin_path
 
-    def _required_auth_capability(self):
-        """Authentication algo required for S3"""
-        return self._signature_algo
+    def get_path(self, path='/'):
+        """Returns the full request path of an admin sub request path (i.e. /user?key),
+        without consecutive slashes.
+        """
+        if '?' in path:
+            path, params = path.split('?', 1)
+            params = '?' + params
+        else:
+            params = ''
+        elements = [element for element in (self._admin_path + '/' + path).split('/') if element]
+        full_path = '/' + '/'.join(elements)
+        if path.endswith('/') and not full_path.endswith('/'):
+            full_path += '/'
+        return full_path + params
+
+    @property
+    def transport(self):
+        """The transport, or None for boto."""
+        return self._transport
+
+    def close(self):
+        """Closes the pooled HTTP connections."""
+        if self._transport is not None:
+            self._transport.close()
+        if self._boto is not None:
+            self._boto.close()
+
+    @property
+    def balancer(self):
+        """The balancer of the requests across the hosts, or None."""
+        return self._balancer
+
+    @property
+    def key_index(self):
+        """The access key index, or None."""
+        return self._key_index
+
+    @property
+    def metrics(self):
+        """The requests metrics, or None."""
+        return self._metrics
+
+    @property
+    def cache(self):
+        """The lookup cache, or None."""
+        return self._cache
+
+    def _invalidate_user(self, uid):
+        """Removes the cached user info of uid."""
+        if self._cache is not None:
+            self._cache.invalidate(('user', uid, False))
+            self._cache.invalidate(('user', uid, True))
+
+    def _invalidate_bucket(self, bucket_name):
+        """Removes the cached bucket info, and the cached stats of its owner."""
+        if self._cache is not None:
+            for stats in (False, True):
+                bucket_dict = self._cache.peek(('bucket', bucket_name, stats))
+                if bucket_dict is not None:
+                    self._cache.invalidate(('user', bucket_dict.get('owner'), True))
+                self._cache.invalidate(('bucket', bucket_name, stats))
 
     def make_request(self, method, path, query_params=None, headers=None, data='', host=None,
-                     sender=None, override_num_retries=3, retry_handler=None):
+                     sender=None, override_num_retries=3, retry_handler=None, preload=True):
         """Makes a request to the RADOS GW admin server.
         :param str method: GET|PUT|HEAD|POST|DELETE|...
         :param str path: admin sub request path (i.e. /user)
         :param dict query_params: url query parameters
+        :param bool preload: in thread-safe mode, read the body before releasing the
+                             connection, False to stream it. Default: True
         :returns boto.connection.HttpResponse: the HTTP response
         """
-        auth_path = path
-        if not query_params:
-            query_params = {}
+        if self._retry is not None:
+            return self._retry.call(method, lambda: self._timed_request(method, path, query_params,
+                                                                        headers, data, host, sender,
+                                                                        0, retry_handler, preload))
+        return self._timed_request(method, path, query_params, headers, data, host,
+                                   sender, override_num_retries, retry_handler, preload)
+
+    def _timed_request(self, method, path, query_params, headers, data, host,
+                       sender, override_num_retries, retry_handler, preload):
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(method)
+        if self._metrics is None:
+            return self._balanced_request(method, path, query_params, headers, data, host,
+                                          sender, override_num_retries, retry_handler, preload)
+        start = time.perf_counter()
+        try:
+            response = self._balanced_request(method, path, query_params, headers, data, host,
+                                              sender, override_num_retries, retry_handler, preload)
+        except Exception as e:
+            self._metrics.observe(method, path, None, time.perf_counter() - start)
+            self._metrics.error(method, path, e)
+            raise
+        if preload or response.status >= 400:
+            # cached body
+            bytes_received = len(response.read())
         else:
-            query = urlencode(query_params)
-            # handle path like /admin/bucket?index&<params>
-            path = "{}{}{}".format(path,
-                                   '&' if '?' in path else '?',
-                                   query)
-        http_request = self.build_base_http_request(method, path, auth_path,
-                                                    query_params, headers, data, host)
-        boto.log.debug('http_request:%s' % http_request)
-        return self._mexe(http_request, sender, override_num_retries,
-                          retry_handler=retry_handler)
+            bytes_received = int(response.getheader('Content-Length') or 0)
+        self._metrics.observe(method, path, response.status, time.perf_counter() - start,
+                              bytes_received)
+        if response.status >= 400:
+            # each attempt, also the ones retried
+            try:
+                error = radosgw.exception.factory(response.status, response.reason, response.read())
+            except ValueError:
+                # not a JSON error (i.e. from a proxy)
+                error = 'HTTP%d' % response.status
+            self._metrics.error(method, path, error)
+        return response
+
+    def _balanced_request(self, method, path, query_params, headers, data, host,
+                          sender, override_num_retries, retry_handler, preload):
+        if self._balancer is None or host is not None:
+            return self._send_request(method, path, query_params, headers, data, host,
+                                      sender, override_num_retries, retry_handler, preload)
+        host = self._balancer.acquire()
+        # passive health check: 5xx and connection errors are failures, the client-side
+        # errors (pool timeout, ...) no outcome
+        ok = None
+        try:
+            response = self._send_request(method, path, query_params, headers, data, host,
+                                          sender, override_num_retries, retry_handler, preload)
+            ok = response.status < 500
+            return response
+        except radosgw.retry.CONNECTION_ERRORS:
+            ok = False
+            raise
+        finally:
+            self._balancer.release(host, ok)
+
+    def _send_request(self, method, path, query_params, headers, data, host,
+                      sender, override_num_retries, retry_handler, preload):
+        if self._transport is not None:
+            return self._transport.request(method, self.get_path(path), query_params,
+                                           headers, data, host)
+        return self._boto.request(method, path, query_params, headers, data, host,
+                                  sender, override_num_retries, retry_handler, preload)
 
     def _process_response(self, response):
         """Processes the response and returns the body or throws an error."""
         body = response.read()
-        boto.log.debug('status: %d body: %s' % (response.status, body))
+        log.debug('status: %d body: %s' % (response.status, body))
         if response.status == 200:
             if not body:
                 return None
@@ -131,8 +317,8 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
                     body = body.decode('utf-8')
                 return body
         else:
-            boto.log.error('%s %s' % (response.status, response.reason))
-            boto.log.error('%s' % body)
+            log.error('%s %s' % (response.status, response.reason))
+            log.error('%s' % body)
             raise radosgw.exception.factory(response.status, response.reason, body)
 
     # uid= None, start= None, end= None, show_summary= True, show_entries= True, format= 'json'
@@ -152,6 +338,46 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         usage = json.loads(body)
         return usage
 
+    def iter_usage(self, start, end=None, window=86400, concurrency=4, **kwargs):
+        """Iterates over the usage log bucket entries of a time range, fetched by
+        time windows, concurrently, and yielded in the time windows order.
+        :param start: the range start, epoch, datetime or 'YYYY-MM-DD[ HH:MM:SS]' (UTC)
+        :param end: the range end (excluded). Default: now
+        :param int window: the time window size of a request, in seconds, a multiple
+                           of 3600 (hourly usage log). Default: 86400
+        :param int concurrency: number of time windows fetched in parallel. Default: 4
+        :param str uid: the user id. Default: all the users
+        :returns iterator: iterator of bucket entries (dict of bucket, time, epoch, owner,
+                           categories), with the user of the usage entry
+        :see: http://docs.ceph.com/docs/master/radosgw/adminops/#get-usage
+        """
+        import radosgw.executor
+        if window % 3600:
+            raise ValueError('window must be a multiple of 3600: %r' % window)
+        uid = kwargs.get('uid')
+        if end is None:
+            end = time.time()
+
+        def get_usage(time_window):
+            window_start, window_end = time_window
+            usage = self.get_usage(uid=uid,
+                                   start=radosgw.utils.format_time(window_start),
+                                   end=radosgw.utils.format_time(window_end),
+                                   # str, as a False value is not set (default True)
+                                   show_summary='False', show_entries=True)
+            return usage.get('entries', [])
+
+        windows = radosgw.utils.time_windows(start, end, window)
+        if concurrency and concurrency > 1:
+            entries_by_window = radosgw.executor.bounded_map(get_usage, windows, concurrency)
+        else:
+            entries_by_window = (get_usage(time_window) for time_window in windows)
+        for entries in entries_by_window:
+            for entry in entries:
+                for bucket in entry['buckets']:
+                    bucket['user'] = entry['user']
+                    yield bucket
+
     def delete_usage(self, **kwargs):
         """Trim usage
         :see: http://docs.ceph.com/docs/master/radosgw/adminops/#trim-usage
@@ -164,39 +390,111 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         response = self.make_request('DELETE', path='/usage', query_params=params)
         body = self._process_response(response)
         return body
-    
+
+    def trim_usage(self, start, end, window=86400, uids=None, concurrency=1, rate=None,
+                   checkpoint=None, progress=None):
+        """Trims the usage log in small time windows, instead of one wide delete_usage.
+        An error on one window does not abort the others, the trim is resumed from the
+        checkpoint file (if any) where it stopped.
+        :param start: the range start, see radosgw.utils.to_epoch
+        :param end: the range end (excluded), see radosgw.utils.to_epoch
+        :param int window: the window length, in seconds. Default: 86400
+        :param iterable uids: trim the windows of these users. Default: None (all the users)
+        :param int concurrency: number of windows trimmed in parallel. Default: 1
+        :param float rate: maximum number of trims started per second. Default: unlimited
+        :param str checkpoint: the JSON file of the trim progress. Default: None
+        :param callable progress: called with (summary, (uid, start, end), error) after each window
+        :returns radosgw.trim.TrimSummary: the trimmed, skipped (checkpoint) and failed windows
+        """
+        import radosgw.trim
+        return radosgw.trim.trim_usage(self, start, end, window, uids, concurrency, rate,
+                                       checkpoint, progress)
+
     def get_uids(self, **kwargs):
         """Get all the users uid.
+        :param int max_entries: number of uids fetched per request. Default: 1000
         :return list uids: the list of uid
         """
-        params = {}
+        return list(self.iter_uids(**kwargs))
+
+    def iter_uids(self, max_entries=1000, **kwargs):
+        """Iterates over all the users uid, fetching the metadata listing
+        page by page (max-entries/marker), only when needed.
+        :param int max_entries: number of uids fetched per request. Default: 1000
+        :returns iterator: iterator of uid
+        """
+        return self._iter_metadata_keys('user', max_entries, **kwargs)
+
+    def _iter_metadata_keys(self, section, max_entries, **kwargs):
+        """Iterates over the keys of a metadata section listing (i.e. user or bucket).
+        :see: http://docs.ceph.com/docs/master/radosgw/adminops/#metadata
+        """
+        params = {'max-entries': max_entries}
         # optional query parameters
         _kwargs_get('format', kwargs, params, 'json')
-        response = self.make_request('GET', path='/metadata/user', query_params=params)
-        body = self._process_response(response)
-        uids = json.loads(body)
-        return uids
-
-    def get_users(self, **kwargs):
+        while True:
+            response = self.make_request('GET', path='/metadata/' + section, query_params=params)
+            body = self._process_response(response)
+            page = json.loads(body)
+            if isinstance(page, list):
+                # radosgw without paging support returns all the keys
+                for key in page:
+                    yield key
+                return
+            for key in page['keys']:
+                yield key
+            if not page.get('truncated') or not page.get('marker'):
+                return
+            params['marker'] = page['marker']
+
+    def get_users(self, concurrency=None, ordered=True, **kwargs):
         """Get all the users information.
+        :param int concurrency: number of users fetched in parallel. Default: sequential
+        :param bool ordered: with concurrency, True to yield the users in the
+                             uid listing order, False in completion order. Default: True
+        :param bool stats: True to get the users stats
+        :param int max_entries: number of uids listed per request. Default: 1000
         :returns iterator: iterator of users information
         """
-        params = {}
-        # optional query parameters
-        _kwargs_get('format', kwargs, params, 'json')
-        response = self.make_request('GET', path='/metadata/user', query_params=params)
-        body = self._process_response(response)
-        uids = json.loads(body)
-        for uid in uids:
-            boto.log.debug('uid: %s' % uid)
-            if 'stats' in kwargs and kwargs['stats']:
+        for user_dict in self._get_user_dicts(concurrency, ordered, **kwargs):
+            yield UserInfo(self, user_dict)
+
+    def _get_user_dicts(self, concurrency=None, ordered=True, **kwargs):
+        """Returns an iterator of all the user JSON objects.
+        :see: get_users
+        """
+        stats = kwargs.pop('stats', False)
+        uids = self.iter_uids(**kwargs)
+
+        def get_user_dict(uid):
+            log.debug('uid: %s' % uid)
+            if stats:
                 try:  # Valid user without stats return 404 error
-                    user = self.get_user(uid, stats=True)
+                    return self._get_user_dict(uid, stats=True)
                 except radosgw.exception.NoSuchKey:
-                    user = self.get_user(uid, stats=False)
-            else:
-                user = self.get_user(uid)
-            yield user
+                    return self._get_user_dict(uid, stats=False)
+            return self._get_user_dict(uid)
+
+        if concurrency:
+            import radosgw.executor
+            for user_dict in radosgw.executor.bounded_map(get_user_dict, uids, concurrency,
+                                                          ordered):
+                yield user_dict
+        else:
+            for uid in uids:
+                yield get_user_dict(uid)
+
+    def get_user_columns(self, fields=None, stats=True, concurrency=None, **kwargs):
+        """Get all the users information as columns, without building a UserInfo per user.
+        :param list fields: the field names. Default: all the radosgw.columnar.USER_FIELDS
+        :param bool stats: True to get the users stats. Default: True
+        :param int concurrency: number of users fetched in parallel. Default: sequential
+        :returns radosgw.columnar.Columns: the columns (to_numpy(), to_pandas() or to_arrow())
+        """
+        import radosgw.columnar
+        columns = radosgw.columnar.Columns(radosgw.columnar.USER_FIELDS, fields)
+        return columns.extend(self._get_user_dicts(concurrency=concurrency, ordered=False,
+                                                   stats=stats, **kwargs))
 
     def get_user(self, uid, **kwargs):
         """Get the user information.
@@ -205,6 +503,12 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         :throws radosgw.exception.RadosGWAdminError: if an error occurs
         :see: http://docs.ceph.com/docs/master/radosgw/adminops/#get-user-info
         """
+        return UserInfo(self, self._get_user_dict(uid, **kwargs))
+
+    def _get_user_dict(self, uid, **kwargs):
+        """Returns the user JSON object.
+        :see: get_user
+        """
         # mandatory query parameters
         if 'tenant' in kwargs:
             uid = kwargs['tenant'] + '$' + uid
@@ -212,11 +516,15 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         # optional query parameters
         _kwargs_get('format', kwargs, params, 'json')
         _kwargs_get('stats', kwargs, params, False)
-        response = self.make_request('GET', path='/user', query_params=params)
-        body = self._process_response(response)
-        user_dict = json.loads(body)
-        user = UserInfo(self, user_dict)
-        return user
+        cache_key = ('user', uid, bool(params['stats']))
+        user_dict = self._cache.get(cache_key) if self._cache is not None else None
+        if user_dict is None:
+            response = self.make_request('GET', path='/user', query_params=params)
+            body = self._process_response(response)
+            user_dict = json.loads(body)
+            if self._cache is not None:
+                self._cache.put(cache_key, user_dict)
+        return user_dict
 
     # uid= UID
     # display_name= DISPLAY_NAME
@@ -257,8 +565,24 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         body = self._process_response(response)
         user_dict = json.loads(body)
         user = UserInfo(self, user_dict)
+        if self._key_index is not None:
+            self._key_index.add_user(user)
         return user
 
+    def create_users(self, specs, concurrency=4, ordered=False):
+        """Creates many users, and sets their user and bucket quotas, concurrently.
+        An error on one user (i.e. UserExists) does not abort the others.
+        :param iterable specs: the users spec, dict of create_user arguments (uid, display_name,
+                               tenant, email, ...) with the optional quotas 'user_quota' and
+                               'bucket_quota', dict of set_quota arguments (max_objects, ...)
+        :param int concurrency: number of users created in parallel. Default: 4
+        :param bool ordered: True to yield the results in the specs order. Default: False
+        :returns iterator: iterator of radosgw.bulk.BulkResult, with the created user and/or the
+                           error (the user is set if it was created, but a quota was not set)
+        """
+        import radosgw.bulk
+        return radosgw.bulk.create_users(self, specs, concurrency, ordered)
+
     # uid= UID or TENANT$UID
     # display_name= DISPLAY_NAME
     # email= None, key_type= 's3|swift',
@@ -292,9 +616,13 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         _kwargs_get('suspended', kwargs, params)
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('POST', path='/user', query_params=params)
+        self._invalidate_user(uid)
         body = self._process_response(response)
         user_dict = json.loads(body)
         user = UserInfo(self, user_dict)
+        if self._key_index is not None:
+            # i.e. generated key
+            self._key_index.add_user(user)
         return user
 
     def delete_user(self, uid, purge_data=True, **kwargs):
@@ -307,7 +635,13 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         params = {'uid': uid, 'purge-data': purge_data}
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('DELETE', path='/user', query_params=params)
-        return self._process_response(response) is None
+        self._invalidate_user(uid)
+        if self._cache is not None and purge_data:
+            self._cache.invalidate_if(lambda key, value: key[0] == 'bucket' and value.get('owner') == uid)
+        deleted = self._process_response(response) is None
+        if self._key_index is not None:
+            self._key_index.remove_user(uid)
+        return deleted
 
     def create_key(self, uid, **kwargs):
         """Creates a key for the user specified
@@ -327,8 +661,12 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         _kwargs_get('generate_key', kwargs, params, False)
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('PUT', path='/user?key', query_params=params)
+        self._invalidate_user(uid)
         body = self._process_response(response)
-        return json.loads(body)
+        keys = json.loads(body)
+        if self._key_index is not None:
+            self._key_index.add_keys(uid, keys, params.get('key-type', 's3'))
+        return keys
 
     def remove_key(self, access_key, **kwargs):
         """Delete an existing access key
@@ -344,7 +682,13 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         _kwargs_get('key_type', kwargs, params)
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('DELETE', path='/user?key', query_params=params)
-        return self._process_response(response) is None
+        if self._cache is not None:
+            self._cache.invalidate_if(lambda key, value: key[0] == 'user' and
+                                      any(k.get('access_key') == access_key for k in value.get('keys', [])))
+        removed = self._process_response(response) is None
+        if self._key_index is not None:
+            self._key_index.remove(access_key)
+        return removed
 
     def get_bucket(self, bucket_name, **kwargs):
         """Get a bucket information.
@@ -355,39 +699,73 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         params = {'bucket': bucket_name}
         _kwargs_get('stats', kwargs, params, True)
         _kwargs_get('format', kwargs, params, 'json')
-        response = self.make_request('GET', path='/bucket', query_params=params)
-        body = self._process_response(response)
-        bucket_dict = json.loads(body)
+        cache_key = ('bucket', bucket_name, bool(params['stats']))
+        bucket_dict = self._cache.get(cache_key) if self._cache is not None else None
+        if bucket_dict is None:
+            response = self.make_request('GET', path='/bucket', query_params=params)
+            body = self._process_response(response)
+            bucket_dict = json.loads(body)
+            if self._cache is not None:
+                self._cache.put(cache_key, bucket_dict)
         # XXX: print(json.dumps(bucket_dict, indent=4, sort_keys=True))
         bucket = BucketInfo(self, bucket_dict)
         return bucket
 
-    def get_buckets(self, uid=None, **kwargs):
+    def get_buckets(self, uid=None, stream=False, **kwargs):
         """Get all, or user specific, buckets information.
         :param str uid: the user id
+        :param bool stream: True to parse the response incrementally, and yield
+                            the buckets while reading it. Default: False
         :returns iterator: iterator of buckets information
         :see: http://docs.ceph.com/docs/master/radosgw/adminops/#get-bucket-info
         """
+        for bucket_dict in self._get_bucket_dicts(uid, stream, **kwargs):
+            bucket = BucketInfo(self, bucket_dict)
+            yield bucket
+
+    def _get_bucket_dicts(self, uid=None, stream=False, **kwargs):
+        """Get all, or user specific, buckets information as dict.
+        :returns iterator: iterator of buckets dict
+        """
         params = {'stats': True}
         if uid:
             params['uid'] = uid
         # optional query parameters
         _kwargs_get('format', kwargs, params, 'json')
-        response = self.make_request('GET', path='/bucket', query_params=params)
+        response = self.make_request('GET', path='/bucket', query_params=params, preload=not stream)
+        if stream and response.status == 200:
+            import radosgw.stream
+            try:
+                for bucket_dict in radosgw.stream.iter_json_array(response):
+                    yield bucket_dict
+            finally:
+                # i.e. the iteration stopped early, releases the connection
+                response.close()
+            return
         body = self._process_response(response)
         body_json = json.loads(body)
-        boto.log.debug('%d buckets' % len(body_json))
+        log.debug('%d buckets' % len(body_json))
         for bucket_dict in body_json:
-            bucket = BucketInfo(self, bucket_dict)
-            yield bucket
+            yield bucket_dict
 
+    def get_bucket_columns(self, uid=None, fields=None, stream=True, **kwargs):
+        """Get all, or user specific, buckets information as columns, without
+        building a BucketInfo per bucket.
+        :param str uid: the user id
+        :param list fields: the field names. Default: all the radosgw.columnar.BUCKET_FIELDS
+        :param bool stream: True to parse the response incrementally. Default: True
+        :returns radosgw.columnar.Columns: the columns (to_numpy(), to_pandas() or to_arrow())
+        """
+        import radosgw.columnar
+        columns = radosgw.columnar.Columns(radosgw.columnar.BUCKET_FIELDS, fields)
+        return columns.extend(self._get_bucket_dicts(uid, stream, **kwargs))
 
     def check_bucket_index(self, bucket_name, check_objects=True, fix=False, **kwargs):
         """Check the index of an existing bucket.
         :param str bucket_name:
         :param bool check_objects:
         :param bool fix:
-        :return: nothing
+        :return radosgw.bucket.IndexCheckResult: the existing and calculated header stats
         :see: http://docs.ceph.com/docs/master/radosgw/adminops/#check-bucket-index
         """
         params = {'bucket': bucket_name,
@@ -396,8 +774,26 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         # optional query parameters
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('GET', path='/bucket?index', query_params=params)
+        if fix:
+            self._invalidate_bucket(bucket_name)
         body = self._process_response(response)
-        # print "XXX: body:", body
+        return IndexCheckResult(bucket_name, json.loads(body) if body else None, fix)
+
+    def check_bucket_indexes(self, buckets=None, fix=False, check_objects=True, concurrency=4,
+                             rate=None, progress=None):
+        """Check the index of many buckets concurrently, and optionally fix the inconsistent ones.
+        An error on one bucket does not abort the others.
+        :param iterable buckets: the bucket names, or BucketInfo. Default: None (all the buckets)
+        :param bool fix: fix the index of the buckets found inconsistent. Default: False
+        :param bool check_objects: check the objects when fixing. Default: True
+        :param int concurrency: number of buckets checked in parallel. Default: 4
+        :param float rate: maximum number of checks started per second. Default: unlimited
+        :param callable progress: called with (summary, result) after each bucket
+        :returns radosgw.bulk.IndexCheckSummary: the consistent, inconsistent, fixed and failed buckets
+        """
+        import radosgw.bulk
+        return radosgw.bulk.check_bucket_indexes(self, buckets, fix, check_objects, concurrency,
+                                                 rate, progress)
 
     def delete_bucket(self, bucket_name, purge_objects=True, **kwargs):
         """Delete an existing bucket.
@@ -411,8 +807,22 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         # optional query parameters
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('DELETE', path='/bucket', query_params=params)
+        self._invalidate_bucket(bucket_name)
         return self._process_response(response) is None
 
+    def delete_buckets(self, buckets, purge_objects=True, concurrency=4, rate=None, progress=None):
+        """Delete many buckets concurrently.
+        An error on one bucket (i.e. BucketNotEmpty) does not abort the others.
+        :param iterable buckets: the bucket names, or BucketInfo
+        :param bool purge_objects: purge the objects of the buckets. Default: True
+        :param int concurrency: number of buckets deleted in parallel. Default: 4
+        :param float rate: maximum number of deletions started per second. Default: unlimited
+        :param callable progress: called with (summary, result) after each bucket
+        :returns radosgw.bulk.DeleteBucketsSummary: the deleted, not empty and failed buckets
+        """
+        import radosgw.bulk
+        return radosgw.bulk.delete_buckets(self, buckets, purge_objects, concurrency, rate, progress)
+
     def unlink_bucket(self, bucket_name, uid, **kwargs):
         """Unlink a bucket from a specified user.
         Primarily useful for changing bucket ownership.
@@ -426,6 +836,8 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         # optional query parameters
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('POST', path='/bucket', query_params=params)
+        self._invalidate_bucket(bucket_name)
+        self._invalidate_user(uid)
         return self._process_response(response) is None
 
     def link_bucket(self, bucket_name, bucket_id, uid, **kwargs):
@@ -441,7 +853,8 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         # optional query parameters
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('PUT', path='/bucket', query_params=params)
-        body = self._process_response(response)
+        self._invalidate_bucket(bucket_name)
+        self._invalidate_user(uid)
         return self._process_response(response) is None
 
     def remove_object(self, bucket_name, object_name, **kwargs):
@@ -457,6 +870,7 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         # optional query parameters
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('DELETE', path='/bucket?object', query_params=params)
+        self._invalidate_bucket(bucket_name)
         return self._process_response(response) is None
 
     def get_policy(self, bucket_name, object_name=None, **kwargs):
@@ -507,10 +921,21 @@ class RadosGWAdminConnection(boto.connection.AWSAuthConnection):
         _kwargs_get('enabled', kwargs, params)
         _kwargs_get('format', kwargs, params, 'json')
         response = self.make_request('PUT', path='/user?quota', query_params=params)
+        self._invalidate_user(uid)
         return self._process_response(response)
 
 
 # utilities
+def _set_stream_logger(name):
+    """Logs the debug messages of the logger to stderr, as boto.set_stream_logger."""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    handler = logging.StreamHandler()
+    handler.setLevel(logging.DEBUG)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(name)s [%(levelname)s]:%(message)s'))
+    logger.addHandler(handler)
+
+
 def _kwargs_get(key, kwargs, params, default=None):
     nkey = key.replace('_', '-')
     if key in kwargs and kwargs[key]:
@@ -154,3 +154,11 @@ class NoSuchBucket(RadosGWAdminError):
 
 class NoSuchKey(RadosGWAdminError):
     """No such access key."""
+
+
+class PoolTimeout(boto.exception.BotoClientError):
+    """No connection of the pool was available in time."""
+
+
+class CircuitOpen(boto.exception.BotoClientError):
+    """The gateway is unhealthy (circuit breaker open), the request was not sent."""
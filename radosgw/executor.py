@@ -0,0 +1,67 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Bounded concurrent execution of admin operations."""
+
+import collections
+import concurrent.futures
+
+
+def bounded_map(func, iterable, concurrency, ordered=True):
+    """Applies func to every item of iterable on a pool of worker threads.
+
+    At most concurrency calls are in flight at any time, and the iterable
+    is consumed lazily, so it can be a generator of arbitrary length.
+
+    :param callable func: the function to call for each item
+    :param iterable: the items
+    :param int concurrency: maximum number of concurrent calls
+    :param bool ordered: True to yield the results in the iterable order,
+                         False to yield them in completion order
+    :returns iterator: iterator of func results
+    :throws Exception: the first exception raised by func, pending calls are cancelled
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be >= 1: %r' % concurrency)
+    items = iter(iterable)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+    pending = collections.deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= concurrency:
+                break
+        while pending:
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                finished, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                for future in done:
+                    pending.remove(future)
+                for future in done:
+                    yield future.result()
+            # refill the pool
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= concurrency:
+                    break
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
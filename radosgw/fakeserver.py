@@ -0,0 +1,629 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""In-process fake RADOS Gateway admin server, for tests and benchmarks.
+
+Implements the admin operations used by the connection (/user, /user?key,
+/user?quota, /bucket, /bucket?index, /bucket?object, /bucket?policy, /usage
+and /metadata/user) over an in-memory dataset, with configurable latency
+and error injection. The requests must be signed, but the signature is not
+verified.
+
+  with FakeRadosGW(users=1000, buckets_per_user=10, latency=0.002) as fake:
+      rgwadmin = fake.connection()
+      for user in rgwadmin.get_users():
+          ...
+"""
+
+import calendar
+import collections
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qsl
+
+log = logging.getLogger('radosgw.fakeserver')
+
+# admin sub-resources (i.e. /user?key), like radosgw the first one present is used
+_SUBRESOURCES = ('key', 'quota', 'caps', 'index', 'policy', 'object')
+
+USAGE_CATEGORIES = ('get_obj', 'put_obj', 'list_bucket')
+
+
+class FakeAdminError(Exception):
+    """Admin operation error returned by the fake server."""
+
+    def __init__(self, status, code):
+        Exception.__init__(self, status, code)
+        self.status = status
+        self.code = code
+
+
+class FakeRadosGW(object):
+    """Fake RADOS Gateway admin server, running in a thread.
+
+    Thread-safe: the dataset can be read and modified (i.e. add_user) while
+    the server runs.
+    """
+
+    def __init__(self, users=100, buckets_per_user=10, usage_hours=24,
+                 latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, error_code='ServiceUnavailable',
+                 host='127.0.0.1', port=0, admin_path='/admin', seed=0):
+        """Constructor.
+        :param int users: number of users of the dataset. Default: 100
+        :param int buckets_per_user: number of buckets per user of the dataset. Default: 10
+        :param int usage_hours: hours of usage log per bucket, up to now. Default: 24
+        :param float latency: delay of each response, in seconds. Default: 0
+        :param float jitter: maximum random delay added to the latency, in seconds. Default: 0
+        :param float error_rate: probability of a request to fail with error_status. Default: 0
+        :param int error_status: the HTTP status of the random errors. Default: 503
+        :param str error_code: the error code of the random errors. Default: 'ServiceUnavailable'
+        :param int port: the port to listen on. Default: 0 (any free port)
+        :param int seed: the random seed of the jitter and the errors. Default: 0
+        """
+        self.host = host
+        self.port = port
+        self.admin_path = admin_path
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_code = error_code
+        self.usage_hours = usage_hours
+        self.usage_end = int(time.time()) // 3600 * 3600
+        self.requests = collections.Counter()
+        self._random = random.Random(seed)
+        self._injected = collections.deque()
+        self._users = collections.OrderedDict()
+        self._buckets = collections.OrderedDict()
+        self._access_keys = {}
+        self._key_serial = itertools.count(1)
+        self._usage_trimmed = {}
+        # bucket name: num_objects drift of the existing index header
+        self._index_drift = {}
+        self._lock = threading.RLock()
+        self._server = None
+        self._thread = None
+        for i in range(users):
+            uid = 'user%06d' % i
+            self.add_user(uid)
+            for j in range(buckets_per_user):
+                self.add_bucket('%s-bucket%04d' % (uid, j), uid, num_objects=(i + j) % 1000)
+
+    # dataset
+
+    def add_user(self, uid, display_name=None, email=None, max_buckets=1000, suspended=0,
+                 access_key=None, secret_key=None):
+        """Adds a user to the dataset.
+        :returns dict: the user JSON object
+        """
+        with self._lock:
+            if uid in self._users:
+                raise FakeAdminError(409, 'UserExists')
+            user_id = uid.split('$', 1)[-1]
+            user = {'user_id': user_id,
+                    'display_name': display_name or 'User %s' % user_id,
+                    'email': email if email is not None else '%s@example.org' % user_id,
+                    'suspended': int(suspended),
+                    'max_buckets': int(max_buckets),
+                    'subusers': [],
+                    'keys': [],
+                    'swift_keys': [],
+                    'caps': [],
+                    'op_mask': 'read, write, delete',
+                    'default_placement': '',
+                    'placement_tags': [],
+                    'bucket_quota': _quota(),
+                    'user_quota': _quota(),
+                    'temp_url_keys': [],
+                    'type': 'rgw'}
+            if '$' in uid:
+                user['tenant'] = uid.split('$', 1)[0]
+            self._users[uid] = user
+            self._add_key(uid, access_key or 'AK%018X' % next(self._key_serial),
+                          secret_key or 'SK%038X' % self._random.getrandbits(128))
+            return user
+
+    def add_bucket(self, bucket_name, owner, num_objects=0, size_kb=None):
+        """Adds a bucket to the dataset.
+        :returns dict: the bucket JSON object
+        """
+        with self._lock:
+            if size_kb is None:
+                size_kb = num_objects * 64
+            bucket_id = 'c0ffee.%d.1' % (len(self._buckets) + 1)
+            bucket = {'bucket': bucket_name,
+                      'num_shards': 11,
+                      'tenant': '',
+                      'zonegroup': 'default',
+                      'placement_rule': 'default-placement',
+                      'explicit_placement': {'data_pool': '', 'data_extra_pool': '', 'index_pool': ''},
+                      'id': bucket_id,
+                      'marker': bucket_id,
+                      'index_type': 'Normal',
+                      'owner': owner,
+                      'ver': '0#1',
+                      'master_ver': '0#0',
+                      'mtime': '2020-01-01T00:00:00.000000Z',
+                      'max_marker': '0#',
+                      'usage': {},
+                      'bucket_quota': _quota()}
+            _set_bucket_usage(bucket, num_objects, size_kb)
+            self._buckets[bucket_name] = bucket
+            return bucket
+
+    def put_objects(self, bucket_name, count=1, size_kb=64):
+        """Simulates the upload of count objects of size_kb KB each to a bucket
+        of the dataset, which updates the bucket index version.
+        :returns dict: the bucket JSON object
+        """
+        with self._lock:
+            if bucket_name not in self._buckets:
+                raise FakeAdminError(404, 'NoSuchBucket')
+            bucket = self._buckets[bucket_name]
+            usage = bucket['usage'].get('rgw.main', {})
+            _set_bucket_usage(bucket, usage.get('num_objects', 0) + count,
+                              usage.get('size_kb', 0) + count * size_kb)
+            _bump_ver(bucket)
+            return bucket
+
+    def corrupt_bucket_index(self, bucket_name, num_objects=1):
+        """Simulates a bucket index header drifting from the objects: the existing
+        header counts num_objects more objects than the calculated one, until the
+        index is checked with fix.
+        """
+        with self._lock:
+            if bucket_name not in self._buckets:
+                raise FakeAdminError(404, 'NoSuchBucket')
+            self._index_drift[bucket_name] = num_objects
+
+    def _add_key(self, uid, access_key, secret_key):
+        if access_key in self._access_keys:
+            raise FakeAdminError(409, 'KeyExists')
+        self._users[uid]['keys'].append({'user': self._users[uid]['user_id'],
+                                         'access_key': access_key,
+                                         'secret_key': secret_key})
+        self._access_keys[access_key] = uid
+
+    def inject_error(self, status=503, code='ServiceUnavailable', count=1):
+        """Makes the next count requests fail with the error."""
+        with self._lock:
+            for _ in range(count):
+                self._injected.append((status, code))
+
+    @property
+    def request_count(self):
+        """Number of requests received."""
+        return sum(self.requests.values())
+
+    # server
+
+    def start(self):
+        """Starts the server thread.
+        :returns FakeRadosGW: self
+        """
+        self._server = _HTTPServer((self.host, self.port), _Handler)
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='FakeRadosGW:%d' % self.port)
+        self._thread.daemon = True
+        self._thread.start()
+        log.debug('fake radosgw listening on %s:%d' % (self.host, self.port))
+        return self
+
+    def stop(self):
+        """Stops the server thread."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def connection(self, **kwargs):
+        """Returns an admin connection to the server.
+        :param kwargs: additional radosgw.connection.RadosGWAdminConnection arguments
+        :returns radosgw.connection.RadosGWAdminConnection: the connection
+        """
+        import radosgw.connection
+        kwargs.setdefault('access_key', 'FAKEACCESSKEY')
+        kwargs.setdefault('secret_key', 'FAKESECRETKEY')
+        return radosgw.connection.RadosGWAdminConnection(host=self.host, port=self.port,
+                                                         is_secure=False,
+                                                         admin_path=self.admin_path,
+                                                         **kwargs)
+
+    def handle(self, method, path, params, headers):
+        """Handles an admin request.
+        :returns tuple: (status, JSON object or None)
+        """
+        if not path.startswith(self.admin_path + '/'):
+            return 404, {'Code': 'NoSuchBucket'}
+        resource = path[len(self.admin_path) + 1:].rstrip('/')
+        for subresource in _SUBRESOURCES:
+            if subresource in params:
+                resource += '?' + subresource
+                break
+        operation = '%s /%s' % (method, resource)
+        delay = self.latency
+        with self._lock:
+            self.requests[operation] += 1
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+            error = None
+            if self._injected:
+                error = self._injected.popleft()
+            elif self.error_rate and self._random.random() < self.error_rate:
+                error = (self.error_status, self.error_code)
+        if delay:
+            time.sleep(delay)
+        if error:
+            return error[0], {'Code': error[1]}
+        if 'authorization' not in (name.lower() for name in headers):
+            return 403, {'Code': 'AccessDenied'}
+        if resource.startswith('metadata/'):
+            handler = self._get_metadata if method == 'GET' else None
+        else:
+            handler = getattr(self, '_%s_%s' % (method.lower(), resource.replace('?', '_')), None)
+        if handler is None:
+            return 405, {'Code': 'MethodNotAllowed'}
+        try:
+            with self._lock:
+                return 200, handler(params)
+        except FakeAdminError as e:
+            return e.status, {'Code': e.code}
+        except ValueError:
+            # i.e. a quota max-objects not an integer
+            return 400, {'Code': 'InvalidArgument'}
+
+    # admin operations, with the lock held
+
+    def _user(self, params):
+        uid = params.get('uid')
+        if uid not in self._users:
+            raise FakeAdminError(404, 'NoSuchUser')
+        return uid, self._users[uid]
+
+    def _bucket(self, params):
+        bucket_name = params.get('bucket')
+        if bucket_name not in self._buckets:
+            raise FakeAdminError(404, 'NoSuchBucket')
+        return self._buckets[bucket_name]
+
+    def _get_metadata(self, params):
+        keys = list(self._users)
+        if 'max-entries' not in params:
+            return keys
+        max_entries = int(params['max-entries'])
+        marker = params.get('marker')
+        start = keys.index(marker) + 1 if marker in self._users else 0
+        page = keys[start:start + max_entries]
+        truncated = start + max_entries < len(keys)
+        return {'keys': page, 'truncated': truncated, 'count': len(page),
+                'marker': page[-1] if truncated else ''}
+
+    def _get_user(self, params):
+        uid, user = self._user(params)
+        if not _true(params.get('stats')):
+            return user
+        user = dict(user)
+        stats = _usage_stats(0, 0)
+        for bucket in self._buckets.values():
+            if bucket['owner'] == uid:
+                for key, value in bucket['usage'].get('rgw.main', {}).items():
+                    stats[key] += value
+        user['stats'] = stats
+        return user
+
+    def _put_user(self, params):
+        uid = params.get('uid')
+        for user in self._users.values():
+            if params.get('email') and user['email'] == params['email']:
+                raise FakeAdminError(409, 'EmailExists')
+        self.add_user(uid, params.get('display-name'), params.get('email', ''),
+                      params.get('max-buckets', 1000), _true(params.get('suspended')),
+                      params.get('access-key'), params.get('secret-key'))
+        self._set_caps(uid, params.get('user-caps'))
+        return self._users[uid]
+
+    def _post_user(self, params):
+        uid, user = self._user(params)
+        for name in ('display-name', 'email'):
+            if name in params:
+                user[name.replace('-', '_')] = params[name]
+        if 'max-buckets' in params:
+            user['max_buckets'] = int(params['max-buckets'])
+        if 'suspended' in params:
+            user['suspended'] = int(_true(params['suspended']))
+        if 'access-key' in params or _true(params.get('generate-key')):
+            self._put_user_key(params)
+        self._set_caps(uid, params.get('user-caps'))
+        return user
+
+    def _delete_user(self, params):
+        uid, user = self._user(params)
+        owned = [name for name, bucket in self._buckets.items() if bucket['owner'] == uid]
+        if owned and not _true(params.get('purge-data')):
+            raise FakeAdminError(409, 'BucketNotEmpty')
+        for name in owned:
+            del self._buckets[name]
+        for key in user['keys']:
+            self._access_keys.pop(key['access_key'], None)
+        del self._users[uid]
+        return None
+
+    def _set_caps(self, uid, user_caps):
+        # i.e. "users=read; usage=read,write"
+        if user_caps:
+            caps = self._users[uid]['caps']
+            for cap in user_caps.split(';'):
+                cap_type, _, perm = cap.strip().partition('=')
+                caps.append({'type': cap_type, 'perm': perm})
+
+    def _put_user_key(self, params):
+        uid, user = self._user(params)
+        access_key = params.get('access-key') or 'AK%018X' % next(self._key_serial)
+        secret_key = params.get('secret-key') or 'SK%038X' % self._random.getrandbits(128)
+        self._add_key(uid, access_key, secret_key)
+        return user['keys']
+
+    def _delete_user_key(self, params):
+        uid = self._access_keys.pop(params.get('access-key'), None)
+        if uid is None:
+            raise FakeAdminError(404, 'InvalidAccessKey')
+        keys = self._users[uid]['keys']
+        keys[:] = [key for key in keys if key['access_key'] != params['access-key']]
+        return None
+
+    def _get_user_quota(self, params):
+        _, user = self._user(params)
+        return user[params.get('quota-type', 'user') + '_quota']
+
+    def _put_user_quota(self, params):
+        _, user = self._user(params)
+        quota = user[params.get('quota-type', 'user') + '_quota']
+        if 'max-objects' in params:
+            quota['max_objects'] = int(params['max-objects'])
+        if 'max-size-kb' in params:
+            quota['max_size_kb'] = int(params['max-size-kb'])
+            quota['max_size'] = quota['max_size_kb'] * 1024
+        if 'enabled' in params:
+            quota['enabled'] = _true(params['enabled'])
+        return None
+
+    def _get_bucket(self, params):
+        if 'bucket' in params:
+            return self._bucket(params)
+        buckets = self._buckets.values()
+        if 'uid' in params:
+            self._user(params)
+            buckets = [bucket for bucket in buckets if bucket['owner'] == params['uid']]
+        if _true(params.get('stats')):
+            return list(buckets)
+        return [bucket['bucket'] for bucket in buckets]
+
+    def _put_bucket(self, params):
+        # link bucket
+        bucket = self._bucket(params)
+        self._user(params)
+        bucket['owner'] = params['uid']
+        _bump_ver(bucket)
+        return None
+
+    def _post_bucket(self, params):
+        # unlink bucket
+        bucket = self._bucket(params)
+        if bucket['owner'] != params.get('uid'):
+            raise FakeAdminError(409, 'BucketUnlinkFailed')
+        bucket['owner'] = ''
+        _bump_ver(bucket)
+        return None
+
+    def _delete_bucket(self, params):
+        bucket = self._bucket(params)
+        if bucket['usage'].get('rgw.main', {}).get('num_objects') and \
+                not _true(params.get('purge-objects')):
+            raise FakeAdminError(409, 'BucketNotEmpty')
+        del self._buckets[bucket['bucket']]
+        return None
+
+    def _get_bucket_index(self, params):
+        bucket = self._bucket(params)
+        existing = bucket['usage']
+        drift = self._index_drift.get(bucket['bucket'])
+        if drift:
+            usage = bucket['usage'].get('rgw.main', {})
+            existing = {'rgw.main': _usage_stats(usage.get('num_objects', 0) + drift,
+                                                 usage.get('size_kb', 0))}
+            if _true(params.get('fix')):
+                del self._index_drift[bucket['bucket']]
+        return {'invalid_multipart_entries': [],
+                'check_result': {'existing_header': {'usage': existing},
+                                 'calculated_header': {'usage': bucket['usage']}}}
+
+    def _delete_bucket_object(self, params):
+        bucket = self._bucket(params)
+        usage = bucket['usage'].get('rgw.main')
+        if not usage or not usage['num_objects']:
+            raise FakeAdminError(404, 'NoSuchKey')
+        _set_bucket_usage(bucket, usage['num_objects'] - 1,
+                          max(usage['size_kb'] - 64, 0))
+        _bump_ver(bucket)
+        return None
+
+    def _get_bucket_policy(self, params):
+        bucket = self._bucket(params)
+        owner = {'id': bucket['owner'], 'display_name': bucket['owner']}
+        return {'acl': {'acl_user_map': [], 'acl_group_map': [],
+                        'grant_map': [{'id': bucket['owner'],
+                                       'grant': {'type': {'type': 0}, 'id': bucket['owner'],
+                                                 'email': '', 'permission': {'flags': 15},
+                                                 'name': bucket['owner'], 'group': 0}}]},
+                'owner': owner}
+
+    def _get_usage(self, params):
+        uid = params.get('uid')
+        start = _epoch(params.get('start'), 0)
+        end = _epoch(params.get('end'), self.usage_end + 3600)
+        entries = []
+        summary = []
+        for owner in ([uid] if uid else list(self._users)):
+            first = max(start, self._usage_trimmed.get(owner, 0),
+                        self.usage_end - (self.usage_hours - 1) * 3600)
+            buckets = []
+            totals = collections.OrderedDict((category, _usage_counts(0)) for category in USAGE_CATEGORIES)
+            for bucket in self._buckets.values():
+                if bucket['owner'] != owner:
+                    continue
+                for epoch in range(first + (-first % 3600), min(end, self.usage_end + 1), 3600):
+                    categories = []
+                    for category in USAGE_CATEGORIES:
+                        seed = ('%s:%d:%s' % (bucket['id'], epoch, category)).encode('utf-8')
+                        counts = _usage_counts(zlib.crc32(seed) % 100 + 1)
+                        categories.append(dict(category=category, **counts))
+                        for key, value in counts.items():
+                            totals[category][key] += value
+                    buckets.append({'bucket': bucket['bucket'],
+                                    'time': time.strftime('%Y-%m-%d %H:%M:%S.000000Z', time.gmtime(epoch)),
+                                    'epoch': epoch,
+                                    'owner': owner,
+                                    'categories': categories})
+            if buckets:
+                entries.append({'user': owner, 'buckets': buckets})
+                total = _usage_counts(0)
+                for counts in totals.values():
+                    for key, value in counts.items():
+                        total[key] += value
+                summary.append({'user': owner,
+                                'categories': [dict(category=category, **counts)
+                                               for category, counts in totals.items()],
+                                'total': total})
+        usage = {}
+        if _true(params.get('show-entries', 'True')):
+            usage['entries'] = entries
+        if _true(params.get('show-summary', 'True')):
+            usage['summary'] = summary
+        return usage
+
+    def _delete_usage(self, params):
+        end = _epoch(params.get('end'), self.usage_end + 3600)
+        uids = [params['uid']] if params.get('uid') else list(self._users)
+        for uid in uids:
+            self._usage_trimmed[uid] = max(self._usage_trimmed.get(uid, 0), end)
+        return None
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def handle_error(self, request, client_address):
+        # i.e. the client timed out, and closed the connection
+        log.debug('request of %s:%d failed' % client_address, exc_info=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler, delegating to the FakeRadosGW."""
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are sent separately, avoid the Nagle/delayed ACK latency
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        if int(self.headers.get('Content-Length') or 0):
+            # like radosgw, the admin request body is not read (boto AWS4 sends a
+            # Content-Length without body for POST), so the connection can't be reused
+            self.close_connection = True
+        status, result = self.server.fake.handle(self.command, url.path, params, self.headers.keys())
+        body = b'' if result is None else json.dumps(result).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_PUT = do_POST = do_DELETE = do_HEAD = _handle
+
+    def log_message(self, format, *args):
+        log.debug(format % args)
+
+
+def _true(value):
+    return str(value).lower() in ('true', '1', 'yes')
+
+
+def _quota():
+    return {'enabled': False, 'check_on_raw': False, 'max_size': -1,
+            'max_size_kb': 0, 'max_objects': -1}
+
+
+def _usage_stats(num_objects, size_kb):
+    size = size_kb * 1024
+    return {'size': size, 'size_actual': size, 'size_utilized': size,
+            'size_kb': size_kb, 'size_kb_actual': size_kb, 'size_kb_utilized': size_kb,
+            'num_objects': num_objects}
+
+
+def _set_bucket_usage(bucket, num_objects, size_kb):
+    if num_objects:
+        bucket['usage'] = {'rgw.main': _usage_stats(num_objects, size_kb)}
+    else:
+        bucket['usage'] = {}
+
+
+def _bump_ver(bucket):
+    # bucket index version, shard#version
+    shard, version = bucket['ver'].split('#')
+    bucket['ver'] = '%s#%d' % (shard, int(version) + 1)
+
+
+def _usage_counts(ops):
+    return {'bytes_sent': ops * 4096, 'bytes_received': ops * 1024,
+            'ops': ops, 'successful_ops': ops}
+
+
+def _epoch(value, default):
+    """Returns the epoch of an usage time parameter (epoch, 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS')."""
+    if not value:
+        return default
+    if value.isdigit():
+        return int(value)
+    for time_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return calendar.timegm(time.strptime(value, time_format))
+        except ValueError:
+            pass
+    raise FakeAdminError(400, 'InvalidArgument')
@@ -0,0 +1,138 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""In-memory reverse index of the access keys to their user.
+
+  index = KeyIndex().build(rgwadmin, concurrency=8)
+  owner = index.lookup('AKIAEXAMPLE')
+  print(owner.uid, owner.tenant, owner.key_type)
+
+Pass the index to the connection (key_index=...) to keep it up to date with
+the create_user, create_key, remove_key and delete_user requests sent
+through the connection.
+"""
+
+import collections
+import sys
+import threading
+
+import boto
+
+# uid is the admin uid (tenant$user_id for a tenant user)
+KeyOwner = collections.namedtuple('KeyOwner', ['uid', 'tenant', 'key_type'])
+
+
+class KeyIndex(object):
+    """Thread-safe access key to user index.
+
+    Maps the S3 access keys and the Swift key names (i.e. 'user:swift') to
+    the uid, an interned string shared by the keys of a user.
+    """
+
+    def __init__(self):
+        self._s3 = {}
+        self._swift = {}
+        self._lock = threading.Lock()
+
+    def build(self, rgwadmin, concurrency=None):
+        """Adds the keys of all the users.
+        :param radosgw.connection.RadosGWAdminConnection rgwadmin: the admin connection
+        :param int concurrency: number of users fetched in parallel. Default: sequential
+        :returns radosgw.keyindex.KeyIndex: self
+        """
+        for user in rgwadmin.get_users(concurrency=concurrency, ordered=False):
+            self.add_user(user)
+        boto.log.debug('key index: %d s3 keys, %d swift keys' % (len(self._s3), len(self._swift)))
+        return self
+
+    def add_user(self, user):
+        """Adds the S3 and Swift keys of a user.
+        :param user: radosgw.user.UserInfo or user JSON object (dict)
+        """
+        user_dict = getattr(user, 'object', user)
+        uid = user_dict['user_id']
+        if user_dict.get('tenant'):
+            uid = '%s$%s' % (user_dict['tenant'], uid)
+        self.add_keys(uid, user_dict.get('keys') or [], 's3')
+        self.add_keys(uid, user_dict.get('swift_keys') or [], 'swift')
+
+    def add_keys(self, uid, keys, key_type='s3'):
+        """Adds keys of a user.
+        :param str uid: the user uid
+        :param list keys: the key JSON objects (i.e. returned by create_key)
+        :param str key_type: 's3' or 'swift'. Default: 's3'
+        """
+        uid = sys.intern(uid)
+        with self._lock:
+            if key_type == 'swift':
+                for key in keys:
+                    self._swift[key['user']] = uid
+            else:
+                for key in keys:
+                    self._s3[key['access_key']] = uid
+
+    def add(self, access_key, uid, key_type='s3'):
+        """Adds a key.
+        :param str access_key: the S3 access key, or the Swift key name
+        """
+        uid = sys.intern(uid)
+        with self._lock:
+            (self._swift if key_type == 'swift' else self._s3)[access_key] = uid
+
+    def remove(self, access_key):
+        """Removes a key.
+        :returns bool: True if the key was indexed
+        """
+        with self._lock:
+            return self._s3.pop(access_key, None) is not None or \
+                self._swift.pop(access_key, None) is not None
+
+    def remove_user(self, uid):
+        """Removes all the keys of a user (scans the index).
+        :returns int: the number of keys removed
+        """
+        with self._lock:
+            removed = 0
+            for keys in (self._s3, self._swift):
+                for access_key in [k for k, owner in keys.items() if owner == uid]:
+                    del keys[access_key]
+                    removed += 1
+            return removed
+
+    def lookup(self, access_key):
+        """Returns the owner of a key.
+        :param str access_key: the S3 access key, or the Swift key name
+        :returns radosgw.keyindex.KeyOwner: the owner (uid, tenant, key_type), None if unknown
+        """
+        key_type = 's3'
+        uid = self._s3.get(access_key)
+        if uid is None:
+            key_type = 'swift'
+            uid = self._swift.get(access_key)
+            if uid is None:
+                return None
+        tenant = uid.split('$', 1)[0] if '$' in uid else None
+        return KeyOwner(uid, tenant, key_type)
+
+    def __contains__(self, access_key):
+        return access_key in self._s3 or access_key in self._swift
+
+    def __len__(self):
+        return len(self._s3) + len(self._swift)
+
+    def __repr__(self):
+        return '<KeyIndex: %d s3 keys, %d swift keys>' % (len(self._s3), len(self._swift))
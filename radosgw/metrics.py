@@ -0,0 +1,215 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Admin requests metrics.
+
+Request and error counts, bytes received and latency histograms per admin
+path and method, recorded by the connection and exported in the Prometheus
+text format (Metrics#prometheus) or as a dict (Metrics#snapshot).
+
+The latency includes the response body read, except for the streamed
+responses (i.e. get_buckets(stream=True)) where it ends with the headers.
+"""
+
+import bisect
+import collections
+import threading
+
+# latency histogram buckets upper bounds, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram(object):
+    """Latency histogram with fixed buckets. Not thread-safe."""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        # the last count is the +Inf bucket
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Returns the cumulative counts [(upper bound, count), ...], ending with (inf, count)."""
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def quantile(self, q):
+        """Returns the estimated q-quantile (0 < q < 1), interpolated within the bucket.
+        :returns float: the estimated value, None if empty
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower = 0.0
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            if total + count >= rank and count:
+                return lower + (bound - lower) * (rank - total) / count
+            total += count
+            lower = bound
+        # in the +Inf bucket
+        return self.bounds[-1]
+
+
+class EndpointMetrics(object):
+    """Metrics of one admin path and method. Not thread-safe."""
+
+    __slots__ = ('requests', 'statuses', 'errors', 'bytes_received', 'latency')
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.requests = 0
+        self.statuses = collections.Counter()
+        self.errors = collections.Counter()
+        self.bytes_received = 0
+        self.latency = Histogram(bounds)
+
+
+class Metrics(object):
+    """Thread-safe admin requests metrics.
+
+    Pass an instance to radosgw.connection.RadosGWAdminConnection (metrics=...),
+    one instance can be shared by several connections.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='radosgw_admin'):
+        """Constructor.
+        :param tuple buckets: the latency histogram buckets upper bounds, in seconds
+        :param str prefix: the Prometheus metrics name prefix. Default: 'radosgw_admin'
+        """
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, method, path):
+        key = (method, path)
+        endpoint = self._endpoints.get(key)
+        if endpoint is None:
+            endpoint = EndpointMetrics(self.buckets)
+            self._endpoints[key] = endpoint
+        return endpoint
+
+    def observe(self, method, path, status, seconds, bytes_received=0):
+        """Records a request.
+        :param str method: the HTTP method
+        :param str path: the admin sub request path (i.e. /user?key)
+        :param int status: the HTTP status, None if the request failed without response
+        :param float seconds: the request latency
+        :param int bytes_received: the response body size
+        """
+        with self._lock:
+            endpoint = self._endpoint(method, path)
+            endpoint.requests += 1
+            endpoint.statuses[status] += 1
+            endpoint.bytes_received += bytes_received
+            endpoint.latency.observe(seconds)
+
+    def error(self, method, path, error):
+        """Records an error.
+        :param error: the error (i.e. radosgw.exception.NoSuchUser), or its name
+        """
+        name = error if isinstance(error, str) else error.__class__.__name__
+        with self._lock:
+            self._endpoint(method, path).errors[name] += 1
+
+    def reset(self):
+        """Clears all the metrics."""
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self):
+        """Returns the current metrics.
+        :returns dict: (method, path): dict of requests, statuses (None: failed without
+                       response), errors, bytes_received,
+                       latency_count, latency_sum, latency_buckets (cumulative), p50, p90, p99
+        """
+        snapshot = {}
+        with self._lock:
+            for key, endpoint in self._endpoints.items():
+                latency = endpoint.latency
+                snapshot[key] = {'requests': endpoint.requests,
+                                 'statuses': dict(endpoint.statuses),
+                                 'errors': dict(endpoint.errors),
+                                 'bytes_received': endpoint.bytes_received,
+                                 'latency_count': latency.count,
+                                 'latency_sum': latency.sum,
+                                 'latency_buckets': latency.cumulative(),
+                                 'p50': latency.quantile(0.5),
+                                 'p90': latency.quantile(0.9),
+                                 'p99': latency.quantile(0.99)}
+        return snapshot
+
+    def prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format.
+        :returns str: the metrics
+        """
+        prefix = self.prefix
+        snapshot = self.snapshot()
+        keys = sorted(snapshot)
+        lines = ['# HELP %s_requests_total Admin requests.' % prefix,
+                 '# TYPE %s_requests_total counter' % prefix]
+        for key in keys:
+            statuses = snapshot[key]['statuses']
+            for status in sorted(statuses, key=lambda status: (status is None, status)):
+                label = 'none' if status is None else status
+                lines.append('%s_requests_total{%s,status="%s"} %d' % (prefix, _labels(key), label,
+                                                                       statuses[status]))
+        lines += ['# HELP %s_errors_total Admin request errors, by error type.' % prefix,
+                  '# TYPE %s_errors_total counter' % prefix]
+        for key in keys:
+            for error, count in sorted(snapshot[key]['errors'].items()):
+                lines.append('%s_errors_total{%s,error="%s"} %d' % (prefix, _labels(key), _escape(error), count))
+        lines += ['# HELP %s_response_bytes_total Admin response bytes received.' % prefix,
+                  '# TYPE %s_response_bytes_total counter' % prefix]
+        for key in keys:
+            lines.append('%s_response_bytes_total{%s} %d' % (prefix, _labels(key), snapshot[key]['bytes_received']))
+        lines += ['# HELP %s_request_duration_seconds Admin request latency.' % prefix,
+                  '# TYPE %s_request_duration_seconds histogram' % prefix]
+        for key in keys:
+            labels = _labels(key)
+            for bound, count in snapshot[key]['latency_buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('%s_request_duration_seconds_bucket{%s,le="%s"} %d' % (prefix, labels, le, count))
+            lines.append('%s_request_duration_seconds_sum{%s} %r' % (prefix, labels, snapshot[key]['latency_sum']))
+            lines.append('%s_request_duration_seconds_count{%s} %d' % (prefix, labels, snapshot[key]['latency_count']))
+        return '\n'.join(lines) + '\n'
+
+    def __repr__(self):
+        with self._lock:
+            requests = sum(endpoint.requests for endpoint in self._endpoints.values())
+        return '<Metrics: %d endpoints, %d requests>' % (len(self._endpoints), requests)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(key):
+    method, path = key
+    return 'method="%s",path="%s"' % (_escape(method), _escape(path))
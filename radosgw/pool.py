@@ -0,0 +1,150 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Bounded HTTP connection pool for the admin connection."""
+
+import contextlib
+import threading
+
+import boto
+import boto.connection
+
+import radosgw.exception
+
+
+class BoundedConnectionPool(boto.connection.ConnectionPool):
+    """Thread-safe keep-alive connection pool, bounded per host.
+
+    At most maxsize requests are sent concurrently to a host, the other
+    threads wait for a free slot, and at most maxsize idle connections are
+    kept open per host, so the keep-alive connections are reused instead of
+    being closed and re-opened (TLS handshake) under load.
+
+    :see: radosgw.connection.RadosGWAdminConnection#__init__
+    """
+
+    def __init__(self, maxsize=10, block_timeout=None):
+        """Constructor.
+        :param int maxsize: maximum number of connections per host. Default: 10
+        :param float block_timeout: maximum time to wait for a free slot, None to wait forever
+        """
+        boto.connection.ConnectionPool.__init__(self)
+        if maxsize < 1:
+            raise ValueError('maxsize must be >= 1: %r' % maxsize)
+        self.maxsize = maxsize
+        self.block_timeout = block_timeout
+        self._slots = {}
+
+    def __getstate__(self):
+        pickled_dict = boto.connection.ConnectionPool.__getstate__(self)
+        pickled_dict['_slots'] = {}
+        return pickled_dict
+
+    def __setstate__(self, dct):
+        self.__init__(dct['maxsize'], dct['block_timeout'])
+
+    def put_http_connection(self, host, port, is_secure, conn):
+        """Adds a connection to the pool of the host, or closes it if the pool is full
+        of idle connections."""
+        with self.mutex:
+            key = (host, port, is_secure)
+            if key not in self.host_to_pool:
+                self.host_to_pool[key] = boto.connection.HostConnectionPool()
+            pool = self.host_to_pool[key]
+            # a connection whose response is still being read can not be closed
+            if pool.size() < self.maxsize or not pool._conn_ready(conn):
+                pool.put(conn)
+                return
+        boto.log.debug('connection pool for %s:%s full, closing connection' % (host, port))
+        conn.close()
+
+    def acquire(self, host, port, is_secure):
+        """Reserves one of the maxsize request slots of the host.
+        :returns callable: releases the slot (once)
+        :throws radosgw.exception.PoolTimeout: if no slot is free after block_timeout
+        """
+        with self.mutex:
+            key = (host, port, is_secure)
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.maxsize)
+            semaphore = self._slots[key]
+        if not semaphore.acquire(timeout=self.block_timeout):
+            raise radosgw.exception.PoolTimeout('no free connection to %s:%s after %ss'
+                                                % (host, port, self.block_timeout))
+        released = []
+
+        def release():
+            if not released:
+                released.append(True)
+                semaphore.release()
+        return release
+
+    @contextlib.contextmanager
+    def slot(self, host, port, is_secure):
+        """Context manager reserving one of the maxsize request slots of the host.
+        :throws radosgw.exception.PoolTimeout: if no slot is free after block_timeout
+        """
+        release = self.acquire(host, port, is_secure)
+        try:
+            yield
+        finally:
+            release()
+
+
+class SlotResponse(object):
+    """Streamed response holding its request slot of the pool until the body is
+    completely read, or the response closed.
+    """
+
+    def __init__(self, response, release, connection):
+        """INTERNAL ONLY."""
+        self._response = response
+        self._release = release
+        self._connection = connection
+        self.status = response.status
+        self.reason = response.reason
+
+    def getheader(self, name, default=None):
+        return self._response.getheader(name, default)
+
+    def getheaders(self):
+        return self._response.getheaders()
+
+    def read(self, amt=None):
+        try:
+            data = self._response.read(amt)
+        except Exception:
+            self.close()
+            raise
+        if amt is None or not data or self._response.isclosed():
+            self._done()
+        return data
+
+    def close(self):
+        if self._release is not None:
+            # the unread body would be read by the next request of the keep-alive connection
+            self._connection.close()
+        self._response.close()
+        self._done()
+
+    def _done(self):
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
@@ -0,0 +1,116 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Client-side rate limiting of the admin requests."""
+
+import threading
+import time
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket.
+
+    The bucket refills rate tokens per second, up to burst tokens. A caller
+    takes its tokens immediately and sleeps until they are refilled, so the
+    waiting threads are served in arrival order, at the rate.
+    """
+
+    def __init__(self, rate, burst=1, timer=time.monotonic, sleep=time.sleep):
+        """Constructor.
+        :param float rate: tokens per second
+        :param float burst: maximum number of tokens, requests sent without waiting. Default: 1
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive: %r' % rate)
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.acquired = 0
+        self.waited = 0.0
+        self._timer = timer
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._last = timer()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1):
+        """Takes tokens, waiting until they are available.
+        :returns float: the time waited, in seconds
+        """
+        with self._lock:
+            self._refill(self._timer())
+            self._tokens -= tokens
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += tokens
+            self.waited += delay
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    def try_acquire(self, tokens=1):
+        """Takes tokens, only if they are available now.
+        :returns bool: True if the tokens were taken
+        """
+        with self._lock:
+            self._refill(self._timer())
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            self.acquired += tokens
+            return True
+
+    def __repr__(self):
+        return '<TokenBucket: rate=%g burst=%g>' % (self.rate, self.burst)
+
+
+class RateLimiter(object):
+    """Rate limiter of the admin requests, with separate read (GET, HEAD) and
+    write (PUT, POST, DELETE) budgets.
+
+    Pass an instance to radosgw.connection.RadosGWAdminConnection
+    (rate_limiter=...), one instance can be shared by the threads and the
+    connections of a job. Each attempt of a request (retries included) takes
+    a token.
+    """
+
+    def __init__(self, read_rate=None, write_rate=None, read_burst=1, write_burst=1):
+        """Constructor.
+        :param float read_rate: maximum read requests per second. Default: None (unlimited)
+        :param float write_rate: maximum write requests per second. Default: None (unlimited)
+        :param float read_burst: read requests sent without waiting. Default: 1
+        :param float write_burst: write requests sent without waiting. Default: 1
+        """
+        self.read = TokenBucket(read_rate, read_burst) if read_rate else None
+        self.write = TokenBucket(write_rate, write_burst) if write_rate else None
+
+    def acquire(self, method):
+        """Waits until a request may be sent.
+        :param str method: the HTTP method
+        :returns float: the time waited, in seconds
+        """
+        bucket = self.read if method in READ_METHODS else self.write
+        if bucket is None:
+            return 0.0
+        return bucket.acquire()
+
+    def __repr__(self):
+        return '<RateLimiter: read=%r write=%r>' % (self.read, self.write)
@@ -0,0 +1,277 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Retry policy of the admin requests.
+
+Exponential backoff with full jitter, so that the clients of an overloaded
+gateway do not retry in lockstep, a retry budget, so that the retries stay a
+fraction of the requests, and an optional circuit breaker, failing fast
+while the gateway is unhealthy.
+:see: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+"""
+
+import json
+import logging
+import random
+import socket
+import threading
+import time
+
+import http.client as http_client
+
+# radosgw.exception (and boto) imported on first use
+import radosgw
+
+# boto.log, without importing boto
+log = logging.getLogger('boto')
+
+RETRYABLE_STATUSES = (500, 502, 503, 504)
+
+RETRYABLE_CODES = ('SlowDown', 'InternalError', 'ServiceUnavailable', 'RequestTimeout')
+
+# the gateway refused the request, safe to retry whatever the method
+THROTTLING_CODES = ('SlowDown', 'ServiceUnavailable')
+
+CONNECTION_ERRORS = (socket.error, http_client.HTTPException)
+
+
+class RetryBudget(object):
+    """Thread-safe retry budget.
+
+    Each request deposits ratio token, each retry withdraws one token. The
+    budget also refills min_per_second tokens per second, so that a client
+    with few requests can still retry. At most burst tokens are kept.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=1.0, burst=10, timer=time.monotonic):
+        """Constructor.
+        :param float ratio: the retries allowed per request. Default: 0.2
+        :param float min_per_second: the retries allowed per second. Default: 1
+        :param int burst: the maximum number of tokens. Default: 10
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.burst = burst
+        self._timer = timer
+        self._tokens = float(burst)
+        self._last = timer()
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Records a request."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """Records a retry, if the budget allows it.
+        :returns bool: True if the retry is allowed
+        """
+        with self._lock:
+            now = self._timer()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.min_per_second)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+
+class CircuitBreaker(object):
+    """Thread-safe circuit breaker.
+
+    Opens after failure_threshold consecutive failures, then fails fast with
+    radosgw.exception.CircuitOpen during reset_timeout seconds. Then a single
+    probe request is let through (half-open): its success closes the circuit,
+    its failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, timer=time.monotonic):
+        """Constructor.
+        :param int failure_threshold: consecutive failures opening the circuit. Default: 5
+        :param float reset_timeout: time before probing the gateway again, in seconds. Default: 30
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        return self._state
+
+    def before(self):
+        """Checks that a request may be sent.
+        :throws radosgw.exception.CircuitOpen: if the circuit is open
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN and self._timer() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise radosgw.exception.CircuitOpen('circuit open after %d failures' % self._failures)
+
+    def success(self):
+        """Records a successful request."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                log.info('circuit closed')
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def release(self):
+        """Ends a request without outcome (i.e. a client error): a half-open circuit lets
+        another probe request through."""
+        with self._lock:
+            self._probing = False
+
+    def failure(self):
+        """Records a failed request (gateway error or connection error)."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or \
+                    (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+                log.warning('circuit open after %d failures' % self._failures)
+                self._state = self.OPEN
+                self._opened_at = self._timer()
+                self._probing = False
+
+    def __repr__(self):
+        return '<CircuitBreaker: %s failures=%d>' % (self._state, self._failures)
+
+
+class RetryPolicy(object):
+    """Retry policy of a connection.
+
+    The 5xx responses, the SlowDown, InternalError, ServiceUnavailable and
+    RequestTimeout errors and the connection errors are retryable. The
+    throttling errors (503, SlowDown) are retried whatever the method, the
+    others only for the retry_methods. The policy (budget and circuit breaker)
+    can be shared by the connections to the same gateway.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.1, max_delay=10.0,
+                 retry_methods=('GET', 'HEAD'),
+                 budget=None, circuit_breaker=None,
+                 sleep=time.sleep):
+        """Constructor.
+        :param int max_attempts: maximum number of attempts per request. Default: 4
+        :param float base_delay: backoff delay of the first retry, in seconds. Default: 0.1
+        :param float max_delay: maximum backoff delay, in seconds. Default: 10
+        :param tuple retry_methods: methods retried on any retryable error. Default: GET, HEAD
+        :param radosgw.retry.RetryBudget budget: the retry budget. Default: RetryBudget()
+        :param radosgw.retry.CircuitBreaker circuit_breaker: optional circuit breaker
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_methods = retry_methods
+        self.budget = budget if budget is not None else RetryBudget()
+        self.circuit_breaker = circuit_breaker
+        self._sleep = sleep
+
+    def backoff(self, attempt):
+        """Returns the full jitter backoff delay before the retry attempt (0 based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def classify(self, response):
+        """Returns the error code of a retryable response, None if not retryable."""
+        if response.status < 400:
+            return None
+        code = None
+        try:
+            body = response.read()
+            if isinstance(body, bytes):
+                body = body.decode('utf-8')
+            code = json.loads(body).get('Code') if body else None
+        except (ValueError, AttributeError):
+            pass
+        if code in RETRYABLE_CODES:
+            return code
+        if response.status in RETRYABLE_STATUSES:
+            return code or str(response.status)
+        return None
+
+    def call(self, method, send):
+        """Sends a request with retries.
+        :param str method: the HTTP method
+        :param callable send: sends the request once, returns the response
+        :returns: the last response (maybe an error response)
+        :throws radosgw.exception.CircuitOpen: if the circuit breaker is open
+        """
+        breaker = self.circuit_breaker
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before()
+            sent = False
+            try:
+                response = send()
+                sent = True
+            except CONNECTION_ERRORS as e:
+                sent = True
+                if breaker is not None:
+                    breaker.failure()
+                if not self._may_retry(attempt, method in self.retry_methods):
+                    raise
+                log.debug('%s failed: %r, retrying' % (method, e))
+                delay = self.backoff(attempt)
+            else:
+                code = self.classify(response)
+                if code is None:
+                    if breaker is not None:
+                        breaker.success()
+                    return response
+                if breaker is not None:
+                    breaker.failure()
+                throttled = response.status == 503 or code in THROTTLING_CODES
+                if not self._may_retry(attempt, throttled or method in self.retry_methods):
+                    return response
+                log.debug('%s failed: %d %s, retrying' % (method, response.status, code))
+                delay = self.backoff(attempt)
+                retry_after = response.getheader('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, min(float(retry_after), self.max_delay))
+            finally:
+                if not sent and breaker is not None:
+                    # no outcome (i.e. PoolTimeout), a half-open circuit must probe again
+                    breaker.release()
+            self._sleep(delay)
+            attempt += 1
+
+    def _may_retry(self, attempt, retryable):
+        if self.circuit_breaker is not None and self.circuit_breaker.state != CircuitBreaker.CLOSED:
+            # returns the actual error, not CircuitOpen
+            return False
+        return retryable and attempt + 1 < self.max_attempts and self.budget.withdraw()
@@ -0,0 +1,391 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Usage log rollup.
+
+Aggregates the usage log bucket entries (i.e. yielded by iter_usage) by
+dimensions (user, owner, bucket, category) and time granularity, as they are
+consumed:
+
+  rollup = UsageRollup(dimensions=('user', 'category'), granularity=DAY)
+  rollup.extend(rgwadmin.iter_usage('2020-01-01', '2020-02-01'))
+  for row in rollup.rows():
+      print(row['user'], row['time'], row['category'], row['bytes_sent'])
+
+The counters of a batch of entries are summed with NumPy, if installed. The
+rollups of separate time windows or runs can be merged.
+"""
+
+import itertools
+import operator
+
+METRICS = ('bytes_sent', 'bytes_received', 'ops', 'successful_ops')
+
+DIMENSIONS = ('user', 'owner', 'bucket', 'category')
+
+HOUR = 3600
+DAY = 86400
+
+
+class UsageRollup(object):
+    """Incremental aggregates of the usage log counters (bytes_sent,
+    bytes_received, ops and successful_ops). Not thread-safe.
+    """
+
+    def __init__(self, dimensions=('user', 'bucket', 'category'), granularity=HOUR, vectorized=None):
+        """Constructor.
+        :param tuple dimensions: the aggregation dimensions, among user, owner, bucket and
+                                 category. Default: user, bucket, category
+        :param int granularity: the time granularity, in seconds, a multiple of HOUR, or None
+                                to aggregate over the whole time. Default: HOUR
+        :param bool vectorized: True to sum with NumPy, False in pure Python.
+                                Default: None (NumPy if installed)
+        """
+        for dimension in dimensions:
+            if dimension not in DIMENSIONS:
+                raise ValueError('unknown dimension: %r' % dimension)
+        if granularity is not None and (granularity <= 0 or granularity % HOUR):
+            raise ValueError('granularity must be a multiple of 3600: %r' % granularity)
+        self.dimensions = tuple(dimensions)
+        self.granularity = granularity
+        # the key: the entry dimensions, the category, the time
+        self._entry_dimensions = tuple(d for d in self.dimensions if d != 'category')
+        self._by_category = 'category' in self.dimensions
+        self._key_names = self._entry_dimensions + (('category',) if self._by_category else ()) + \
+            (('time',) if granularity else ())
+        self._get_entry_dimensions = _tuple_getter(self._entry_dimensions)
+        # the group of each key, with NumPy the key codes: (dimensions, category, time slot)
+        self._groups = {}
+        if vectorized is None:
+            try:
+                import numpy
+                vectorized = True
+            except ImportError:
+                vectorized = False
+        elif vectorized:
+            import numpy
+        self.vectorized = vectorized
+        if vectorized:
+            # one row per metric, one column per group, grown as needed
+            self._totals = numpy.zeros((len(METRICS), 1024), dtype=numpy.int64)
+            # entry dimensions (a scalar for one dimension): code, and the reverse
+            self._dimension_codes = {}
+            self._dimension_keys = []
+            # category: code, and the reverse
+            self._categories = {}
+            self._category_names = []
+        else:
+            self._totals = [[] for _ in METRICS]
+        self.entries = 0
+
+    def _entry_key(self, entry):
+        try:
+            key = self._get_entry_dimensions(entry)
+        except KeyError:
+            # i.e. no owner
+            key = tuple(entry.get(dimension) for dimension in self._entry_dimensions)
+        if self.granularity:
+            epoch = entry['epoch']
+            return key + (epoch - epoch % self.granularity,)
+        return key
+
+    def _key(self, entry_key, category):
+        """Returns the group key of an entry key and category."""
+        if not self._by_category:
+            return entry_key
+        if self.granularity:
+            return entry_key[:-1] + (category, entry_key[-1])
+        return entry_key + (category,)
+
+    def add(self, entry):
+        """Adds a bucket entry of the usage log.
+        :param dict entry: dict of user, owner, bucket, epoch and categories
+        """
+        self.extend((entry,))
+
+    def extend(self, entries):
+        """Adds bucket entries of the usage log.
+        :param iterable entries: the bucket entries (i.e. yielded by iter_usage)
+        :returns radosgw.rollup.UsageRollup: self
+        """
+        if self.vectorized:
+            self._extend_numpy(entries)
+        else:
+            self._extend_python(entries)
+        return self
+
+    def add_usage(self, usage):
+        """Adds the entries of a get_usage() response.
+        :param dict usage: the usage, with entries
+        :returns radosgw.rollup.UsageRollup: self
+        """
+        return self.extend(dict(bucket, user=entry['user'])
+                           for entry in usage.get('entries', []) for bucket in entry['buckets'])
+
+    def _group(self, key):
+        if self.vectorized:
+            key = self._key_codes(key)
+        group = self._groups.get(key)
+        if group is None:
+            group = len(self._groups)
+            self._groups[key] = group
+            if not self.vectorized:
+                for totals in self._totals:
+                    totals.append(0)
+        return group
+
+    def _key_codes(self, key):
+        """Returns the codes (dimensions, category, time slot) of a group key."""
+        size = len(self._entry_dimensions)
+        dimensions = key[0] if size == 1 else key[:size]
+        dimensions = int(_codes(self._dimension_codes, [dimensions], self._dimension_keys)[0])
+        category = 0
+        if self._by_category:
+            category = int(_codes(self._categories, [key[size]], self._category_names)[0])
+        slot = key[-1] // self.granularity if self.granularity else 0
+        return dimensions, category, slot
+
+    def _items(self):
+        """Returns the (key, group) of the groups."""
+        if not self.vectorized:
+            return self._groups.items()
+        if len(self._entry_dimensions) == 1:
+            dimension_keys = [(key,) for key in self._dimension_keys]
+        else:
+            dimension_keys = self._dimension_keys
+        items = []
+        for (dimensions, category, slot), group in self._groups.items():
+            key = dimension_keys[dimensions]
+            if self._by_category:
+                key += (self._category_names[category],)
+            if self.granularity:
+                key += (slot * self.granularity,)
+            items.append((key, group))
+        return items
+
+    def _extend_python(self, entries):
+        bytes_sent, bytes_received, ops, successful_ops = self._totals
+        by_category = self._by_category
+        for entry in entries:
+            self.entries += 1
+            categories = entry['categories']
+            if not categories:
+                continue
+            entry_key = self._entry_key(entry)
+            if not by_category:
+                group = self._group(entry_key)
+            for category in categories:
+                if by_category:
+                    group = self._group(self._key(entry_key, category['category']))
+                bytes_sent[group] += category.get('bytes_sent', 0)
+                bytes_received[group] += category.get('bytes_received', 0)
+                ops[group] += category.get('ops', 0)
+                successful_ops[group] += category.get('successful_ops', 0)
+
+    def _extend_numpy(self, entries, batch_size=65536):
+        entries = iter(entries)
+        while True:
+            batch = list(itertools.islice(entries, batch_size))
+            if not batch:
+                return
+            try:
+                self._add_batch(batch)
+            except KeyError:
+                # i.e. no owner, missing counter
+                self._add_batch([self._complete(entry) for entry in batch])
+
+    def _complete(self, entry):
+        """Returns the entry with all the dimensions and counters."""
+        complete = dict((dimension, entry.get(dimension)) for dimension in self._entry_dimensions)
+        complete['epoch'] = entry['epoch']
+        complete['categories'] = []
+        for category in entry['categories']:
+            counters = dict((metric, category.get(metric, 0)) for metric in METRICS)
+            counters['category'] = category['category']
+            complete['categories'].append(counters)
+        return complete
+
+    def _add_batch(self, batch):
+        """Adds a batch of entries: the dimensions, categories and counters are extracted
+        in C iterations (map), then coded, grouped and summed with numpy.
+        """
+        import numpy
+        size = len(batch)
+        categories = list(map(_get_categories, batch))
+        counts = numpy.fromiter(map(len, categories), dtype=numpy.int64, count=size)
+        categories = list(itertools.chain.from_iterable(categories))
+        counters = numpy.fromiter(itertools.chain.from_iterable(map(_get_counters, categories)),
+                                  dtype=numpy.int64, count=len(categories) * len(METRICS))
+        counters = counters.reshape(-1, len(METRICS))
+        get_dimensions = self._get_entry_dimensions
+        if len(self._entry_dimensions) == 1:
+            # a scalar, faster than a tuple
+            get_dimensions = operator.itemgetter(self._entry_dimensions[0])
+        codes = _codes(self._dimension_codes, list(map(get_dimensions, batch)),
+                       self._dimension_keys)
+        # batch code: dimensions, category and time slot codes, in mixed radix
+        slots = first = 0
+        times = 1
+        if self.granularity:
+            slots = numpy.fromiter(map(_get_epoch, batch), dtype=numpy.int64, count=size)
+            slots //= self.granularity
+            first = int(slots.min())
+            slots -= first
+            times = int(slots.max()) + 1
+        codes = numpy.repeat(codes * times + slots, counts)
+        category_count = 1
+        if self._by_category:
+            category_codes = _codes(self._categories, list(map(_get_category, categories)),
+                                    self._category_names)
+            category_count = len(self._categories)
+            codes = codes * category_count + category_codes
+        self.entries += size
+        if not len(codes):
+            return
+        # sums the counters of each batch code
+        order = numpy.argsort(codes, kind='stable')
+        codes = codes[order]
+        starts = numpy.flatnonzero(numpy.r_[True, codes[1:] != codes[:-1]])
+        sums = numpy.add.reduceat(counters[order], starts, axis=0)
+        codes, category_codes = numpy.divmod(codes[starts], category_count)
+        dimension_codes, slots = numpy.divmod(codes, times)
+        # the groups of the key codes, the new ones added
+        groups = _codes(self._groups, list(zip(dimension_codes.tolist(), category_codes.tolist(),
+                                               (slots + first).tolist())))
+        self._reserve(len(self._groups))
+        # one key per group
+        self._totals[:, groups] += sums.T
+
+    def _reserve(self, size):
+        import numpy
+        capacity = self._totals.shape[1]
+        if size > capacity:
+            totals = numpy.zeros((len(METRICS), max(size, capacity * 2)), dtype=numpy.int64)
+            totals[:, :capacity] = self._totals
+            self._totals = totals
+
+    def _columns(self):
+        """Returns the totals, one list per metric."""
+        if self.vectorized:
+            return self._totals[:, :len(self._groups)].tolist()
+        return self._totals
+
+    def merge(self, other):
+        """Adds the aggregates of another rollup, with the same dimensions and granularity.
+        :param radosgw.rollup.UsageRollup other: the other rollup (i.e. of another time window)
+        :returns radosgw.rollup.UsageRollup: self
+        """
+        if other._key_names != self._key_names or other.granularity != self.granularity:
+            raise ValueError('cannot merge rollups with different dimensions or granularity')
+        other_columns = other._columns()
+        groups = [(self._group(key), other_group) for key, other_group in other._items()]
+        if self.vectorized:
+            import numpy
+            self._reserve(len(self._groups))
+            if groups:
+                self._totals[:, [group for group, _ in groups]] += \
+                    numpy.array(other_columns, dtype=numpy.int64)[:, [group for _, group in groups]]
+            self.entries += other.entries
+            return self
+        for metric, other_totals in enumerate(other_columns):
+            totals = self._totals[metric]
+            for group, other_group in groups:
+                totals[group] += other_totals[other_group]
+        self.entries += other.entries
+        return self
+
+    def __len__(self):
+        return len(self._groups)
+
+    def totals(self):
+        """Returns the totals over all the groups.
+        :returns dict: metric: total
+        """
+        return dict((metric, sum(totals)) for metric, totals in zip(METRICS, self._columns()))
+
+    def rows(self):
+        """Returns the aggregates, sorted by dimensions and time.
+        :returns list: dict of the dimensions, time (epoch, if granularity) and metrics
+        """
+        rows = []
+        columns = self._columns()
+        for key, group in sorted(self._items(), key=_sort_key):
+            row = dict(zip(self._key_names, key))
+            for metric, totals in zip(METRICS, columns):
+                row[metric] = totals[group]
+            rows.append(row)
+        return rows
+
+    def to_pandas(self):
+        """Returns the aggregates as a pandas DataFrame.
+        :returns pandas.DataFrame: the data frame, one column per dimension and metric
+        :throws ImportError: if pandas is not installed
+        """
+        import pandas
+        return pandas.DataFrame(self.rows(), columns=list(self._key_names + METRICS))
+
+    def __repr__(self):
+        return '<UsageRollup: %s granularity=%s groups=%d entries=%d>' % (','.join(self.dimensions),
+                                                                          self.granularity,
+                                                                          len(self._groups),
+                                                                          self.entries)
+
+
+_get_counters = operator.itemgetter(*METRICS)
+
+_get_category = operator.itemgetter('category')
+
+_get_categories = operator.itemgetter('categories')
+
+_get_epoch = operator.itemgetter('epoch')
+
+
+def _codes(codes, keys, values=None):
+    """Returns the codes of the keys, the new keys are added to the codes (key: code, in
+    order of appearance) and to the values (code: key).
+    :returns numpy.ndarray: the codes
+    """
+    import numpy
+    count = len(codes)
+    # a new key is set to count + its first position (C iteration), then renumbered
+    result = numpy.fromiter(map(codes.setdefault, keys, itertools.count(count)),
+                            dtype=numpy.int64, count=len(keys))
+    new = result >= count
+    if new.any():
+        positions, renumbered = numpy.unique(result[new] - count, return_inverse=True)
+        result[new] = renumbered + count
+        new_keys = list(map(keys.__getitem__, positions.tolist()))
+        codes.update(zip(new_keys, range(count, count + len(new_keys))))
+        if values is not None:
+            values.extend(new_keys)
+    return result
+
+
+def _tuple_getter(keys):
+    """Returns a function returning the tuple of the values of the keys of a dict."""
+    if not keys:
+        return lambda entry: ()
+    if len(keys) == 1:
+        # itemgetter of one key does not return a tuple
+        key = keys[0]
+        return lambda entry: (entry[key],)
+    return operator.itemgetter(*keys)
+
+
+def _sort_key(item):
+    # None (i.e. missing owner) sorts first
+    return tuple((value is not None, value) for value in item[0])
@@ -0,0 +1,189 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Standalone AWS2 and AWS4 (S3 variant) request signers, without boto."""
+
+import base64
+import collections
+import datetime
+import email.utils
+import hashlib
+import hmac
+import threading
+
+from urllib.parse import quote, unquote, parse_qsl
+
+EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+
+# S3 sub-resources included in the AWS2 string to sign
+# see boto.utils.qsa_of_interest
+_S3_SUBRESOURCES = frozenset(['acl', 'cors', 'defaultObjectAcl', 'location', 'logging',
+                              'partNumber', 'policy', 'requestPayment', 'torrent',
+                              'versioning', 'versionId', 'versions', 'website',
+                              'uploads', 'uploadId', 'response-content-type',
+                              'response-content-language', 'response-expires',
+                              'response-cache-control', 'response-content-disposition',
+                              'response-content-encoding', 'delete', 'lifecycle',
+                              'tagging', 'restore', 'storageClass', 'websiteConfig',
+                              'compose'])
+
+
+class SigningKeyCache(object):
+    """Thread-safe LRU cache of the derived AWS4 signing keys.
+
+    The signing key only depends on the secret key, the day, the region and
+    the service, so it is derived once per day instead of once per request.
+    The least recently used keys (i.e. of the previous days) are evicted.
+    """
+
+    def __init__(self, maxsize=256):
+        """Constructor.
+        :param int maxsize: maximum number of signing keys. Default: 256
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be >= 1: %r' % maxsize)
+        self.maxsize = maxsize
+        self._keys = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, secret_key, datestamp, region_name, service_name):
+        """Returns the AWS4 signing key.
+        :param str secret_key: the secret key
+        :param str datestamp: the day (YYYYMMDD)
+        :param str region_name: the region
+        :param str service_name: the service
+        :returns bytes: the signing key
+        """
+        cache_key = (secret_key, datestamp, region_name, service_name)
+        with self._lock:
+            signing_key = self._keys.get(cache_key)
+            if signing_key is not None:
+                self._keys.move_to_end(cache_key)
+                return signing_key
+        signing_key = derive_signing_key(secret_key, datestamp, region_name, service_name)
+        with self._lock:
+            self._keys[cache_key] = signing_key
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+        return signing_key
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def derive_signing_key(secret_key, datestamp, region_name, service_name):
+    """Derives the AWS4 signing key.
+    :see: http://docs.aws.amazon.com/general/latest/gr/signature-v4-examples.html
+    """
+    k_date = _hmac_sha256(('AWS4' + secret_key).encode('utf-8'), datestamp)
+    k_region = _hmac_sha256(k_date, region_name)
+    k_service = _hmac_sha256(k_region, service_name)
+    return _hmac_sha256(k_service, 'aws4_request')
+
+
+def _hmac_sha256(key, msg):
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+class S3SignerV4(object):
+    """AWS4 (S3 variant) request signer."""
+
+    def __init__(self, access_key, secret_key, region_name='s3', service_name='s3',
+                 security_token=None, key_cache=None):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region_name = region_name
+        self.service_name = service_name
+        self.security_token = security_token
+        self._key_cache = key_cache if key_cache is not None else SigningKeyCache()
+
+    def sign(self, method, host_header, path, headers, body=b'', now=None):
+        """Adds the AWS4 authentication headers to headers.
+        :param str method: the HTTP method
+        :param str host_header: the Host header value
+        :param str path: the URL encoded path, with query
+        :param dict headers: the request headers, updated
+        :param bytes body: the request body
+        """
+        now = now or datetime.datetime.utcnow()
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        datestamp = amz_date[:8]
+        payload_hash = hashlib.sha256(body).hexdigest() if body else EMPTY_SHA256
+        headers['X-Amz-Date'] = amz_date
+        headers['x-amz-content-sha256'] = payload_hash
+        if self.security_token:
+            headers['X-Amz-Security-Token'] = self.security_token
+
+        uri, _, query = path.partition('?')
+        canonical_uri = quote(unquote(uri), safe='/~')
+        canonical_query = '&'.join(sorted('%s=%s' % (quote(key, safe='-_.~'), quote(value, safe='-_.~'))
+                                          for key, value in parse_qsl(query, keep_blank_values=True)))
+        signed = {'host': host_header}
+        for name, value in headers.items():
+            lname = name.lower()
+            if lname != 'authorization':
+                signed[lname] = ' '.join(str(value).strip().split())
+        signed_names = sorted(signed)
+        canonical_headers = ''.join('%s:%s\n' % (name, signed[name]) for name in signed_names)
+        signed_headers = ';'.join(signed_names)
+        canonical_request = '\n'.join([method.upper(), canonical_uri, canonical_query,
+                                       canonical_headers, signed_headers, payload_hash])
+
+        scope = '%s/%s/%s/aws4_request' % (datestamp, self.region_name, self.service_name)
+        string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope,
+                                    hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()])
+        signing_key = self._key_cache.get(self.secret_key, datestamp,
+                                          self.region_name, self.service_name)
+        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        headers['Authorization'] = 'AWS4-HMAC-SHA256 Credential=%s/%s,SignedHeaders=%s,Signature=%s' % (
+            self.access_key, scope, signed_headers, signature)
+        return headers
+
+
+class S3SignerV2(object):
+    """AWS2 (S3 HMAC-SHA1) request signer."""
+
+    def __init__(self, access_key, secret_key, security_token=None):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.security_token = security_token
+
+    def sign(self, method, host_header, path, headers, body=b'', now=None):
+        """Adds the AWS2 authentication headers to headers.
+        :see: radosgw.signer.S3SignerV4#sign
+        """
+        if 'Date' not in headers:
+            headers['Date'] = email.utils.formatdate(usegmt=True)
+        if self.security_token:
+            headers['x-amz-security-token'] = self.security_token
+        lheaders = dict((name.lower(), str(value).strip()) for name, value in headers.items())
+        amz_headers = ''.join('%s:%s\n' % (name, lheaders[name])
+                              for name in sorted(lheaders) if name.startswith('x-amz-'))
+        uri, _, query = path.partition('?')
+        subresources = sorted((key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+                              if key in _S3_SUBRESOURCES)
+        resource = uri
+        if subresources:
+            resource += '?' + '&'.join(key + ('=' + value if value else '') for key, value in subresources)
+        string_to_sign = '\n'.join([method.upper(), lheaders.get('content-md5', ''),
+                                    lheaders.get('content-type', ''), lheaders['date'],
+                                    amz_headers + resource])
+        digest = hmac.new(self.secret_key.encode('utf-8'), string_to_sign.encode('utf-8'),
+                          hashlib.sha1).digest()
+        headers['Authorization'] = 'AWS %s:%s' % (self.access_key,
+                                                  base64.b64encode(digest).decode('utf-8'))
+        return headers
@@ -0,0 +1,276 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Local SQLite store of the users and buckets inventory.
+
+The users and buckets JSON objects are stored with indexes on the uid,
+tenant, email, access key, bucket owner and bucket id, so that the lookups
+are answered locally instead of scanning the cluster:
+
+  store = InventoryStore('inventory.db', rgwadmin)
+  store.refresh(concurrency=8)
+  user = store.user_by_access_key('AKIAEXAMPLE')
+  buckets = store.buckets(owner=user.uid)
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from radosgw.user import UserInfo
+from radosgw.bucket import BucketInfo
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    uid TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    email TEXT,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_tenant ON users (tenant);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+CREATE TABLE IF NOT EXISTS access_keys (
+    access_key TEXT PRIMARY KEY,
+    uid TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS access_keys_uid ON access_keys (uid);
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    id TEXT,
+    owner TEXT,
+    tenant TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buckets_owner ON buckets (owner);
+CREATE INDEX IF NOT EXISTS buckets_id ON buckets (id);
+"""
+
+
+class InventoryStore(object):
+    """Thread-safe local store of the users and buckets.
+
+    The query methods return radosgw.user.UserInfo and radosgw.bucket.BucketInfo
+    bound to the rgwadmin connection (i.e. user.delete() works if set).
+    """
+
+    def __init__(self, path=':memory:', rgwadmin=None, timer=time.time):
+        """Constructor.
+        :param str path: the SQLite database file. Default: ':memory:'
+        :param radosgw.connection.RadosGWAdminConnection rgwadmin: the admin connection of the
+                                                                  refresh and of the returned
+                                                                  objects. Default: None
+        """
+        self.path = path
+        self.rgwadmin = rgwadmin
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        """Closes the database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # write
+
+    def put_users(self, users):
+        """Stores the users, replacing the stored ones with the same uid.
+        :param iterable users: radosgw.user.UserInfo or user JSON objects (dict)
+        :returns int: the number of users stored
+        """
+        now = self._timer()
+        user_rows = []
+        key_rows = []
+        for user in users:
+            user_dict = getattr(user, 'object', user)
+            uid = _uid(user_dict)
+            user_rows.append((uid, user_dict['user_id'], user_dict.get('tenant') or '',
+                              user_dict.get('email'), _dumps(user_dict), now))
+            for key in user_dict.get('keys') or []:
+                key_rows.append((key['access_key'], uid))
+        with self._lock, self._db:
+            self._db.executemany('DELETE FROM access_keys WHERE uid = ?',
+                                 [(row[0],) for row in user_rows])
+            self._db.executemany('INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?)', user_rows)
+            self._db.executemany('INSERT OR REPLACE INTO access_keys VALUES (?, ?)', key_rows)
+        return len(user_rows)
+
+    def put_buckets(self, buckets):
+        """Stores the buckets, replacing the stored ones with the same name.
+        :param iterable buckets: radosgw.bucket.BucketInfo or bucket JSON objects (dict)
+        :returns int: the number of buckets stored
+        """
+        now = self._timer()
+        rows = []
+        for bucket in buckets:
+            bucket_dict = getattr(bucket, 'object', bucket)
+            rows.append((bucket_dict['bucket'], bucket_dict.get('id'), bucket_dict.get('owner'),
+                         bucket_dict.get('tenant') or '', _dumps(bucket_dict), now))
+        with self._lock, self._db:
+            self._db.executemany('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def remove_users(self, uids):
+        """Removes the users, and their access keys."""
+        rows = [(uid,) for uid in uids]
+        with self._lock, self._db:
+            self._db.executemany('DELETE FROM access_keys WHERE uid = ?', rows)
+            self._db.executemany('DELETE FROM users WHERE uid = ?', rows)
+
+    def remove_buckets(self, bucket_names):
+        """Removes the buckets."""
+        with self._lock, self._db:
+            self._db.executemany('DELETE FROM buckets WHERE name = ?',
+                                 [(name,) for name in bucket_names])
+
+    def clear(self):
+        """Removes all the users and buckets."""
+        with self._lock, self._db:
+            for table in ('access_keys', 'users', 'buckets'):
+                self._db.execute('DELETE FROM %s' % table)
+
+    def refresh(self, stats=True, concurrency=None):
+        """Replaces the stored users and buckets with the ones of the radosgw.
+        :param bool stats: True to get the users stats. Default: True
+        :param int concurrency: number of users fetched in parallel. Default: sequential
+        :returns tuple: the number of users and buckets stored
+        """
+        started = self._timer()
+        users = self.put_users(self.rgwadmin.get_users(concurrency=concurrency, ordered=False,
+                                                       stats=stats))
+        buckets = self.put_buckets(self.rgwadmin.get_buckets(stream=True))
+        # the ones not updated by this refresh were removed
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM access_keys WHERE uid IN '
+                             '(SELECT uid FROM users WHERE updated < ?)', (started,))
+            self._db.execute('DELETE FROM users WHERE updated < ?', (started,))
+            self._db.execute('DELETE FROM buckets WHERE updated < ?', (started,))
+        return users, buckets
+
+    def apply(self, result):
+        """Applies the diff of an incremental sync.
+        :param radosgw.sync.SyncResult result: the sync result
+        """
+        self.put_users(result.users.added + result.users.changed)
+        self.remove_users(result.users.removed)
+        self.put_buckets(result.buckets.added + result.buckets.changed)
+        self.remove_buckets(result.buckets.removed)
+
+    # query
+
+    def user(self, uid):
+        """Returns the user, or None.
+        :param str uid: the user uid (tenant$user_id for a tenant user)
+        """
+        users = self._users('SELECT data FROM users WHERE uid = ?', (uid,))
+        return users[0] if users else None
+
+    def user_by_access_key(self, access_key):
+        """Returns the user owning the S3 access key, or None."""
+        users = self._users('SELECT users.data FROM access_keys JOIN users USING (uid) '
+                            'WHERE access_keys.access_key = ?', (access_key,))
+        return users[0] if users else None
+
+    def users(self, tenant=None, email=None):
+        """Returns the users, filtered by tenant and/or email.
+        :param str tenant: the tenant, '' for the users without tenant
+        :param str email: the email
+        :returns list: the users, by uid
+        """
+        where, params = _where((('tenant', tenant), ('email', email)))
+        return self._users('SELECT data FROM users%s ORDER BY uid' % where, params)
+
+    def uids(self, tenant=None):
+        """Returns the uids, filtered by tenant."""
+        where, params = _where((('tenant', tenant),))
+        with self._lock:
+            return [row[0] for row in self._db.execute('SELECT uid FROM users%s ORDER BY uid' % where,
+                                                       params)]
+
+    def bucket(self, bucket_name):
+        """Returns the bucket, or None."""
+        buckets = self._buckets('SELECT data FROM buckets WHERE name = ?', (bucket_name,))
+        return buckets[0] if buckets else None
+
+    def bucket_by_id(self, bucket_id):
+        """Returns the bucket with the bucket id, or None."""
+        buckets = self._buckets('SELECT data FROM buckets WHERE id = ?', (bucket_id,))
+        return buckets[0] if buckets else None
+
+    def buckets(self, owner=None, tenant=None):
+        """Returns the buckets, filtered by owner and/or tenant.
+        :param str owner: the owner uid
+        :param str tenant: the tenant, '' for the buckets without tenant
+        :returns list: the buckets, by name
+        """
+        where, params = _where((('owner', owner), ('tenant', tenant)))
+        return self._buckets('SELECT data FROM buckets%s ORDER BY name' % where, params)
+
+    def count_users(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+    def count_buckets(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM buckets').fetchone()[0]
+
+    def _users(self, sql, params):
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [UserInfo(self.rgwadmin, json.loads(row[0])) for row in rows]
+
+    def _buckets(self, sql, params):
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [BucketInfo(self.rgwadmin, json.loads(row[0])) for row in rows]
+
+    def __repr__(self):
+        return '<InventoryStore: %s>' % self.path
+
+
+def _uid(user_dict):
+    """Returns the uid of a user JSON object (tenant$user_id for a tenant user)."""
+    if user_dict.get('tenant'):
+        return '%s$%s' % (user_dict['tenant'], user_dict['user_id'])
+    return user_dict['user_id']
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def _where(filters):
+    """Returns the WHERE clause and parameters of the (column, value) filters, None values ignored."""
+    columns = [column for column, value in filters if value is not None]
+    if not columns:
+        return '', ()
+    return (' WHERE ' + ' AND '.join('%s = ?' % column for column in columns),
+            tuple(value for column, value in filters if value is not None))
@@ -0,0 +1,77 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Incremental JSON parsing of HTTP response bodies."""
+
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(response, chunk_size=65536):
+    """Parses a JSON array from a response, element by element, while reading it.
+
+    Only the current element, and the unparsed part of the last chunk read,
+    are kept in memory.
+
+    :param response: file like object with a read(amt) method returning bytes
+    :param int chunk_size: size of the chunks read from the response
+    :returns iterator: iterator of the decoded array elements
+    :throws ValueError: if the body is not a JSON array
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # skip whitespaces and separators
+        while pos < len(buf) and (buf[pos] in _WHITESPACE or (started and buf[pos] == ',')):
+            pos += 1
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError('JSON array expected at char %d: %r' % (pos, buf[pos:pos + 20]))
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                element, end = None, None
+                if eof:
+                    raise
+            # a value ending at the end of the buffer could be truncated (number)
+            if end is not None and (end < len(buf) or eof):
+                yield element
+                pos = end
+                continue
+        elif eof:
+            raise ValueError('Unterminated JSON array')
+        # need more data
+        chunk = response.read(chunk_size)
+        if not chunk:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b'', final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
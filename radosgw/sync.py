@@ -0,0 +1,242 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Incremental sync of the users and buckets inventory.
+
+The first sync fetches all the users and buckets, the next ones only the
+changed entities:
+
+* the buckets listing (one streamed request) gives the version of each
+  bucket (ver, master_ver, mtime and owner), the changed buckets are the
+  ones with a new version,
+* the uids listing (paged metadata requests) gives the added and removed
+  users,
+* only the added users, the owners of the added, changed or removed buckets
+  (their stats changed) and the users not fetched for max_age seconds are
+  fetched again.
+
+The user attributes (display name, keys, caps, ...) have no version in the
+listings, their changes are seen when the user is fetched again: use max_age
+to bound their staleness.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import boto
+
+import radosgw.exception
+import radosgw.executor
+
+STATE_VERSION = 1
+
+
+class Diff(object):
+    """Added, changed and removed entities of a sync."""
+
+    __slots__ = ('added', 'changed', 'removed')
+
+    def __init__(self):
+        """INTERNAL ONLY."""
+        self.added = []
+        self.changed = []
+        self.removed = []
+
+    def __len__(self):
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    def __repr__(self):
+        return '<Diff: added={} changed={} removed={}>'.format(len(self.added),
+                                                               len(self.changed),
+                                                               len(self.removed))
+
+
+class SyncResult(object):
+    """Result of a sync.
+
+    users.added and users.changed are radosgw.user.UserInfo, buckets.added and
+    buckets.changed are radosgw.bucket.BucketInfo, the removed are the uids and
+    bucket names.
+    """
+
+    __slots__ = ('users', 'buckets', 'fetched_users', 'seconds')
+
+    def __init__(self):
+        """INTERNAL ONLY."""
+        self.users = Diff()
+        self.buckets = Diff()
+        self.fetched_users = 0
+        self.seconds = 0.0
+
+    def __len__(self):
+        return len(self.users) + len(self.buckets)
+
+    def __repr__(self):
+        return '<SyncResult: users=%r buckets=%r fetched_users=%d>' % (self.users, self.buckets,
+                                                                       self.fetched_users)
+
+
+class InventorySync(object):
+    """Incremental sync of the users and buckets inventory of a radosgw.
+
+    The state (last seen version per bucket, last fetch time and digest per
+    user) is JSON serializable, see save and load.
+    """
+
+    def __init__(self, rgwadmin, state=None, stats=True, concurrency=None, max_age=None,
+                 timer=time.time):
+        """Constructor.
+        :param radosgw.connection.RadosGWAdminConnection rgwadmin: the admin connection
+        :param dict state: the state of the previous sync. Default: None (full sync)
+        :param bool stats: True to get the users stats. Default: True
+        :param int concurrency: number of users fetched in parallel. Default: sequential
+        :param float max_age: fetch again the users not fetched for max_age seconds.
+                              Default: None (only the users with changed buckets)
+        """
+        self.rgwadmin = rgwadmin
+        self.stats = stats
+        self.concurrency = concurrency
+        self.max_age = max_age
+        self._timer = timer
+        self._users = {}
+        self._buckets = {}
+        if state is not None:
+            if state.get('version') != STATE_VERSION:
+                raise ValueError('unsupported sync state version: %r' % state.get('version'))
+            self._users = dict(state['users'])
+            self._buckets = dict(state['buckets'])
+
+    @property
+    def state(self):
+        """The sync state, JSON serializable."""
+        return {'version': STATE_VERSION, 'users': self._users, 'buckets': self._buckets}
+
+    def save(self, path):
+        """Saves the sync state to a JSON file (atomically replaced)."""
+        tmp_path = '%s.tmp' % path
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, rgwadmin, path, **kwargs):
+        """Returns a sync with the state saved in a JSON file, or a full sync
+        if the file does not exist.
+        :param kwargs: additional constructor arguments
+        """
+        state = None
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+        return cls(rgwadmin, state, **kwargs)
+
+    def sync(self):
+        """Syncs the inventory, and updates the state. The state is only updated if
+        the sync completes, so that a failed sync is entirely done again.
+        :returns radosgw.sync.SyncResult: the added, changed and removed users and buckets
+        """
+        start = self._timer()
+        result = SyncResult()
+        buckets, dirty_uids = self._sync_buckets(result.buckets)
+        users = dict(self._users)
+        uids = set(self.rgwadmin.iter_uids())
+        for uid in list(users):
+            if uid not in uids:
+                del users[uid]
+                result.users.removed.append(uid)
+        to_fetch = []
+        for uid in uids:
+            entry = users.get(uid)
+            if entry is None or (self.stats and uid in dirty_uids) or \
+                    (self.max_age is not None and start - entry[0] >= self.max_age):
+                to_fetch.append(uid)
+        boto.log.debug('sync: %d users to fetch' % len(to_fetch))
+        for uid, user in self._fetch_users(to_fetch):
+            result.fetched_users += 1
+            if user is None:
+                # removed since the uids listing
+                if users.pop(uid, None) is not None:
+                    result.users.removed.append(uid)
+                continue
+            digest = _digest(user.object)
+            entry = users.get(uid)
+            users[uid] = [start, digest]
+            if entry is None:
+                result.users.added.append(user)
+            elif entry[1] != digest:
+                result.users.changed.append(user)
+        # the dirty users are fetched, commit the new state
+        self._users = users
+        self._buckets = buckets
+        result.seconds = self._timer() - start
+        return result
+
+    def _sync_buckets(self, diff):
+        """Syncs the buckets, and returns the new buckets state and the uids of the owners of
+        the updated buckets."""
+        buckets = {}
+        dirty_uids = set()
+        for bucket in self.rgwadmin.get_buckets(stream=True):
+            name = bucket.name
+            version = _bucket_version(bucket)
+            buckets[name] = version
+            previous = self._buckets.get(name)
+            if previous == version:
+                continue
+            dirty_uids.add(version[0])
+            if previous is None:
+                diff.added.append(bucket)
+            else:
+                # i.e. unlinked from the previous owner
+                dirty_uids.add(previous[0])
+                diff.changed.append(bucket)
+        for name, previous in self._buckets.items():
+            if name not in buckets:
+                dirty_uids.add(previous[0])
+                diff.removed.append(name)
+        return buckets, dirty_uids
+
+    def _fetch_users(self, uids):
+        """Returns an iterator of (uid, user), user is None if it does not exist anymore."""
+        def get_user(uid):
+            try:
+                if self.stats:
+                    try:  # Valid user without stats return 404 error
+                        return uid, self.rgwadmin.get_user(uid, stats=True)
+                    except radosgw.exception.NoSuchKey:
+                        pass
+                return uid, self.rgwadmin.get_user(uid)
+            except radosgw.exception.NoSuchUser:
+                return uid, None
+
+        if self.concurrency:
+            return radosgw.executor.bounded_map(get_user, uids, self.concurrency, ordered=False)
+        return (get_user(uid) for uid in uids)
+
+    def __repr__(self):
+        return '<InventorySync: %d users, %d buckets>' % (len(self._users), len(self._buckets))
+
+
+def _bucket_version(bucket):
+    """Returns the version of a bucket: [owner, ver, master_ver, mtime]."""
+    return [getattr(bucket, name, None) for name in ('owner', 'ver', 'master_ver', 'mtime')]
+
+
+def _digest(user_dict):
+    return hashlib.sha1(json.dumps(user_dict, sort_keys=True).encode('utf-8')).hexdigest()
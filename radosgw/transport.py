@@ -0,0 +1,280 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""HTTP transports for the admin connection.
+
+The transport sends the admin requests below
+radosgw.connection.RadosGWAdminConnection#make_request. The default
+transport is boto (radosgw.bototransport), the HTTPTransport is a lean
+backend on http.client, without boto, with a bounded keep-alive connection
+pool per host and the standalone radosgw.signer signers.
+"""
+
+import collections
+import logging
+import socket
+import ssl
+import threading
+
+import http.client as http_client
+from urllib.parse import urlencode
+
+# radosgw.exception (and boto) imported on first use
+import radosgw.signer
+
+log = logging.getLogger('radosgw.transport')
+
+
+class Transport(object):
+    """Transport interface."""
+
+    def request(self, method, path, query_params=None, headers=None, data='', host=None):
+        """Sends a signed request.
+        :param str method: GET|PUT|HEAD|POST|DELETE|...
+        :param str path: the full request path (i.e. /admin/user?key)
+        :param dict query_params: url query parameters
+        :param dict headers: additional headers
+        :param str data: the request body
+        :param str host: the host, None for the default one
+        :returns: the HTTP response (status, reason, getheader(name) and read(amt=None))
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """Closes the pooled connections."""
+
+
+class HTTPResponse(object):
+    """HTTP response of the HTTPTransport.
+
+    Like boto.connection.HTTPResponse, the body read without amt is cached.
+    The connection returns to the pool once the body is completely read, the
+    response closed before is closed with its connection.
+    """
+
+    def __init__(self, response, release):
+        """INTERNAL ONLY."""
+        self._response = response
+        self._release = release
+        self._body = None
+        self.status = response.status
+        self.reason = response.reason
+
+    def getheader(self, name, default=None):
+        return self._response.getheader(name, default)
+
+    def getheaders(self):
+        return self._response.getheaders()
+
+    def read(self, amt=None):
+        if amt is None and self._body is not None:
+            return self._body
+        try:
+            data = self._response.read(amt)
+        except Exception:
+            self.close()
+            raise
+        if amt is None:
+            self._body = data
+            self._done(self._response.will_close)
+        elif not data or self._response.isclosed():
+            self._done(self._response.will_close)
+        return data
+
+    def close(self):
+        # the unread body would be read by the next request of the keep-alive connection
+        self._response.close()
+        self._done(True)
+
+    def _done(self, will_close):
+        if self._release is not None:
+            self._release(will_close)
+            self._release = None
+
+
+class _HostPool(object):
+    """Idle keep-alive connections to one host, and its request slots."""
+
+    def __init__(self, factory, maxsize, max_connections=None, block_timeout=None):
+        self._factory = factory
+        self._maxsize = maxsize
+        self._idle = collections.deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections) if max_connections else None
+        self._block_timeout = block_timeout
+
+    def acquire(self, host):
+        """Reserves one of the max_connections request slots, if bounded.
+        :returns callable: releases the slot (once)
+        :throws radosgw.exception.PoolTimeout: if no slot is free after block_timeout
+        """
+        slots = self._slots
+        if slots is None:
+            return lambda: None
+        if not slots.acquire(timeout=self._block_timeout):
+            raise radosgw.exception.PoolTimeout('no free connection to %s after %ss'
+                                                % (host, self._block_timeout))
+        released = []
+
+        def release():
+            if not released:
+                released.append(True)
+                slots.release()
+        return release
+
+    def get(self):
+        """Returns (connection, reused)."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._factory(), False
+
+    def put(self, conn):
+        with self._lock:
+            if len(self._idle) < self._maxsize:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+class HTTPTransport(Transport):
+    """Lean HTTP/1.1 transport with keep-alive connection pools.
+
+    Thread-safe: one transport can be shared by many threads.
+    """
+
+    def __init__(self, host, access_key, secret_key,
+                 port=None, is_secure=True,
+                 aws_signature='AWS4',
+                 timeout=30,
+                 validate_certs=True,
+                 security_token=None,
+                 pool_size=10,
+                 max_connections=None,
+                 pool_block_timeout=None):
+        """Constructor.
+        :param int pool_size: maximum number of idle keep-alive connections per host. Default: 10
+        :param int max_connections: maximum number of concurrent requests per host, the other
+                                    threads wait for a free slot. Default: None (unbounded)
+        :param float pool_block_timeout: maximum time to wait for a free slot. Default: None
+                                         (wait forever)
+        """
+        if max_connections is not None and max_connections < 1:
+            raise ValueError('max_connections must be >= 1: %r' % max_connections)
+        self.host = host
+        self.is_secure = is_secure
+        self.port = port or (443 if is_secure else 80)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_connections = max_connections
+        self.pool_block_timeout = pool_block_timeout
+        if aws_signature == 'AWS4':
+            self.signer = radosgw.signer.S3SignerV4(access_key, secret_key,
+                                                    security_token=security_token)
+        else:
+            self.signer = radosgw.signer.S3SignerV2(access_key, secret_key,
+                                                    security_token=security_token)
+        self._ssl_context = None
+        if is_secure:
+            self._ssl_context = ssl.create_default_context()
+            if not validate_certs:
+                self._ssl_context.check_hostname = False
+                self._ssl_context.verify_mode = ssl.CERT_NONE
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<%s:%s:%d>' % (self.__class__.__name__, self.host, self.port)
+
+    def _pool(self, host):
+        with self._lock:
+            pool = self._pools.get(host)
+            if pool is None:
+                pool = _HostPool(lambda: self._new_connection(host), self.pool_size,
+                                 self.max_connections, self.pool_block_timeout)
+                self._pools[host] = pool
+            return pool
+
+    def _new_connection(self, host):
+        if self.is_secure:
+            return http_client.HTTPSConnection(host, self.port, timeout=self.timeout,
+                                               context=self._ssl_context)
+        return http_client.HTTPConnection(host, self.port, timeout=self.timeout)
+
+    def _host_header(self, host):
+        if self.port == (443 if self.is_secure else 80):
+            return host
+        return '%s:%d' % (host, self.port)
+
+    def request(self, method, path, query_params=None, headers=None, data='', host=None):
+        """Sends a signed request.
+        :see: radosgw.transport.Transport#request
+        """
+        host = host or self.host
+        if query_params:
+            # handle path like /admin/bucket?index&<params>
+            path = "{}{}{}".format(path, '&' if '?' in path else '?', urlencode(query_params))
+        body = data or b''
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        request_headers = dict(headers or {})
+        host_header = self._host_header(host)
+        self.signer.sign(method, host_header, path, request_headers, body)
+        request_headers['Host'] = host_header
+        request_headers['Content-Length'] = str(len(body))
+
+        pool = self._pool(host)
+        release_slot = pool.acquire(host)
+        try:
+            conn, reused = pool.get()
+            while True:
+                try:
+                    conn.request(method, path, body, request_headers)
+                    response = conn.getresponse()
+                    break
+                except (http_client.HTTPException, socket.error) as e:
+                    conn.close()
+                    if not reused:
+                        raise
+                    # the server closed the idle keep-alive connection, retry with a new one
+                    log.debug('reused connection to %s failed: %r, reconnecting' % (host, e))
+                    conn, reused = pool._factory(), False
+        except BaseException:
+            release_slot()
+            raise
+
+        def release(will_close):
+            if will_close:
+                conn.close()
+            else:
+                pool.put(conn)
+            release_slot()
+
+        return HTTPResponse(response, release)
+
+    def close(self):
+        """Closes the pooled connections."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
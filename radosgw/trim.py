@@ -0,0 +1,155 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+"""Chunked and resumable usage log trimming.
+
+The time range is split in small time windows, optionally per uid, trimmed
+with one delete_usage request each, concurrently and paced. The progress is
+checkpointed in a JSON file: per uid, the end of the windows trimmed without
+gap, so an interrupted trim resumes there (trimming a window again is
+harmless).
+"""
+
+import json
+import os
+
+import boto
+
+import radosgw.bulk
+import radosgw.executor
+import radosgw.ratelimit
+import radosgw.utils
+
+# checkpoint key of the trims of all the users
+ALL_USERS = '*'
+
+
+class TrimSummary(object):
+    """Summary of a usage trim."""
+
+    def __init__(self):
+        """INTERNAL ONLY."""
+        self.trimmed = 0
+        self.skipped = 0
+        self.failed = []
+
+    @property
+    def total(self):
+        """Number of windows processed."""
+        return self.trimmed + self.skipped + len(self.failed)
+
+    def __repr__(self):
+        return '<TrimSummary: trimmed={} skipped={} failed={}>'.format(self.trimmed, self.skipped,
+                                                                       len(self.failed))
+
+
+class Checkpoint(object):
+    """Trim progress: per uid, the end of the windows trimmed without gap.
+
+    Saved (atomically replaced) after each trimmed window, if a path is set.
+    """
+
+    def __init__(self, path=None, start=None, end=None):
+        """Constructor.
+        :param str path: the JSON file. Default: None (not saved)
+        :param int start: the trimmed range start epoch
+        :param int end: the trimmed range end epoch
+        """
+        self.path = path
+        self.start = start
+        self.end = end
+        self.trimmed = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if (state['start'], state['end']) == (start, end):
+                self.trimmed = state['trimmed']
+            else:
+                boto.log.warning('checkpoint %s of another range, ignored' % path)
+
+    def trimmed_until(self, uid):
+        """Returns the end of the windows trimmed without gap for the uid, or the range start."""
+        return self.trimmed.get(uid or ALL_USERS, self.start)
+
+    def update(self, uid, end):
+        self.trimmed[uid or ALL_USERS] = end
+        if self.path:
+            tmp_path = '%s.tmp' % self.path
+            with open(tmp_path, 'w') as f:
+                json.dump({'start': self.start, 'end': self.end, 'trimmed': self.trimmed}, f)
+            os.replace(tmp_path, self.path)
+
+
+def trim_usage(rgwadmin, start, end, window=86400, uids=None, concurrency=1, rate=None,
+               checkpoint=None, progress=None):
+    """Trims the usage log by time windows, concurrently.
+    :see: radosgw.connection.RadosGWAdminConnection#trim_usage
+    """
+    start = radosgw.utils.to_epoch(start)
+    end = radosgw.utils.to_epoch(end)
+    checkpoint = Checkpoint(checkpoint, start, end)
+    pacer = radosgw.ratelimit.TokenBucket(rate) if rate else None
+    summary = TrimSummary()
+    uid_list = list(uids) if uids is not None else [None]
+    # per uid: the windows to trim, in time order
+    pending = {}
+    windows = []
+    for uid in uid_list:
+        uid_windows = list(radosgw.utils.time_windows(start, end, window))
+        resume = checkpoint.trimmed_until(uid)
+        skipped = [w for w in uid_windows if w[1] <= resume]
+        summary.skipped += len(skipped)
+        uid_windows = uid_windows[len(skipped):]
+        pending[uid] = [w[0] for w in uid_windows]
+        windows.extend((uid, w[0], w[1]) for w in uid_windows)
+
+    def trim(task):
+        uid, window_start, window_end = task
+        if pacer:
+            pacer.acquire()
+        try:
+            rgwadmin.delete_usage(uid=uid,
+                                  start=radosgw.utils.format_time(window_start),
+                                  end=radosgw.utils.format_time(window_end))
+            return task, None
+        except radosgw.bulk.ITEM_ERRORS as e:
+            boto.log.debug('trim usage %s %d-%d failed: %s' % (uid, window_start, window_end, e))
+            return task, e
+
+    # per uid: the end of the trimmed windows, to advance the checkpoint without gap
+    trimmed_ends = dict((uid, {}) for uid in uid_list)
+    # time order per uid, the uids interleaved, so that the concurrent windows are spread
+    tasks = sorted(windows, key=lambda task: task[1])
+    for task, error in radosgw.executor.bounded_map(trim, tasks, concurrency, ordered=False):
+        uid, window_start, window_end = task
+        if error is not None:
+            # the checkpoint stays before the failed window
+            summary.failed.append((task, error))
+        else:
+            summary.trimmed += 1
+            trimmed_ends[uid][window_start] = window_end
+            # advance the checkpoint over the trimmed windows without gap
+            uid_pending = pending[uid]
+            advanced = False
+            while uid_pending and uid_pending[0] in trimmed_ends[uid]:
+                until = trimmed_ends[uid].pop(uid_pending.pop(0))
+                advanced = True
+            if advanced:
+                checkpoint.update(uid, until)
+        if progress:
+            progress(summary, task, error)
+    return summary
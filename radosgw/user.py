@@ -42,9 +42,23 @@
 #   ]
 # }
 
+import radosgw.utils
+
+# marker of the lazy attributes not yet built
+_UNSET = radosgw.utils.UNSET
+
 
 class UserInfo(object):
-    """RADOS Gateway User Info"""
+    """RADOS Gateway User Info
+
+    The keys, swift_keys, caps and stats are built from the user JSON object on
+    first access. The attributes can be assigned, as before (the instance
+    __dict__ is only allocated then).
+    """
+
+    __slots__ = ('_rgwadmin', '_object',
+                 'user_id', 'tenant', 'display_name', 'email', 'suspended', 'max_buckets',
+                 '_subusers', '_keys', '_swift_keys', '_caps', '_stats', '__dict__')
 
     def __init__(self, radosgw_admin, user_dict):
         """INTERNAL ONLY.
@@ -52,64 +66,114 @@ class UserInfo(object):
         :see: radosgw.connection.RadosGWAdminConnection#create_user
         """
         self._rgwadmin = radosgw_admin
-        self._object = user_dict
         self._update_from_user(user_dict)
 
     def _update_from_user(self, user):
         if type(user) is dict:
             user_dict = user
+        elif isinstance(user, UserInfo):
+            user_dict = user._object
         else:
             user_dict = user.__dict__
+        self._object = user_dict
         self.user_id = user_dict['user_id']
         self.tenant = user_dict.get('tenant')
         self.display_name = user_dict['display_name']
         self.email = user_dict['email']
         self.suspended = user_dict['suspended']
         self.max_buckets = user_dict['max_buckets']
-        # subusers
-        self.subusers = []
-        subusers = user_dict['subusers']
-        for subuser in subusers:
+        self._subusers = _UNSET
+        self._keys = _UNSET
+        self._swift_keys = _UNSET
+        self._caps = _UNSET
+        self._stats = _UNSET
+
+    @property
+    def subusers(self):
+        if self._subusers is _UNSET:
             # TODO
-            pass
-        # keys (s3)
-        self.keys = []
-        keys = user_dict['keys']
-        for key in keys:
-            if type(key) is dict:
-                key_dict = key
-            else:
-                key_dict = key.__dict__
-            s3key = Key(key_dict['user'],
-                        key_dict['access_key'], key_dict['secret_key'],
-                        's3')
-            self.keys.append(s3key)
-        # swift_keys
-        self.swift_keys = []
-        keys = user_dict['swift_keys']
-        for key in keys:
-            if type(key) is dict:
-                key_dict = key
-            else:
-                key_dict = key.__dict__
-            swiftkey = Key(key_dict['user'],
-                           None, key_dict['secret_key'],
-                           'swift')
-            self.swift_keys.append(swiftkey)
-        # caps
-        self.caps = []
-        caps = user_dict['caps']
-        for cap in caps:
-            if type(cap) is dict:
-                cap_dict = cap
+            self._subusers = []
+        return self._subusers
+
+    @subusers.setter
+    def subusers(self, value):
+        self._subusers = value
+
+    @property
+    def keys(self):
+        """The S3 keys."""
+        if self._keys is _UNSET:
+            self._keys = []
+            for key in self._object['keys']:
+                if type(key) is dict:
+                    key_dict = key
+                else:
+                    key_dict = key.__dict__
+                s3key = Key(key_dict['user'],
+                            key_dict['access_key'], key_dict['secret_key'],
+                            's3')
+                self._keys.append(s3key)
+        return self._keys
+
+    @keys.setter
+    def keys(self, value):
+        self._keys = value
+
+    @property
+    def swift_keys(self):
+        """The swift keys."""
+        if self._swift_keys is _UNSET:
+            self._swift_keys = []
+            for key in self._object['swift_keys']:
+                if type(key) is dict:
+                    key_dict = key
+                else:
+                    key_dict = key.__dict__
+                swiftkey = Key(key_dict['user'],
+                               None, key_dict['secret_key'],
+                               'swift')
+                self._swift_keys.append(swiftkey)
+        return self._swift_keys
+
+    @swift_keys.setter
+    def swift_keys(self, value):
+        self._swift_keys = value
+
+    @property
+    def caps(self):
+        """The user capabilities."""
+        if self._caps is _UNSET:
+            self._caps = []
+            for cap in self._object['caps']:
+                if type(cap) is dict:
+                    cap_dict = cap
+                else:
+                    cap_dict = cap.__dict__
+                ucap = Cap(cap_dict['type'], cap_dict['perm'])
+                self._caps.append(ucap)
+        return self._caps
+
+    @caps.setter
+    def caps(self, value):
+        self._caps = value
+
+    @property
+    def stats(self):
+        """The user stats, None if the user was not requested with stats."""
+        if self._stats is _UNSET:
+            if 'stats' in self._object:
+                self._stats = Stats(self._object['stats'])
             else:
-                cap_dict = cap.__dict__
-            ucap = Cap(cap_dict['type'], cap_dict['perm'])
-            self.caps.append(ucap)
-        if 'stats' in user_dict:
-            self.stats = Stats(user_dict['stats'])
-        else:
-            self.stats = None
+                self._stats = None
+        return self._stats
+
+    @stats.setter
+    def stats(self, value):
+        self._stats = value
+
+    @property
+    def object(self):
+        return self._object
 
     @property
     def id(self):
@@ -175,6 +239,9 @@ class UserInfo(object):
 
 class Key(object):
     """RADOS Gateway User key"""
+
+    __slots__ = ('user', 'access_key', 'secret_key', 'key_type', '__dict__')
+
     def __init__(self, user_id, access_key, secret_key, key_type='s3'):
         self.user = user_id
         self.access_key = access_key
@@ -187,6 +254,9 @@ class Key(object):
 
 class Cap(object):
     """RADOS Gateway User capability"""
+
+    __slots__ = ('type', 'perm', '__dict__')
+
     def __init__(self, cap_type, cap_perm):
         self.type = cap_type
         self.perm = cap_perm
@@ -196,11 +266,24 @@ class Cap(object):
 
 
 class Stats(object):
-    """RADOS Gateway User stats"""
+    """RADOS Gateway User stats
+
+    The attributes are the stats JSON object keys (lower cased), and can be
+    assigned.
+    """
+
+    __slots__ = ('_object', '__dict__')
+
     def __init__(self, stats_dict):
         self._object = stats_dict
-        for key in stats_dict:
-            setattr(self, key.lower(), stats_dict[key])
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return radosgw.utils.json_attr(self._object, name)
+
+    def __dir__(self):
+        return sorted(set(dir(type(self))) | set(key.lower() for key in self._object))
 
     def __repr__(self):
         return "<Usage: num_objects={} size={} size_actual={} size_kb={} " \
@@ -17,7 +17,25 @@
 
 """Utilities"""
 
+import calendar
 import os
+import time
+
+
+class _Unset(object):
+    """Marker of the lazy attributes not yet built, a singleton also when copied or unpickled."""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        # pickled by reference, copy and deepcopy return the singleton
+        return 'UNSET'
+
+    def __repr__(self):
+        return 'UNSET'
+
+
+UNSET = _Unset()
 
 
 def get_access_key(default=None):
@@ -40,3 +58,60 @@ def get_secret_key(default=None):
     else:
         secret_key = default
     return secret_key
+
+
+def json_attr(json_dict, name):
+    """Get the value of the JSON object key matching the attribute name (keys are lower cased)
+    :raises AttributeError: if the JSON object has no such key
+    """
+    if name in json_dict:
+        return json_dict[name]
+    for key in json_dict:
+        if key.lower() == name:
+            return json_dict[key]
+    raise AttributeError(name)
+
+
+def to_epoch(value):
+    """Get the epoch (seconds since 1970-01-01 UTC) of a time value
+    :param value: epoch (int or float), datetime (naive is UTC), 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' (UTC)
+    :returns int: the epoch
+    :raises ValueError: if the value is not a supported time
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    if hasattr(value, 'utctimetuple'):
+        return calendar.timegm(value.utctimetuple())
+    if isinstance(value, str):
+        if value.isdigit():
+            return int(value)
+        for time_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+            try:
+                return calendar.timegm(time.strptime(value, time_format))
+            except ValueError:
+                pass
+    raise ValueError('unsupported time: %r' % (value,))
+
+
+def format_time(epoch):
+    """Get the radosgw time parameter ('YYYY-MM-DD HH:MM:SS', UTC) of an epoch"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(epoch))
+
+
+def time_windows(start, end, window):
+    """Split a time range in windows, aligned on multiples of the window size
+    :param start: the range start, see to_epoch
+    :param end: the range end (excluded), see to_epoch
+    :param int window: the window size, in seconds (i.e. 3600 for the hourly usage log)
+    :returns iterator: iterator of (window start, window end) epochs, the first and last
+                       windows clipped to the range
+    """
+    if window <= 0:
+        raise ValueError('window must be positive: %r' % window)
+    start = to_epoch(start)
+    end = to_epoch(end)
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start - window_start % window + window, end)
+        yield window_start, window_end
+        window_start = window_end
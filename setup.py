@@ -15,12 +15,16 @@ setup(
     author='Valery Tschopp',
     author_email='valery.tschopp@gmail.com',
     include_package_data=True,
+    python_requires='>=3.7',
     requires=['boto'],
     install_requires=['boto'],
+    extras_require={
+        'async': ['aiohttp'],
+    },
     packages=['radosgw'],
     url='https://github.com/valerytschopp/python-radosgw-admin',
     license='GPLv3',
     description='Ceph RADOS Gateway (rgw) admin operations REST API',
     long_description=open('README.rst').read(),
-    #test_suite='tests'
+    test_suite='tests',
 )
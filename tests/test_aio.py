@@ -0,0 +1,75 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.aio
+import radosgw.exception
+from radosgw.fakeserver import FakeRadosGW
+
+
+@unittest.skipIf(radosgw.aio.aiohttp is None, 'requires the aiohttp package')
+class AsyncConnectionTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=5, buckets_per_user=2).start()
+        self.addCleanup(self.fake.stop)
+
+    async def asyncSetUp(self):
+        self.rgwadmin = radosgw.aio.AsyncRadosGWAdminConnection(self.fake.host, 'FAKEACCESSKEY',
+                                                                'FAKESECRETKEY',
+                                                                port=self.fake.port,
+                                                                is_secure=False,
+                                                                admin_path=self.fake.admin_path)
+
+    async def asyncTearDown(self):
+        await self.rgwadmin.close()
+
+    async def test_get_user(self):
+        user = await self.rgwadmin.get_user('user000003')
+        self.assertEqual(user.uid, 'user000003')
+
+    async def test_get_users(self):
+        uids = [user.uid async for user in self.rgwadmin.get_users()]
+        self.assertEqual(uids, ['user%06d' % i for i in range(5)])
+
+    async def test_get_users_concurrent(self):
+        uids = [user.uid async for user in self.rgwadmin.get_users(concurrency=3, ordered=False)]
+        self.assertEqual(sorted(uids), ['user%06d' % i for i in range(5)])
+
+    async def test_get_buckets(self):
+        buckets = [bucket async for bucket in self.rgwadmin.get_buckets(uid='user000001')]
+        self.assertEqual(sorted(bucket.name for bucket in buckets),
+                         ['user000001-bucket0000', 'user000001-bucket0001'])
+
+    async def test_create_update_delete_user(self):
+        await self.rgwadmin.create_user('carol', 'Carol')
+        user = await self.rgwadmin.update_user('carol', display_name='Carol C.')
+        self.assertEqual(user.display_name, 'Carol C.')
+        self.assertTrue(await self.rgwadmin.delete_user('carol'))
+        with self.assertRaises(radosgw.exception.NoSuchUser):
+            await self.rgwadmin.get_user('carol')
+
+    async def test_error(self):
+        self.fake.inject_error(503, 'ServiceUnavailable')
+        with self.assertRaises(radosgw.exception.RadosGWAdminError) as cm:
+            await self.rgwadmin.get_user('user000000')
+        self.assertEqual(cm.exception.status, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.exception
+import radosgw.retry
+from radosgw.balancer import Balancer
+from radosgw.fakeserver import FakeRadosGW
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BalancerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_least_outstanding(self):
+        balancer = Balancer(['a', 'b'], timer=self.clock)
+        first = balancer.acquire()
+        second = balancer.acquire()
+        self.assertEqual(sorted([first, second]), ['a', 'b'])
+        balancer.release(first)
+        self.assertEqual(balancer.acquire(), first)
+
+    def test_round_robin(self):
+        balancer = Balancer(['a', 'b', 'c'], strategy='round_robin', timer=self.clock)
+        hosts = []
+        for _ in range(6):
+            host = balancer.acquire()
+            balancer.release(host)
+            hosts.append(host)
+        self.assertEqual(hosts, ['a', 'b', 'c', 'a', 'b', 'c'])
+
+    def test_ejection(self):
+        balancer = Balancer(['a', 'b'], failure_threshold=2, eject_time=10, timer=self.clock)
+        for _ in range(2):
+            self.assertEqual(balancer.healthy_hosts(), ['a', 'b'])
+            hosts = [balancer.acquire(), balancer.acquire()]
+            self.assertEqual(sorted(hosts), ['a', 'b'])
+            balancer.release('a', False)
+            balancer.release('b', True)
+        self.assertEqual(balancer.healthy_hosts(), ['b'])
+        self.assertEqual(balancer.acquire(), 'b')
+        self.clock.now = 10
+        self.assertEqual(balancer.healthy_hosts(), ['a', 'b'])
+
+    def test_success_resets_failures(self):
+        balancer = Balancer(['a'], failure_threshold=2, timer=self.clock)
+        for ok in (False, True, False):
+            balancer.release(balancer.acquire(), ok)
+        self.assertEqual(balancer.healthy_hosts(), ['a'])
+
+    def test_no_outcome(self):
+        balancer = Balancer(['a'], failure_threshold=1, timer=self.clock)
+        balancer.release(balancer.acquire(), None)
+        self.assertEqual(balancer.healthy_hosts(), ['a'])
+        self.assertEqual(balancer.endpoints[0].outstanding, 0)
+
+    def test_all_ejected(self):
+        balancer = Balancer(['a', 'b'], failure_threshold=1, eject_time=10, timer=self.clock)
+        balancer.release(balancer.acquire(), False)
+        self.clock.now = 1
+        balancer.release(balancer.acquire(), False)
+        self.assertEqual(balancer.healthy_hosts(), [])
+        # the one ejected first
+        self.assertEqual(balancer.acquire(), 'a')
+
+
+class BalancedConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=2, buckets_per_user=1).start()
+        self.addCleanup(self.fake.stop)
+
+    def connection(self, hosts, **kwargs):
+        self.balancer = Balancer(hosts, failure_threshold=1, eject_time=60)
+        return self.fake.connection(balancer=self.balancer,
+                                    retry=radosgw.retry.RetryPolicy(max_attempts=1), **kwargs)
+
+    def test_connection_error_ejects(self):
+        # nothing listens on 127.0.0.2
+        rgwadmin = self.connection(['127.0.0.2', self.fake.host])
+        for _ in range(2):
+            try:
+                rgwadmin.get_user('user000000')
+            except radosgw.retry.CONNECTION_ERRORS:
+                pass
+        self.assertEqual(self.balancer.healthy_hosts(), [self.fake.host])
+        self.assertEqual(rgwadmin.get_user('user000000').uid, 'user000000')
+
+    def test_server_error_ejects(self):
+        rgwadmin = self.connection([self.fake.host])
+        self.fake.inject_error(503, 'ServiceUnavailable')
+        with self.assertRaises(radosgw.exception.RadosGWAdminError):
+            rgwadmin.get_user('user000000')
+        self.assertEqual(self.balancer.healthy_hosts(), [])
+
+    def test_client_error_does_not_eject(self):
+        rgwadmin = self.connection([self.fake.host], pool_size=1, pool_block_timeout=0.01)
+        self.assertEqual(rgwadmin.get_user('user000000').uid, 'user000000')
+        with self.assertRaises(radosgw.exception.NoSuchUser):
+            rgwadmin.get_user('nosuch')
+        # the only slot taken: pool timeout
+        with rgwadmin._pool.slot(self.fake.host, self.fake.port, False):
+            with self.assertRaises(radosgw.exception.PoolTimeout):
+                rgwadmin.get_user('user000000')
+        self.assertEqual(self.balancer.healthy_hosts(), [self.fake.host])
+        self.assertEqual(self.balancer.endpoints[0].outstanding, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.exception
+import radosgw.retry
+from radosgw.fakeserver import FakeRadosGW
+
+
+class BulkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=4, buckets_per_user=3).start()
+        self.addCleanup(self.fake.stop)
+        self.rgwadmin = self.fake.connection(pool_size=4)
+
+    def timeout_connection(self):
+        """Returns a connection timing out, without retries."""
+        self.fake.latency = 0.5
+        return self.fake.connection(pool_size=4, timeout=0.1,
+                                    retry=radosgw.retry.RetryPolicy(max_attempts=1))
+
+    def test_create_users_partial_failure(self):
+        specs = [{'uid': 'new1', 'display_name': 'New 1', 'user_quota': {'max_objects': 10}},
+                 {'uid': 'user000000', 'display_name': 'Exists'},
+                 {'uid': 'new2', 'display_name': 'New 2', 'bucket_quota': {'max_objects': 'x'}}]
+        results = list(self.rgwadmin.create_users(specs, concurrency=2, ordered=True))
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[0].value.uid, 'new1')
+        self.assertIsInstance(results[1].error, radosgw.exception.UserExists)
+        self.assertIsNone(results[1].value)
+        # created, but the quota not set
+        self.assertFalse(results[2].ok)
+        self.assertEqual(results[2].value.uid, 'new2')
+        self.assertEqual(self.rgwadmin.get_user('new2').uid, 'new2')
+
+    def test_create_users_timeout(self):
+        rgwadmin = self.timeout_connection()
+        specs = [{'uid': 'new%d' % i, 'display_name': 'New'} for i in range(3)]
+        results = list(rgwadmin.create_users(specs, concurrency=3))
+        self.assertEqual(len(results), 3)
+        self.assertFalse(any(result.ok for result in results))
+
+    def test_delete_buckets_partial_failure(self):
+        buckets = ['user000000-bucket0000', 'user000000-bucket0001', 'nosuch']
+        summary = self.rgwadmin.delete_buckets(buckets, purge_objects=False, concurrency=2)
+        self.assertEqual(summary.deleted, ['user000000-bucket0000'])
+        self.assertEqual(summary.not_empty, ['user000000-bucket0001'])
+        self.assertEqual([bucket for bucket, _ in summary.failed], ['nosuch'])
+        self.assertEqual(summary.total, 3)
+
+    def test_delete_buckets_timeout(self):
+        rgwadmin = self.timeout_connection()
+        buckets = ['user000001-bucket0000', 'user000001-bucket0001']
+        summary = rgwadmin.delete_buckets(buckets, concurrency=2)
+        self.assertEqual(sorted(bucket for bucket, _ in summary.failed), buckets)
+
+    def test_check_bucket_indexes_fix(self):
+        self.fake.corrupt_bucket_index('user000001-bucket0002', 2)
+        summary = self.rgwadmin.check_bucket_indexes(concurrency=4)
+        self.assertEqual([check.bucket for check in summary.inconsistent],
+                         ['user000001-bucket0002'])
+        self.assertEqual(summary.inconsistent[0].differences['rgw.main']['num_objects'],
+                         (5, 3))
+        self.assertEqual(summary.fixed, [])
+        self.fake.requests.clear()
+        summary = self.rgwadmin.check_bucket_indexes(concurrency=4, fix=True)
+        self.assertEqual([check.bucket for check in summary.fixed], ['user000001-bucket0002'])
+        # only the inconsistent bucket is fixed
+        self.assertEqual(self.fake.requests['GET /bucket?index'], 12 + 1)
+        summary = self.rgwadmin.check_bucket_indexes(concurrency=4)
+        self.assertEqual(len(summary.consistent), 12)
+        self.assertEqual(summary.inconsistent, [])
+
+    def test_check_bucket_indexes_timeout(self):
+        rgwadmin = self.timeout_connection()
+        summary = rgwadmin.check_bucket_indexes(['user000000-bucket0000', 'nosuch'])
+        self.assertEqual(sorted(result.item for result in summary.failed),
+                         ['nosuch', 'user000000-bucket0000'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.cache
+from radosgw.fakeserver import FakeRadosGW
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = radosgw.cache.LRUCache(maxsize=2, ttl=10, timer=self.clock)
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1})
+
+    def test_lru_eviction(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        # 'a' recently used, 'b' evicted
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_ttl(self):
+        self.cache.put('a', 1)
+        self.clock.now = 9.9
+        self.assertEqual(self.cache.get('a'), 1)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_peek(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        # no LRU update: 'a' still evicted first
+        self.assertEqual(self.cache.peek('a'), 1)
+        self.cache.put('c', 3)
+        self.assertIsNone(self.cache.peek('a'))
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_invalidate(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.invalidate('a')
+        self.cache.invalidate_if(lambda key, value: value == 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalid_maxsize(self):
+        with self.assertRaises(ValueError):
+            radosgw.cache.LRUCache(maxsize=0)
+
+
+class ConnectionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=2, buckets_per_user=2).start()
+        self.addCleanup(self.fake.stop)
+        self.rgwadmin = self.fake.connection(cache=radosgw.cache.LRUCache())
+
+    def test_get_user_cached(self):
+        self.rgwadmin.get_user('user000000')
+        count = self.fake.request_count
+        self.assertEqual(self.rgwadmin.get_user('user000000').uid, 'user000000')
+        self.assertEqual(self.fake.request_count, count)
+
+    def test_update_user_invalidates(self):
+        self.rgwadmin.get_user('user000000')
+        self.rgwadmin.update_user('user000000', display_name='Updated')
+        self.assertEqual(self.rgwadmin.get_user('user000000').display_name, 'Updated')
+
+    def test_create_key_invalidates(self):
+        self.assertEqual(len(self.rgwadmin.get_user('user000000').keys), 1)
+        self.rgwadmin.create_key('user000000', generate_key=True)
+        self.assertEqual(len(self.rgwadmin.get_user('user000000').keys), 2)
+
+    def test_remove_key_invalidates(self):
+        user = self.rgwadmin.get_user('user000000')
+        self.rgwadmin.remove_key(user.keys[0].access_key)
+        self.assertEqual(len(self.rgwadmin.get_user('user000000').keys), 0)
+
+    def test_get_bucket_cached(self):
+        self.rgwadmin.get_bucket('user000000-bucket0000')
+        count = self.fake.request_count
+        self.assertEqual(self.rgwadmin.get_bucket('user000000-bucket0000').owner, 'user000000')
+        self.assertEqual(self.fake.request_count, count)
+
+    def test_unlink_bucket_invalidates(self):
+        self.rgwadmin.get_bucket('user000000-bucket0000')
+        self.rgwadmin.unlink_bucket('user000000-bucket0000', 'user000000')
+        self.assertIsNone(self.rgwadmin.cache.peek(('bucket', 'user000000-bucket0000', True)))
+
+
+if __name__ == '__main__':
+    unittest.main()
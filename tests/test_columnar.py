@@ -0,0 +1,91 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+from radosgw.columnar import BUCKET_FIELDS, USER_FIELDS, Columns
+from radosgw.fakeserver import FakeRadosGW
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ColumnsTest(unittest.TestCase):
+
+    def columns(self):
+        columns = Columns(BUCKET_FIELDS, ['bucket', 'num_objects'])
+        return columns.extend([{'bucket': 'a', 'usage': {'rgw.main': {'num_objects': 3}}},
+                               {'bucket': 'b', 'usage': {}}])
+
+    def test_append(self):
+        columns = self.columns()
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns['bucket'], ['a', 'b'])
+        # missing values are 0
+        self.assertEqual(list(columns['num_objects']), [3, 0])
+        self.assertIn('num_objects', columns)
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            Columns(USER_FIELDS, ['user_id', 'nosuch'])
+
+    @unittest.skipIf(numpy is None, 'numpy not installed')
+    def test_to_numpy_then_append(self):
+        columns = self.columns()
+        arrays = columns.to_numpy()
+        self.assertEqual(arrays['num_objects'].tolist(), [3, 0])
+        columns.append({'bucket': 'c', 'usage': {'rgw.main': {'num_objects': 1}}})
+        self.assertEqual(list(columns['num_objects']), [3, 0, 1])
+        self.assertEqual(arrays['num_objects'].tolist(), [3, 0])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+    def test_to_arrow_then_append(self):
+        columns = self.columns()
+        table = columns.to_arrow()
+        columns.append({'bucket': 'c'})
+        self.assertEqual(table.column('num_objects').to_pylist(), [3, 0])
+        self.assertEqual(len(columns), 3)
+
+
+class ConnectionColumnsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=3, buckets_per_user=2).start()
+        self.addCleanup(self.fake.stop)
+        self.rgwadmin = self.fake.connection()
+
+    def test_get_user_columns(self):
+        columns = self.rgwadmin.get_user_columns(fields=['user_id', 'max_buckets'])
+        self.assertEqual(sorted(columns['user_id']), ['user000000', 'user000001', 'user000002'])
+        self.assertEqual(len(columns['max_buckets']), 3)
+
+    def test_get_bucket_columns(self):
+        columns = self.rgwadmin.get_bucket_columns(uid='user000001', fields=['bucket', 'owner'])
+        self.assertEqual(sorted(columns['bucket']), ['user000001-bucket0000',
+                                                     'user000001-bucket0001'])
+        self.assertEqual(columns['owner'], ['user000001', 'user000001'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.utils
+from radosgw.fakeserver import FakeRadosGW
+
+
+class PagingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeRadosGW(users=20, buckets_per_user=2).start()
+        cls.rgwadmin = cls.fake.connection(pool_size=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def setUp(self):
+        self.fake.requests.clear()
+
+    def test_iter_uids_pages(self):
+        uids = list(self.rgwadmin.iter_uids(max_entries=7))
+        self.assertEqual(uids, ['user%06d' % i for i in range(20)])
+        self.assertEqual(self.fake.requests['GET /metadata/user'], 3)
+
+    def test_iter_uids_exact_pages(self):
+        uids = list(self.rgwadmin.iter_uids(max_entries=10))
+        self.assertEqual(len(uids), 20)
+        self.assertEqual(len(set(uids)), 20)
+
+    def test_iter_uids_lazy(self):
+        uids = self.rgwadmin.iter_uids(max_entries=5)
+        self.assertEqual(next(uids), 'user000000')
+        self.assertEqual(self.fake.requests['GET /metadata/user'], 1)
+
+    def test_get_users_concurrent(self):
+        users = list(self.rgwadmin.get_users(concurrency=4, max_entries=6))
+        self.assertEqual([user.uid for user in users], ['user%06d' % i for i in range(20)])
+        self.assertEqual(self.fake.requests['GET /user'], 20)
+
+    def test_get_users_unordered(self):
+        users = self.rgwadmin.get_users(concurrency=4, ordered=False)
+        self.assertEqual(sorted(user.uid for user in users), ['user%06d' % i for i in range(20)])
+
+    def test_get_buckets_stream(self):
+        buckets = list(self.rgwadmin.get_buckets(stream=True))
+        self.assertEqual([bucket.name for bucket in buckets],
+                         [bucket.name for bucket in self.rgwadmin.get_buckets()])
+        self.assertEqual(len(buckets), 40)
+
+    def test_iter_usage_windows(self):
+        end = self.fake.usage_end + 3600
+        start = end - 24 * 3600
+        entries = list(self.rgwadmin.iter_usage(start, end, window=6 * 3600, uid='user000001'))
+        windows = list(radosgw.utils.time_windows(start, end, 6 * 3600))
+        self.assertEqual(self.fake.requests['GET /usage'], len(windows))
+        self.assertEqual(set(entry['user'] for entry in entries), set(['user000001']))
+        # 24 hourly entries per bucket, each once
+        keys = set((entry['bucket'], entry['epoch']) for entry in entries)
+        self.assertEqual(len(keys), len(entries))
+        self.assertEqual(len(entries), 2 * 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.exception
+from radosgw.fakeserver import FakeRadosGW
+
+
+class FakeRadosGWTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=3, buckets_per_user=2).start()
+        self.addCleanup(self.fake.stop)
+        self.rgwadmin = self.fake.connection()
+
+    def test_invalid_argument(self):
+        with self.assertRaises(radosgw.exception.RadosGWAdminError) as cm:
+            self.rgwadmin.set_quota('user000000', 'user', max_objects='notint')
+        self.assertEqual(cm.exception.status, 400)
+        self.assertEqual(cm.exception.code, 'InvalidArgument')
+        # the connection is still usable
+        self.assertEqual(self.rgwadmin.get_user('user000000').uid, 'user000000')
+
+    def test_injected_error(self):
+        self.fake.inject_error(status=404, code='NoSuchUser')
+        with self.assertRaises(radosgw.exception.NoSuchUser):
+            self.rgwadmin.get_user('user000000')
+        self.assertEqual(self.rgwadmin.get_user('user000000').uid, 'user000000')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.keyindex
+from radosgw.fakeserver import FakeRadosGW
+
+
+class KeyIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = radosgw.keyindex.KeyIndex()
+        self.index.add_user({'user_id': 'bob', 'tenant': 'acme',
+                             'keys': [{'user': 'acme$bob', 'access_key': 'AKBOB'}],
+                             'swift_keys': [{'user': 'acme$bob:swift'}]})
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup('AKBOB'), ('acme$bob', 'acme', 's3'))
+        self.assertEqual(self.index.lookup('acme$bob:swift'), ('acme$bob', 'acme', 'swift'))
+        self.assertIsNone(self.index.lookup('AKNONE'))
+        self.assertEqual(len(self.index), 2)
+
+    def test_uid_interned(self):
+        self.index.add('AKBOB2', ''.join(['acme$', 'bob']))
+        self.assertIs(self.index.lookup('AKBOB2').uid, self.index.lookup('AKBOB').uid)
+
+    def test_remove(self):
+        self.assertTrue(self.index.remove('AKBOB'))
+        self.assertFalse(self.index.remove('AKBOB'))
+        self.assertNotIn('AKBOB', self.index)
+        self.assertEqual(self.index.remove_user('acme$bob'), 1)
+        self.assertEqual(len(self.index), 0)
+
+
+class ConnectionKeyIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=3, buckets_per_user=0).start()
+        self.addCleanup(self.fake.stop)
+        self.index = radosgw.keyindex.KeyIndex()
+        self.rgwadmin = self.fake.connection(key_index=self.index)
+
+    def test_build(self):
+        self.index.build(self.rgwadmin, concurrency=2)
+        self.assertEqual(len(self.index), 3)
+        user = self.rgwadmin.get_user('user000002')
+        self.assertEqual(self.index.lookup(user.keys[0].access_key).uid, 'user000002')
+
+    def test_updated_by_requests(self):
+        self.rgwadmin.create_user('carol', 'Carol', access_key='AKCAROL', secret_key='secret')
+        self.assertEqual(self.index.lookup('AKCAROL').uid, 'carol')
+        self.rgwadmin.create_key('carol', access_key='AKCAROL2', secret_key='secret')
+        self.assertIn('AKCAROL2', self.index)
+        self.rgwadmin.remove_key('AKCAROL')
+        self.assertNotIn('AKCAROL', self.index)
+        self.rgwadmin.delete_user('carol')
+        self.assertEqual(len(self.index), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
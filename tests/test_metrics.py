@@ -0,0 +1,101 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.exception
+import radosgw.retry
+from radosgw.fakeserver import FakeRadosGW
+from radosgw.metrics import Histogram, Metrics
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_cumulative(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(0.1, 2), (1.0, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 2.65)
+
+    def test_quantile(self):
+        histogram = Histogram((1.0, 2.0))
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in (0.5, 1.5, 1.5, 1.5):
+            histogram.observe(value)
+        self.assertAlmostEqual(histogram.quantile(0.25), 1.0)
+        self.assertAlmostEqual(histogram.quantile(0.5), 1 + 1 / 3.0)
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_failed_without_response(self):
+        metrics = Metrics()
+        metrics.observe('GET', '/user', 200, 0.01, 10)
+        metrics.observe('GET', '/user', None, 0.1)
+        metrics.error('GET', '/user', 'timeout')
+        self.assertEqual(metrics.snapshot()[('GET', '/user')]['statuses'], {200: 1, None: 1})
+        text = metrics.prometheus()
+        self.assertIn('radosgw_admin_requests_total{method="GET",path="/user",status="200"} 1\n',
+                      text)
+        self.assertIn('radosgw_admin_requests_total{method="GET",path="/user",status="none"} 1\n',
+                      text)
+        self.assertIn('radosgw_admin_errors_total{method="GET",path="/user",error="timeout"} 1\n',
+                      text)
+
+
+class ConnectionMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=2, buckets_per_user=1).start()
+        self.addCleanup(self.fake.stop)
+        self.metrics = Metrics()
+
+    def test_requests(self):
+        rgwadmin = self.fake.connection(metrics=self.metrics)
+        rgwadmin.get_user('user000000')
+        with self.assertRaises(radosgw.exception.NoSuchUser):
+            rgwadmin.get_user('nosuch')
+        endpoint = self.metrics.snapshot()[('GET', '/user')]
+        self.assertEqual(endpoint['requests'], 2)
+        self.assertEqual(endpoint['statuses'], {200: 1, 404: 1})
+        self.assertEqual(endpoint['errors'], {'NoSuchUser': 1})
+        self.assertGreater(endpoint['bytes_received'], 0)
+
+    def test_retried_attempts(self):
+        retry = radosgw.retry.RetryPolicy(max_attempts=3, sleep=lambda delay: None)
+        rgwadmin = self.fake.connection(metrics=self.metrics, retry=retry)
+        self.fake.inject_error(503, 'ServiceUnavailable', count=2)
+        rgwadmin.get_user('user000000')
+        endpoint = self.metrics.snapshot()[('GET', '/user')]
+        self.assertEqual(endpoint['statuses'], {503: 2, 200: 1})
+        self.assertEqual(endpoint['errors'], {'RadosGWAdminError': 2})
+
+    def test_timeout(self):
+        self.fake.latency = 0.5
+        rgwadmin = self.fake.connection(metrics=self.metrics, timeout=0.1,
+                                        retry=radosgw.retry.RetryPolicy(max_attempts=1))
+        with self.assertRaises(radosgw.retry.CONNECTION_ERRORS):
+            rgwadmin.get_user('user000000')
+        endpoint = self.metrics.snapshot()[('GET', '/user')]
+        self.assertEqual(endpoint['statuses'], {None: 1})
+        self.assertIn('status="none"', self.metrics.prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import copy
+import pickle
+import unittest
+
+from radosgw.bucket import BucketInfo
+from radosgw.user import UserInfo
+
+USER = {'user_id': 'test', 'display_name': 'Test User', 'email': 'test@example.org',
+        'suspended': 0, 'max_buckets': 1000, 'subusers': [],
+        'keys': [{'user': 'test', 'access_key': 'AK', 'secret_key': 'SK'}],
+        'swift_keys': [{'user': 'test:swift', 'secret_key': 'SSK'}],
+        'caps': [{'type': 'usage', 'perm': 'read'}],
+        'stats': {'size_kb': 1, 'num_objects': 2}}
+
+BUCKET = {'bucket': 'example', 'id': '79826.5', 'owner': 'test', 'Mtime': 0,
+          'usage': {'rgw.main': {'num_objects': 1, 'size_kb': 147, 'size_kb_actual': 148}}}
+
+
+def round_trips(value):
+    yield pickle.loads(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    yield copy.deepcopy(value)
+    yield copy.copy(value)
+
+
+class UserInfoTest(unittest.TestCase):
+
+    def assertUser(self, user):
+        self.assertEqual(user.uid, 'test')
+        self.assertEqual([(key.access_key, key.key_type) for key in user.keys], [('AK', 's3')])
+        self.assertEqual([key.secret_key for key in user.swift_keys], ['SSK'])
+        self.assertEqual([(cap.type, cap.perm) for cap in user.caps], [('usage', 'read')])
+        self.assertEqual(user.stats.num_objects, 2)
+        self.assertEqual(user.subusers, [])
+
+    def test_lazy_attributes(self):
+        user = UserInfo(None, USER)
+        self.assertUser(user)
+        # built once
+        self.assertIs(user.keys, user.keys)
+
+    def test_assign_attributes(self):
+        user = UserInfo(None, USER)
+        user.caps = []
+        user.extra = 'value'
+        self.assertEqual(user.caps, [])
+        self.assertEqual(user.extra, 'value')
+
+    def test_no_stats(self):
+        user_dict = dict(USER)
+        del user_dict['stats']
+        self.assertIsNone(UserInfo(None, user_dict).stats)
+
+    def test_round_trip_unset(self):
+        for user in round_trips(UserInfo(None, USER)):
+            self.assertUser(user)
+
+    def test_round_trip_built(self):
+        user = UserInfo(None, USER)
+        self.assertUser(user)
+        for user in round_trips(user):
+            self.assertUser(user)
+
+
+class BucketInfoTest(unittest.TestCase):
+
+    def test_attributes(self):
+        bucket = BucketInfo(None, BUCKET)
+        self.assertEqual(bucket.name, 'example')
+        self.assertEqual(bucket.owner, 'test')
+        self.assertEqual(bucket.mtime, 0)
+        self.assertIn('mtime', dir(bucket))
+        with self.assertRaises(AttributeError):
+            bucket.nosuch
+
+    def test_usage(self):
+        bucket = BucketInfo(None, BUCKET)
+        self.assertEqual(bucket.usage.size_kb, 147)
+        bucket.usage = {}
+        self.assertIsNone(bucket.usage)
+        self.assertIsNone(BucketInfo(None, {'bucket': 'empty'}).usage)
+
+    def test_round_trip(self):
+        for bucket in round_trips(BucketInfo(None, BUCKET)):
+            self.assertEqual(bucket.name, 'example')
+            self.assertEqual(bucket.usage.num_objects, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
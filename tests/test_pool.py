@@ -0,0 +1,80 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.exception
+import radosgw.retry
+from radosgw.fakeserver import FakeRadosGW
+
+
+class BoundedPoolTest(unittest.TestCase):
+
+    transport = 'boto'
+
+    def setUp(self):
+        # a bucket listing larger than a stream chunk
+        self.fake = FakeRadosGW(users=2, buckets_per_user=200).start()
+        self.addCleanup(self.fake.stop)
+        self.rgwadmin = self.connection()
+
+    def connection(self, **kwargs):
+        return self.fake.connection(transport=self.transport, pool_size=1, pool_block_timeout=0.05,
+                                    **kwargs)
+
+    def test_preload_releases_slot(self):
+        for _ in range(3):
+            self.assertEqual(self.rgwadmin.get_user('user000000').uid, 'user000000')
+
+    def test_stream_holds_slot_until_read(self):
+        buckets = self.rgwadmin.get_buckets(stream=True)
+        next(buckets)
+        # the only slot is held by the streamed response
+        with self.assertRaises(radosgw.exception.PoolTimeout):
+            self.rgwadmin.get_user('user000000')
+        self.assertEqual(len(list(buckets)), 399)
+        self.assertEqual(self.rgwadmin.get_user('user000000').uid, 'user000000')
+
+    def test_stream_closed_early(self):
+        buckets = self.rgwadmin.get_buckets(stream=True)
+        next(buckets)
+        buckets.close()
+        # the slot released, the connection not reused with the unread body
+        self.assertEqual(self.rgwadmin.get_user('user000000').uid, 'user000000')
+        self.assertEqual(len(list(self.rgwadmin.get_buckets(stream=True))), 400)
+
+    def test_stream_error(self):
+        rgwadmin = self.connection(retry=radosgw.retry.RetryPolicy(max_attempts=1))
+        self.fake.inject_error(503, 'ServiceUnavailable')
+        with self.assertRaises(radosgw.exception.RadosGWAdminError):
+            list(rgwadmin.get_buckets(stream=True))
+        self.assertEqual(rgwadmin.get_user('user000000').uid, 'user000000')
+
+
+class HTTPBoundedPoolTest(BoundedPoolTest):
+
+    transport = 'http'
+
+    def test_unsupported_options(self):
+        with self.assertRaises(ValueError):
+            self.fake.connection(transport='http', proxy='proxy.example.org', proxy_port=3128)
+        with self.assertRaises(ValueError):
+            self.fake.connection(transport=self.rgwadmin._transport, pool_size=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+import radosgw.ratelimit
+from radosgw.fakeserver import FakeRadosGW
+
+
+class FakeClock(object):
+    """Clock advanced by the sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = radosgw.ratelimit.TokenBucket(10, burst=2, timer=self.clock,
+                                                    sleep=self.clock.sleep)
+
+    def test_burst(self):
+        self.assertEqual(self.bucket.acquire(), 0.0)
+        self.assertEqual(self.bucket.acquire(), 0.0)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_rate(self):
+        for _ in range(12):
+            self.bucket.acquire()
+        # the burst, then one token every 0.1 s
+        self.assertAlmostEqual(self.clock.now, 1.0)
+        self.assertEqual(len(self.clock.sleeps), 10)
+        self.assertAlmostEqual(self.bucket.waited, sum(self.clock.sleeps))
+        self.assertEqual(self.bucket.acquired, 12)
+
+    def test_refill_capped_by_burst(self):
+        self.clock.now = 60.0
+        for _ in range(3):
+            self.bucket.acquire()
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.1)
+
+    def test_try_acquire(self):
+        self.assertTrue(self.bucket.try_acquire(2))
+        self.assertFalse(self.bucket.try_acquire())
+        self.clock.now += 0.1
+        self.assertTrue(self.bucket.try_acquire())
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            radosgw.ratelimit.TokenBucket(0)
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=2, buckets_per_user=1).start()
+        self.addCleanup(self.fake.stop)
+
+    def test_read_write_budgets(self):
+        limiter = radosgw.ratelimit.RateLimiter(read_rate=1000, write_rate=1000, read_burst=10)
+        rgwadmin = self.fake.connection(rate_limiter=limiter)
+        rgwadmin.get_user('user000000')
+        rgwadmin.get_bucket('user000000-bucket0000')
+        rgwadmin.update_user('user000000', display_name='Updated')
+        self.assertEqual(limiter.read.acquired, 2)
+        self.assertEqual(limiter.write.acquired, 1)
+
+    def test_unlimited(self):
+        limiter = radosgw.ratelimit.RateLimiter(write_rate=1000)
+        self.assertIsNone(limiter.read)
+        self.assertEqual(limiter.acquire('GET'), 0.0)
+        rgwadmin = self.fake.connection(rate_limiter=limiter)
+        rgwadmin.get_user('user000000')
+        self.assertEqual(limiter.write.acquired, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
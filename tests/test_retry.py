@@ -0,0 +1,96 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import socket
+import unittest
+
+import radosgw.exception
+from radosgw.retry import CircuitBreaker, RetryBudget, RetryPolicy
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse(object):
+
+    def __init__(self, status, body=b''):
+        self.status = status
+        self.body = body
+
+    def read(self):
+        return self.body
+
+    def getheader(self, name, default=None):
+        return default
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, timer=self.clock)
+        self.policy = RetryPolicy(max_attempts=1, circuit_breaker=self.breaker,
+                                  budget=RetryBudget(timer=self.clock), sleep=lambda delay: None)
+
+    def open_circuit(self):
+        def refused():
+            raise socket.error('connection refused')
+
+        for _ in range(2):
+            with self.assertRaises(socket.error):
+                self.policy.call('GET', refused)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_open_fails_fast(self):
+        self.open_circuit()
+        with self.assertRaises(radosgw.exception.CircuitOpen):
+            self.policy.call('GET', lambda: FakeResponse(200))
+
+    def test_half_open_probe_closes(self):
+        self.open_circuit()
+        self.clock.now += 10
+        self.assertEqual(self.policy.call('GET', lambda: FakeResponse(200)).status, 200)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_probe_without_outcome(self):
+        self.open_circuit()
+        self.clock.now += 10
+
+        def pool_timeout():
+            raise radosgw.exception.PoolTimeout('no free connection')
+
+        with self.assertRaises(radosgw.exception.PoolTimeout):
+            self.policy.call('GET', pool_timeout)
+        # another probe is let through
+        self.assertEqual(self.policy.call('GET', lambda: FakeResponse(200)).status, 200)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_probe_failure_opens(self):
+        self.open_circuit()
+        self.clock.now += 10
+        self.assertEqual(self.policy.call('GET', lambda: FakeResponse(503)).status, 503)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import unittest
+
+from radosgw.rollup import DAY, HOUR, UsageRollup
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+START = 1577836800
+
+
+def usage_entries():
+    entries = []
+    for user in ('alice', 'bob'):
+        for bucket in ('%s-1' % user, '%s-2' % user):
+            for hour in range(24):
+                ops = hour + 1
+                entries.append({'bucket': bucket, 'owner': user, 'user': user,
+                                'epoch': START + hour * HOUR,
+                                'categories': [{'category': 'get_obj', 'bytes_sent': ops * 10,
+                                                'bytes_received': 0, 'ops': ops,
+                                                'successful_ops': ops},
+                                               {'category': 'put_obj', 'bytes_sent': 0,
+                                                'bytes_received': ops * 100, 'ops': 1,
+                                                'successful_ops': 1}]})
+    # no owner, no counters
+    entries.append({'bucket': '-', 'user': 'alice', 'epoch': START,
+                    'categories': [{'category': 'list_buckets', 'ops': 2}]})
+    entries.append({'bucket': '-', 'user': 'bob', 'epoch': START, 'categories': []})
+    return entries
+
+
+ROLLUPS = [(('user', 'bucket', 'category'), HOUR),
+           (('user', 'category'), DAY),
+           (('owner',), DAY),
+           (('category',), None),
+           ((), None)]
+
+
+class UsageRollupTest(unittest.TestCase):
+
+    vectorized = False
+
+    def rollup(self, dimensions, granularity, entries=None):
+        rollup = UsageRollup(dimensions, granularity, vectorized=self.vectorized)
+        return rollup.extend(usage_entries() if entries is None else entries)
+
+    def test_rows(self):
+        rollup = self.rollup(('user', 'category'), DAY)
+        self.assertEqual(len(rollup), 5)
+        self.assertEqual(rollup.entries, 98)
+        self.assertEqual(rollup.rows()[0], {'user': 'alice', 'category': 'get_obj', 'time': START,
+                                            'bytes_sent': 6000, 'bytes_received': 0,
+                                            'ops': 600, 'successful_ops': 600})
+        self.assertEqual(rollup.rows()[1], {'user': 'alice', 'category': 'list_buckets',
+                                            'time': START, 'bytes_sent': 0, 'bytes_received': 0,
+                                            'ops': 2, 'successful_ops': 0})
+
+    def test_missing_owner(self):
+        rows = self.rollup(('owner',), None).rows()
+        self.assertEqual([row['owner'] for row in rows], [None, 'alice', 'bob'])
+        self.assertEqual(rows[0]['ops'], 2)
+
+    def test_totals(self):
+        totals = self.rollup(('category',), None).totals()
+        self.assertEqual(totals['ops'], 4 * 300 + 4 * 24 + 2)
+        self.assertEqual(totals, self.rollup((), None).totals())
+
+    def test_incremental(self):
+        entries = usage_entries()
+        for dimensions, granularity in ROLLUPS:
+            rollup = UsageRollup(dimensions, granularity, vectorized=self.vectorized)
+            for entry in entries:
+                rollup.add(entry)
+            self.assertEqual(rollup.rows(), self.rollup(dimensions, granularity).rows())
+
+    def test_merge(self):
+        entries = usage_entries()
+        for dimensions, granularity in ROLLUPS:
+            first = self.rollup(dimensions, granularity, entries[:50])
+            second = UsageRollup(dimensions, granularity).extend(entries[50:])
+            merged = first.merge(second)
+            self.assertEqual(merged.rows(), self.rollup(dimensions, granularity).rows())
+            self.assertEqual(merged.entries, len(entries))
+
+    def test_merge_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.rollup(('user',), DAY).merge(self.rollup(('user',), HOUR))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            UsageRollup(('nosuch',))
+        with self.assertRaises(ValueError):
+            UsageRollup(granularity=60)
+
+
+@unittest.skipIf(numpy is None, 'numpy not installed')
+class VectorizedUsageRollupTest(UsageRollupTest):
+
+    vectorized = True
+
+    def test_same_as_python(self):
+        entries = usage_entries()
+        for dimensions, granularity in ROLLUPS:
+            python = UsageRollup(dimensions, granularity, vectorized=False).extend(entries)
+            self.assertEqual(self.rollup(dimensions, granularity).rows(), python.rows())
+
+
+if __name__ == '__main__':
+    unittest.main()
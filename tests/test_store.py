@@ -0,0 +1,112 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import radosgw.store
+from radosgw.fakeserver import FakeRadosGW
+
+
+def dataset():
+    """Returns the users and buckets JSON objects of a small dataset."""
+    fake = FakeRadosGW(users=0)
+    users = [fake.add_user('alice', email='alice@example.org', access_key='AKALICE'),
+             fake.add_user('acme$bob', email='bob@example.org', access_key='AKBOB')]
+    buckets = [fake.add_bucket('photos', 'alice'), fake.add_bucket('backups', 'acme$bob')]
+    buckets[1]['tenant'] = 'acme'
+    return users, buckets
+
+
+class InventoryStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = radosgw.store.InventoryStore()
+        self.addCleanup(self.store.close)
+        self.users, buckets = dataset()
+        self.store.put_users(self.users)
+        self.store.put_buckets(buckets)
+
+    def test_user(self):
+        self.assertEqual(self.store.user('alice').email, 'alice@example.org')
+        self.assertEqual(self.store.user('acme$bob').user_id, 'bob')
+        self.assertIsNone(self.store.user('bob'))
+
+    def test_user_by_access_key(self):
+        self.assertEqual(self.store.user_by_access_key('AKBOB').user_id, 'bob')
+        self.assertIsNone(self.store.user_by_access_key('AKNONE'))
+
+    def test_users_filters(self):
+        self.assertEqual([user.user_id for user in self.store.users()], ['bob', 'alice'])
+        self.assertEqual([user.user_id for user in self.store.users(tenant='')], ['alice'])
+        self.assertEqual(self.store.uids(tenant='acme'), ['acme$bob'])
+        self.assertEqual(len(self.store.users(email='bob@example.org')), 1)
+
+    def test_buckets(self):
+        self.assertEqual(self.store.bucket('photos').name, 'photos')
+        self.assertEqual(self.store.bucket('photos').owner, 'alice')
+        self.assertEqual(self.store.bucket_by_id('c0ffee.2.1').name, 'backups')
+        self.assertEqual([bucket.name for bucket in self.store.buckets(owner='acme$bob')],
+                         ['backups'])
+
+    def test_put_replaces_keys(self):
+        alice = dict(self.users[0], keys=[{'user': 'alice', 'access_key': 'AKNEW', 'secret_key': 's'}])
+        self.store.put_users([alice])
+        self.assertIsNone(self.store.user_by_access_key('AKALICE'))
+        self.assertEqual(self.store.user_by_access_key('AKNEW').user_id, 'alice')
+        self.assertEqual(self.store.count_users(), 2)
+
+    def test_remove(self):
+        self.store.remove_users(['alice'])
+        self.store.remove_buckets(['photos'])
+        self.assertIsNone(self.store.user_by_access_key('AKALICE'))
+        self.assertEqual((self.store.count_users(), self.store.count_buckets()), (1, 1))
+        self.store.clear()
+        self.assertEqual((self.store.count_users(), self.store.count_buckets()), (0, 0))
+
+
+class InventoryStoreRefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=3, buckets_per_user=2).start()
+        self.addCleanup(self.fake.stop)
+        self.rgwadmin = self.fake.connection()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_refresh(self):
+        path = os.path.join(self.tmpdir, 'inventory.db')
+        with radosgw.store.InventoryStore(path, self.rgwadmin) as store:
+            # removed from the radosgw since the last refresh
+            users, buckets = dataset()
+            store.put_users(users)
+            store.put_buckets(buckets)
+            self.assertEqual(store.refresh(concurrency=2), (3, 6))
+            self.assertIsNone(store.user('alice'))
+            self.assertIsNone(store.bucket('photos'))
+            user = store.user('user000001')
+            self.assertIs(user._rgwadmin, self.rgwadmin)
+            self.assertEqual(store.user_by_access_key(user.keys[0].access_key).uid, 'user000001')
+        # persisted
+        with radosgw.store.InventoryStore(path) as store:
+            self.assertEqual((store.count_users(), store.count_buckets()), (3, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
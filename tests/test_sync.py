@@ -0,0 +1,111 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from radosgw.fakeserver import FakeRadosGW
+from radosgw.store import InventoryStore
+from radosgw.sync import InventorySync
+
+
+class InventorySyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=5, buckets_per_user=2).start()
+        self.addCleanup(self.fake.stop)
+        self.rgwadmin = self.fake.connection(pool_size=4)
+        self.sync = InventorySync(self.rgwadmin, concurrency=4)
+
+    def test_full_sync(self):
+        result = self.sync.sync()
+        self.assertEqual(len(result.users.added), 5)
+        self.assertEqual(len(result.buckets.added), 10)
+        self.assertEqual(result.fetched_users, 5)
+
+    def test_no_change(self):
+        self.sync.sync()
+        result = self.sync.sync()
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.fetched_users, 0)
+
+    def test_changed_bucket(self):
+        self.sync.sync()
+        self.fake.put_objects('user000002-bucket0001', 3)
+        result = self.sync.sync()
+        self.assertEqual([bucket.name for bucket in result.buckets.changed],
+                         ['user000002-bucket0001'])
+        # only the owner is fetched again
+        self.assertEqual(result.fetched_users, 1)
+        self.assertEqual([user.uid for user in result.users.changed], ['user000002'])
+
+    def test_added_and_removed(self):
+        self.sync.sync()
+        self.rgwadmin.delete_bucket('user000001-bucket0000')
+        self.rgwadmin.delete_user('user000004')
+        self.fake.add_user('new')
+        result = self.sync.sync()
+        # with the buckets of the removed user
+        self.assertEqual(sorted(result.buckets.removed), ['user000001-bucket0000',
+                                                          'user000004-bucket0000',
+                                                          'user000004-bucket0001'])
+        self.assertEqual(result.users.removed, ['user000004'])
+        self.assertEqual([user.uid for user in result.users.added], ['new'])
+
+    def test_failed_sync_done_again(self):
+        self.sync.sync()
+        self.fake.put_objects('user000003-bucket0000')
+        get_user = self.rgwadmin.get_user
+
+        def fail(uid, **kwargs):
+            raise OSError('connection reset')
+
+        self.rgwadmin.get_user = fail
+        with self.assertRaises(OSError):
+            self.sync.sync()
+        self.rgwadmin.get_user = get_user
+        result = self.sync.sync()
+        self.assertEqual([bucket.name for bucket in result.buckets.changed],
+                         ['user000003-bucket0000'])
+        self.assertEqual([user.uid for user in result.users.changed], ['user000003'])
+
+    def test_save_load(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'sync.json')
+        self.sync.sync()
+        self.sync.save(path)
+        self.fake.put_objects('user000000-bucket0001')
+        result = InventorySync.load(self.rgwadmin, path).sync()
+        self.assertEqual(len(result.buckets.changed), 1)
+        self.assertEqual(len(result.users.changed), 1)
+
+    def test_store_apply(self):
+        with InventoryStore() as store:
+            store.apply(self.sync.sync())
+            self.rgwadmin.delete_user('user000004')
+            store.apply(self.sync.sync())
+            self.assertEqual(store.uids(), ['user%06d' % i for i in range(4)])
+            self.assertEqual(store.count_buckets(), 8)
+            key = self.rgwadmin.get_user('user000001').keys[0].access_key
+            self.assertEqual(store.user_by_access_key(key).uid, 'user000001')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import os
+import subprocess
+import sys
+import unittest
+
+import radosgw.transport
+from radosgw.fakeserver import FakeRadosGW
+
+
+class HTTPTransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=3, buckets_per_user=2).start()
+        self.addCleanup(self.fake.stop)
+        self.rgwadmin = self.fake.connection(transport='http')
+        self.addCleanup(self.rgwadmin.close)
+
+    def test_requests(self):
+        self.assertIsInstance(self.rgwadmin._transport, radosgw.transport.HTTPTransport)
+        self.assertEqual(self.rgwadmin.get_user('user000001').uid, 'user000001')
+        self.assertEqual(len(list(self.rgwadmin.get_buckets())), 6)
+
+    def test_aws2(self):
+        rgwadmin = self.fake.connection(transport='http', aws_signature='AWS2')
+        self.addCleanup(rgwadmin.close)
+        self.assertEqual(rgwadmin.get_user('user000001').uid, 'user000001')
+
+    def test_keep_alive(self):
+        for _ in range(5):
+            self.rgwadmin.get_user('user000001')
+        pool = self.rgwadmin._transport._pool(self.rgwadmin.host)
+        self.assertEqual(len(pool._idle), 1)
+
+    def test_response_close(self):
+        response = self.rgwadmin._transport.request('GET', self.rgwadmin.get_path('/bucket'),
+                                                    {'stats': True})
+        response.read(1)
+        response.close()
+        # the connection with the unread body not returned to the pool
+        pool = self.rgwadmin._transport._pool(self.rgwadmin.host)
+        self.assertEqual(len(pool._idle), 0)
+
+    def test_no_boto(self):
+        code = ('import sys, radosgw.connection\n'
+                'rgwadmin = radosgw.connection.RadosGWAdminConnection("localhost", "key", "secret",'
+                ' transport="http")\n'
+                'assert "boto" not in sys.modules, "boto imported"\n')
+        subprocess.check_call([sys.executable, '-c', code],
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+if __name__ == '__main__':
+    unittest.main()
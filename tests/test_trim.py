@@ -0,0 +1,105 @@
+# Copyright (c) 2013, SWITCH - http://www.switch.ch
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# author: Valery Tschopp <valery.tschopp@switch.ch>
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import radosgw.retry
+import radosgw.utils
+from radosgw.fakeserver import FakeRadosGW
+
+HOUR = 3600
+
+
+class TrimUsageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeRadosGW(users=3, buckets_per_user=1, usage_hours=48).start()
+        self.addCleanup(self.fake.stop)
+        # without retries, the injected errors fail the windows
+        self.rgwadmin = self.fake.connection(retry=radosgw.retry.RetryPolicy(max_attempts=1))
+        self.end = self.fake.usage_end + HOUR
+        self.start = self.end - 48 * HOUR
+        self.windows = len(list(radosgw.utils.time_windows(self.start, self.end, 12 * HOUR)))
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.checkpoint = os.path.join(tmpdir, 'trim.json')
+
+    def trim(self, **kwargs):
+        kwargs.setdefault('uids', ['user000000', 'user000001', 'user000002'])
+        return self.rgwadmin.trim_usage(self.start, self.end, window=12 * HOUR,
+                                        checkpoint=self.checkpoint, **kwargs)
+
+    def usage_entries(self):
+        return len(list(self.rgwadmin.iter_usage(self.start, self.end)))
+
+    def test_trim(self):
+        self.assertEqual(self.usage_entries(), 3 * 48)
+        summary = self.trim(concurrency=3, rate=1000)
+        self.assertEqual(summary.trimmed, 3 * self.windows)
+        self.assertEqual(summary.failed, [])
+        self.assertEqual(self.usage_entries(), 0)
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        self.assertEqual(set(state['trimmed'].values()), set([self.end]))
+
+    def test_resume(self):
+        calls = []
+
+        def fail_fifth(summary, window, error):
+            calls.append(window)
+            if len(calls) == 4:
+                self.fake.inject_error(status=500, code='InternalError')
+
+        summary = self.trim(progress=fail_fifth)
+        self.assertEqual(summary.trimmed, 3 * self.windows - 1)
+        self.assertEqual(len(summary.failed), 1)
+        (uid, window_start, _), _ = summary.failed[0]
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        # the checkpoint stays before the failed window
+        self.assertEqual(state['trimmed'][uid], window_start)
+        summary = self.trim()
+        self.assertEqual(summary.failed, [])
+        self.assertEqual(summary.skipped + summary.trimmed, 3 * self.windows)
+        # the failed window of the uid, and its next ones
+        self.assertEqual(summary.trimmed,
+                         len(list(radosgw.utils.time_windows(window_start, self.end, 12 * HOUR))))
+        summary = self.trim()
+        self.assertEqual((summary.trimmed, summary.skipped), (0, 3 * self.windows))
+
+    def test_timeout(self):
+        self.fake.latency = 0.5
+        self.rgwadmin = self.fake.connection(timeout=0.1,
+                                             retry=radosgw.retry.RetryPolicy(max_attempts=1))
+        summary = self.trim(uids=['user000000'], concurrency=4)
+        self.assertEqual(summary.trimmed, 0)
+        self.assertEqual(len(summary.failed), self.windows)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_other_range_checkpoint_ignored(self):
+        self.trim(uids=['user000000'])
+        self.start -= 12 * HOUR
+        summary = self.trim(uids=['user000000'])
+        self.assertEqual((summary.trimmed, summary.skipped), (self.windows + 1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()